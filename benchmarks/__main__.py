@@ -0,0 +1,84 @@
+"""
+    Runs the benchmarks and writes the results as JSON, for example:
+
+        python -m benchmarks --quick --output results.json
+        python -m benchmarks --suite connection_entry --baseline results.json
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+from benchmarks import connection_entry, entry_writers, monitor, status_tracker
+from benchmarks.harness import BenchmarkResult
+
+logger = logging.getLogger(__name__)
+
+SUITES = OrderedDict([
+    ("connection_entry", connection_entry.run),
+    ("status_tracker", status_tracker.run),
+    ("entry_writers", entry_writers.run),
+    ("monitor", monitor.run)
+])
+
+
+def compare(results: List[BenchmarkResult], baseline: dict) -> List[str]:
+    # One line per benchmark in both runs, with the change in operations per second.
+    baseline_rates = {BenchmarkResult(result["name"], result["parameters"], result["operations"],
+                                      result["times"]).key: result["operations_per_second"]
+                      for result in baseline["benchmarks"]}
+
+    lines = []
+    for result in results:
+        baseline_rate = baseline_rates.get(result.key)
+        if baseline_rate:
+            lines.append("{key}: {rate:.0f} ops/s, {change:+.1%} against the baseline.".format(
+                key=result.key,
+                rate=result.operations_per_second,
+                change=result.operations_per_second / baseline_rate - 1))
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the benchmarks.")
+    parser.add_argument("--suite", action="append", choices=list(SUITES),
+                        help="Suite to run, may be repeated. All of them are run by default.")
+    parser.add_argument("--quick", action="store_true", help="Use smaller sizes, for a quick check.")
+    parser.add_argument("--output", help="File to write the JSON results to, instead of standard output.")
+    parser.add_argument("--baseline", help="Results from an earlier run to compare against.")
+    args = parser.parse_args(argv)
+
+    results: List[BenchmarkResult] = []
+    for suite in args.suite or list(SUITES):
+        logger.info("Running the %s benchmarks.", suite)
+        results.extend(SUITES[suite](args.quick))
+
+    output = {
+        "time": str(datetime.now()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "benchmarks": [result.to_json() for result in results]
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(output, output_file, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            for line in compare(results, json.load(baseline_file)):
+                print(line, file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    sys.exit(main())
@@ -0,0 +1,28 @@
+from typing import List
+
+from benchmarks.harness import BenchmarkResult, make_entries, measure
+from src.connection_entry import ConnectionEntry, decode_entries, encode_entries, format_time, parse_time
+
+ENTRIES = 100000
+QUICK_ENTRIES = 5000
+
+
+def run(quick: bool = False) -> List[BenchmarkResult]:
+    count = QUICK_ENTRIES if quick else ENTRIES
+    entries = make_entries(count)
+    json_entries = encode_entries(entries)
+    times = [format_time(entry.time) for entry in entries]
+    parameters = {"entries": count}
+
+    return [
+        measure("connection_entry.to_json", lambda _: [entry.to_json() for entry in entries], count,
+                parameters=parameters),
+        measure("connection_entry.encode_entries", lambda _: encode_entries(entries), count, parameters=parameters),
+        measure("connection_entry.from_json", lambda _: [ConnectionEntry.from_json(json_entry)
+                                                         for json_entry in json_entries], count,
+                parameters=parameters),
+        measure("connection_entry.decode_entries", lambda _: decode_entries(json_entries), count,
+                parameters=parameters),
+        measure("connection_entry.parse_time", lambda _: [parse_time(time) for time in times], count,
+                parameters=parameters)
+    ]
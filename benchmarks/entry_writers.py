@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+from typing import Callable, Dict, List
+
+from benchmarks.harness import BenchmarkResult, make_entries, measure
+from src.notifiers.binary_entry_writer import BinaryEntryWriter
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.notifiers.json_entry_writer import JsonEntryWriter
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter
+from src.notifiers.segmented_entry_writer import Compression, SegmentedEntryWriter
+from src.notifiers.sqlite_entry_writer import SqliteEntryWriter
+
+# Each writer is created in a fresh directory.
+WRITERS: Dict[str, Callable[[str], EntryWriter]] = {
+    "json": lambda directory: JsonEntryWriter(os.path.join(directory, "data.json")),
+    "json_lines": lambda directory: JsonLinesEntryWriter(os.path.join(directory, "data.jsonl")),
+    "binary": lambda directory: BinaryEntryWriter(os.path.join(directory, "data.bin")),
+    "segmented": lambda directory: SegmentedEntryWriter(os.path.join(directory, "segments"),
+                                                        compression=Compression.NONE),
+    "segmented_gzip": lambda directory: SegmentedEntryWriter(os.path.join(directory, "segments")),
+    "sqlite": lambda directory: SqliteEntryWriter(os.path.join(directory, "data.db"))
+}
+
+HISTORY_SIZES = (0, 1000, 10000)
+QUICK_HISTORY_SIZES = (0, 100, 1000)
+WRITES = 100
+
+
+def run(quick: bool = False) -> List[BenchmarkResult]:
+    """
+        Times writing entries to each writer after history_size entries have already been written, one at a time as
+        the notifier does and as a single batch. A writer whose cost grows with its history shows it here.
+    """
+    results = []
+    entries = make_entries(WRITES, 10 ** 6)
+    for history_size in QUICK_HISTORY_SIZES if quick else HISTORY_SIZES:
+        history = make_entries(history_size)
+        for name, create_writer in WRITERS.items():
+            directories: List[str] = []
+
+            def setup() -> EntryWriter:
+                directory = tempfile.mkdtemp(prefix="benchmark-")
+                directories.append(directory)
+                writer = create_writer(directory)
+                if history:
+                    writer.write_new_entries(history)
+                    writer.flush()
+                return writer
+
+            def write_one_at_a_time(writer: EntryWriter):
+                for entry in entries:
+                    writer.write_new_entry(entry)
+                writer.flush()
+
+            def write_batch(writer: EntryWriter):
+                writer.write_new_entries(entries)
+                writer.flush()
+
+            try:
+                parameters = {"writer": name, "history_size": history_size}
+                results.append(measure("entry_writer.write_entry", write_one_at_a_time, WRITES,
+                                       repeat=3, setup=setup, parameters=parameters))
+                results.append(measure("entry_writer.write_batch", write_batch, WRITES,
+                                       repeat=3, setup=setup, parameters=parameters))
+            finally:
+                for directory in directories:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+    return results
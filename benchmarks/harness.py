@@ -0,0 +1,92 @@
+import gc
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+START_TIME = datetime(2018, 8, 3)
+
+
+class BenchmarkResult(NamedTuple):
+    """
+        The timings of one benchmark, each the seconds taken to run all of its operations once.
+    """
+    name: str
+    parameters: Dict[str, Any]
+    operations: int
+    times: List[float]
+
+    @property
+    def best_time(self) -> float:
+        return min(self.times)
+
+    @property
+    def operations_per_second(self) -> float:
+        return self.operations / self.best_time if self.best_time > 0 else float("inf")
+
+    @property
+    def key(self) -> str:
+        # Identifies the same benchmark across runs, so results can be compared.
+        return self.name + "".join("[{name}={value}]".format(name=name, value=value)
+                                   for name, value in sorted(self.parameters.items()))
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "parameters": self.parameters,
+            "operations": self.operations,
+            "times": self.times,
+            "best_time": self.best_time,
+            "mean_time": sum(self.times) / len(self.times),
+            "operations_per_second": self.operations_per_second
+        }
+
+
+def measure(name: str,
+            function: Callable[[Any], Any],
+            operations: int,
+            repeat: int = 5,
+            setup: Optional[Callable[[], Any]] = None,
+            parameters: Optional[Dict[str, Any]] = None) -> BenchmarkResult:
+    """
+        Times function repeat times, passing it whatever setup returns. Setup runs before every repeat and isn't
+        timed, so each repeat can start from the same state. The garbage collector is paused while timing, as timeit
+        does, so a collection doesn't land on one repeat and not another.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            function(state)
+            times.append(time.perf_counter() - start_time)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    result = BenchmarkResult(name, parameters or {}, operations, times)
+    logger.info("%s: %.0f operations per second.", result.key, result.operations_per_second)
+    return result
+
+
+def make_entries(count: int, start_index: int = 0) -> List[ConnectionEntry]:
+    # A minute apart with a failure every 50 tests, so the statuses and status changes vary like real history.
+    entries = []
+    for index in range(start_index, start_index + count):
+        passed = index % 50 != 0
+        entries.append(ConnectionEntry(START_TIME + timedelta(minutes=index),
+                                       passed,
+                                       Status.OK if passed else Status.WARNING,
+                                       StatusChange.NONE if passed else StatusChange.NEW_WARNING,
+                                       "example.com",
+                                       ProbeLatency(0.012, 0.034, 0.046) if passed else ProbeLatency(0.012)))
+    return entries
@@ -0,0 +1,117 @@
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+from typing import List
+
+from apscheduler.schedulers.base import BaseScheduler
+
+from benchmarks.harness import BenchmarkResult, measure
+from src.connection_tester import ConnectionTester
+from src.metrics import MetricsRegistry, MonitorMetrics
+from src.monitor import Monitor
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryWriterNotifier
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter
+from src.status_tracker import StatusTracker
+
+RUNS = 1000
+QUICK_RUNS = 100
+
+
+class NullScheduler(BaseScheduler):
+    # Accepts jobs without keeping them, so only Monitor's own scheduling work is timed.
+    def __init__(self) -> None:
+        pass
+
+    def add_job(self, *args, **kwargs):
+        pass
+
+    def modify_job(self, *args, **kwargs):
+        pass
+
+    def wakeup(self):
+        pass
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class _AcceptingHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # The tester only connects, so the connection is closed straight away.
+        pass
+
+
+class _TcpServer(socketserver.TCPServer):
+    # Handling is instant, but a short backlog still overflows under back to back connections, costing a second
+    # for the client to retry each time it does.
+    request_queue_size = 128
+
+
+class FakeTcpServer:
+    """
+        Accepts TCP connections on a free local port from a background thread, standing in for the remote host.
+    """
+    def __init__(self) -> None:
+        self._server = _TcpServer(("127.0.0.1", 0), _AcceptingHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="FakeTcpServer", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+def run(quick: bool = False) -> List[BenchmarkResult]:
+    """
+        Times Monitor.run_test end to end against a local server: resolving, connecting, tracking the status,
+        writing the entry and scheduling the next run.
+    """
+    count = QUICK_RUNS if quick else RUNS
+    results = []
+    directory = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        with FakeTcpServer() as server:
+            for writer_name in ("none", "json_lines"):
+                for scheduling_mode in ("date", "persistent"):
+                    for with_metrics in (False, True):
+                        def setup() -> Monitor:
+                            writer: EntryWriter
+                            if writer_name == "json_lines":
+                                writer = JsonLinesEntryWriter(os.path.join(directory, "data.jsonl"))
+                            else:
+                                writer = EntryWriter()
+                            monitor_config = {
+                                "test_interval": 300,
+                                "retry_interval": 10,
+                                "error_interval": 60,
+                                "scheduling_mode": scheduling_mode
+                            }
+                            return Monitor(NullScheduler(),
+                                           ConnectionTester("127.0.0.1", port=server.port),
+                                           StatusTracker(),
+                                           EntryWriterNotifier(writer),
+                                           monitor_config,
+                                           MonitorMetrics(MetricsRegistry()) if with_metrics else None)
+
+                        def run_tests(monitor: Monitor):
+                            for _ in range(count):
+                                monitor.run_test()
+
+                        results.append(measure("monitor.run_test", run_tests, count, repeat=3, setup=setup,
+                                               parameters={"writer": writer_name,
+                                                           "scheduling_mode": scheduling_mode,
+                                                           "metrics": with_metrics}))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return results
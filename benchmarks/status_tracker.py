@@ -0,0 +1,24 @@
+from typing import List
+
+from benchmarks.harness import BenchmarkResult, measure
+from src.status_tracker import StatusTracker
+
+RESULTS = 100000
+QUICK_RESULTS = 5000
+
+
+def run(quick: bool = False) -> List[BenchmarkResult]:
+    count = QUICK_RESULTS if quick else RESULTS
+    results = []
+    # All passing keeps the status the same, a failure every 10 results moves it between OK and WARNING.
+    for pattern, passes in (("steady", [True] * count),
+                            ("flapping", [index % 10 != 0 for index in range(count)])):
+        def submit_results(status_tracker: StatusTracker):
+            submit_result = status_tracker.submit_result
+            for passed in passes:
+                submit_result(passed)
+
+        results.append(measure("status_tracker.submit_result", submit_results, count, setup=StatusTracker,
+                               parameters={"pattern": pattern}))
+
+    return results
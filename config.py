@@ -1,3 +1,7 @@
 import os
 
 ROOT_DIR = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
+
+# The Prometheus metrics endpoint is off unless METRICS_ENABLED is set, METRICS_PORT overrides its default port.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.environ["METRICS_PORT"]) if os.environ.get("METRICS_PORT") else None
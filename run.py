@@ -1,15 +1,22 @@
 import os
+import signal
+import sys
 import yaml
 import logging.config
 
 from apscheduler.schedulers.blocking import BlockingScheduler
 
-from config import ROOT_DIR
+from config import METRICS_ENABLED, METRICS_PORT, ROOT_DIR
 from src.monitor import Monitor
 from src.connection_tester import ConnectionTester
 from src.status_tracker import StatusTracker
-from src.notifiers.entry_writer_notifier import EntryWriterNotifier
-from src.notifiers.json_entry_writer import JsonEntryWriter
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter, JsonLinesEntryReader
+from src.notifiers.buffered_entry_writer import BufferedEntryWriter, FsyncPolicy
+from src.notifiers.queued_notifier import QueuedNotifier, OverflowPolicy
+from src.notifiers.timed_entry_writer import TimedEntryWriter
+from src.rollups import RollupStore, RollupEntryWriter
+from src.metrics import DEFAULT_PORT, MetricsRegistry, MetricsServer, MonitorMetrics
+from src.profiler import RunProfiler
 
 
 def setup_logging() -> None:
@@ -24,18 +31,39 @@ logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
     scheduler = BlockingScheduler()
+    metrics = MonitorMetrics(MetricsRegistry())
+    metrics_server = MetricsServer(metrics.registry, port=METRICS_PORT or DEFAULT_PORT) if METRICS_ENABLED else None
     connection_tester = ConnectionTester()
     status_tracker = StatusTracker()
-    json_writer = JsonEntryWriter(os.path.join(os.path.dirname(os.path.realpath(__file__)), "data", "test_data.json"))
-    notifier = EntryWriterNotifier(json_writer)
+    data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data", "test_data.jsonl")
+    rollup_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data", "test_data.rollups")
+    json_writer = JsonLinesEntryWriter(data_file)
+    rollup_store = RollupStore(rollup_file)
+    # The store is only saved now and then, so entries written since the last save are replayed from the history.
+    if rollup_store.catch_up(JsonLinesEntryReader(data_file)):
+        rollup_store.save()
+    rollup_writer = RollupEntryWriter(TimedEntryWriter(json_writer, metrics, "json_lines"), rollup_store)
+    buffered_writer = BufferedEntryWriter(rollup_writer, batch_size=10, max_age=60, fsync_policy=FsyncPolicy.PER_BATCH)
+    notifier = QueuedNotifier(buffered_writer, max_size=1000, overflow_policy=OverflowPolicy.COALESCE)
+    metrics.watch_queue("notifier", lambda: notifier.queue_size)
+    metrics.watch_queue("buffer", lambda: buffered_writer.buffered_entries)
     monitor_config = {
         "test_interval": 300,
         "retry_interval": 10,
-        "error_interval": 60
+        "error_interval": 60,
+        "scheduling_mode": "persistent"
     }
-    monitor = Monitor(scheduler, connection_tester, status_tracker, notifier, monitor_config)
+    # kill -USR1 <pid> profiles the next 10 test runs, writing the report to profiles/.
+    profiler = RunProfiler(os.path.join(os.path.dirname(os.path.realpath(__file__)), "profiles"))
+    profiler.install_signal_handler(10)
+    # docker stop sends SIGTERM, exiting through the finally below means queued entries and rollups are saved.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    monitor = Monitor(scheduler, connection_tester, status_tracker, notifier, monitor_config, metrics, profiler)
 
     try:
+        if metrics_server is not None:
+            metrics_server.start()
+        scheduler.add_job(buffered_writer.flush_if_due, "interval", seconds=60)
         logger.info("Run the first initial test.")
         monitor.run_test()
         logger.info("Start the scheduler proper.")
@@ -44,3 +72,8 @@ if __name__ == "__main__":
         logger.info("Shutting down the scheduler.")
         scheduler.shutdown()
         pass
+    finally:
+        logger.info("Writing any queued and buffered entries.")
+        notifier.close()
+        if metrics_server is not None:
+            metrics_server.stop()
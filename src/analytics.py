@@ -0,0 +1,168 @@
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy
+
+from src.connection_entry import ConnectionEntry, datetime_to_epoch_us
+from src.notifiers.binary_entry_writer import RECORD_DTYPE
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+MICROSECONDS = 1000000
+
+
+class History(NamedTuple):
+    """
+        Entry fields as parallel arrays in time order. Times are microseconds since the epoch, statuses and status
+        changes hold the enum values.
+    """
+    time: numpy.ndarray
+    result: numpy.ndarray
+    status: numpy.ndarray
+    status_change: numpy.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.time)
+
+
+class Outages(NamedTuple):
+    """
+        Each outage runs from a NEW_ERROR entry to the following ERROR_RESOLVED entry. An outage which hasn't been
+        resolved yet ends at the last entry.
+    """
+    start: numpy.ndarray
+    end: numpy.ndarray
+    resolved: numpy.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.start)
+
+    @property
+    def durations(self) -> numpy.ndarray:
+        return (self.end - self.start) / MICROSECONDS
+
+
+class HistorySummary(NamedTuple):
+    entries: int
+    failures: int
+    success_rate: float
+    uptime: float
+    outages: int
+    mean_time_to_recovery: float
+
+
+def history_from_records(records: numpy.ndarray) -> History:
+    # The fields of a structured array are views, so records from a BinaryEntryReader aren't copied.
+    return History(records["time"], records["result"].view(numpy.bool_), records["status"], records["status_change"])
+
+
+def load_history(entries: Iterable[ConnectionEntry], target: Optional[str] = None) -> History:
+    """
+        Loads the entries for one target, only those with the given target when it is set. Outages are found by
+        pairing status changes, so entries from several targets can't be loaded into one history.
+    """
+    targets = set()
+
+    def target_entries():
+        for entry in entries:
+            if target is None:
+                targets.add(entry.target)
+            elif entry.target != target:
+                continue
+            yield (datetime_to_epoch_us(entry.time), entry.result, entry.status.value, entry.status_change.value)
+
+    records = numpy.fromiter(target_entries(), dtype=RECORD_DTYPE)
+    if len(targets) > 1:
+        logger.error("Entries for several targets loaded into one history: %s.", targets)
+        raise ValueError("Entries are for more than one target, {targets}, load each target separately."
+                         .format(targets=", ".join(sorted(str(name) for name in targets))))
+
+    return history_from_records(records)
+
+
+def failure_count(history: History) -> int:
+    return int(history.size - numpy.count_nonzero(history.result))
+
+
+def success_rate(history: History) -> float:
+    if not history.size:
+        return 0.0
+
+    return float(numpy.count_nonzero(history.result) / history.size)
+
+
+def find_outages(history: History) -> Outages:
+    error_starts = numpy.flatnonzero(history.status_change == StatusChange.NEW_ERROR.value)
+    error_ends = numpy.flatnonzero(history.status_change == StatusChange.ERROR_RESOLVED.value)
+
+    # Pair each start with the first resolution after it, any repeated starts before that resolution are ignored.
+    end_positions = numpy.searchsorted(error_ends, error_starts)
+    end_positions, first_starts = numpy.unique(end_positions, return_index=True)
+    error_starts = error_starts[first_starts]
+
+    resolved = end_positions < len(error_ends)
+    end_indexes = numpy.full(len(error_starts), history.size - 1)
+    end_indexes[resolved] = error_ends[end_positions[resolved]]
+
+    return Outages(history.time[error_starts], history.time[end_indexes], resolved)
+
+
+def uptime(history: History, outages: Optional[Outages] = None) -> float:
+    """
+        The fraction of the time covered by the history which wasn't spent in an outage.
+    """
+    if history.size < 2:
+        return 1.0
+
+    total_time = (history.time[-1] - history.time[0]) / MICROSECONDS
+    if total_time <= 0:
+        return 1.0
+
+    if outages is None:
+        outages = find_outages(history)
+
+    return float(1.0 - outages.durations.sum() / total_time)
+
+
+def mean_time_to_recovery(history: History, outages: Optional[Outages] = None) -> float:
+    """
+        Mean duration in seconds of the outages which have been resolved, NaN if none have.
+    """
+    if outages is None:
+        outages = find_outages(history)
+    if not outages.resolved.any():
+        return float("nan")
+
+    return float(outages.durations[outages.resolved].mean())
+
+
+def time_in_status(history: History) -> dict:
+    """
+        Seconds spent in each Status, counting the time between two entries towards the first entry's status.
+    """
+    durations = numpy.diff(history.time) / MICROSECONDS
+    totals = numpy.bincount(history.status[:-1], weights=durations, minlength=len(Status))
+
+    return {status: float(totals[status.value]) for status in Status}
+
+
+def summarise(history: History) -> HistorySummary:
+    outages = find_outages(history)
+
+    return HistorySummary(entries=history.size,
+                          failures=failure_count(history),
+                          success_rate=success_rate(history),
+                          uptime=uptime(history, outages),
+                          outages=outages.size,
+                          mean_time_to_recovery=mean_time_to_recovery(history, outages))
+
+
+def summarise_targets(entries: Iterable[ConnectionEntry]) -> Dict[Optional[str], HistorySummary]:
+    target_entries: Dict[Optional[str], List[ConnectionEntry]] = {}
+    for entry in entries:
+        target_entries.setdefault(entry.target, []).append(entry)
+
+    return {target: summarise(load_history(entries, target)) for target, entries in target_entries.items()}
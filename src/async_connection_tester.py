@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import socket
+import time
+from typing import List, Optional
+
+from src.connection_tester import ConnectionTester, ProbeOutcome, ProbeLatency, ProbeResult
+from src.dns_cache import DnsCache
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncConnectionTester(ConnectionTester):
+    """
+        Resolves and connects without blocking, so many testers can be run together on one event loop with
+        run_tests, which limits how many run at once. run_test still blocks until this tester's result is known, so
+        it can be used by Monitor.
+    """
+    def __init__(self,
+                 remote_to_check: str = "www.google.com",
+                 port: int = 80,
+                 timeout: float = 2,
+                 dns_cache: Optional[DnsCache] = None):
+        super().__init__(remote_to_check, dns_cache, port)
+        self.timeout = timeout
+
+    def run_detailed_test(self) -> ProbeResult:
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run_detailed_test_async())
+        finally:
+            loop.close()
+
+    async def run_test_async(self, semaphore: Optional[asyncio.Semaphore] = None) -> bool:
+        return (await self.run_detailed_test_async(semaphore)).passed
+
+    async def run_detailed_test_async(self, semaphore: Optional[asyncio.Semaphore] = None) -> ProbeResult:
+        if semaphore is None:
+            return await self._run_detailed_test()
+
+        async with semaphore:
+            return await self._run_detailed_test()
+
+    async def _run_detailed_test(self) -> ProbeResult:
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.timeout
+        start_time = time.perf_counter()
+
+        try:
+            # see if we can resolve the host name -- tells us if there is
+            # a DNS listening
+            host = await asyncio.wait_for(self._resolve_async(loop), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Resolving %s timed out after %s seconds.", self.remote_to_check, self.timeout)
+            return self._failed_result(ProbeOutcome.DNS_FAILURE, start_time)
+        except OSError:
+            logger.exception("DNS")
+            return self._failed_result(ProbeOutcome.DNS_FAILURE, start_time)
+        resolved_time = time.perf_counter()
+
+        try:
+            # connect to the host -- tells us if the host is actually
+            # reachable
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, self.port),
+                                               max(deadline - loop.time(), 0))
+            connected_time = time.perf_counter()
+            writer.close()
+            return ProbeResult(ProbeOutcome.SUCCESS, ProbeLatency(resolved_time - start_time,
+                                                                  connected_time - resolved_time,
+                                                                  connected_time - start_time))
+        except asyncio.TimeoutError:
+            logger.warning("Test of %s:%s timed out after %s seconds.", self.remote_to_check, self.port, self.timeout)
+        except OSError:
+            logger.exception("Test")
+        return self._failed_result(ProbeOutcome.CONNECTION_FAILURE, start_time, resolved_time - start_time)
+
+    @staticmethod
+    def _failed_result(outcome: ProbeOutcome, start_time: float, dns_time: Optional[float] = None) -> ProbeResult:
+        return ProbeResult(outcome, ProbeLatency(dns_time, total_time=time.perf_counter() - start_time))
+
+    async def _resolve_async(self, loop: asyncio.AbstractEventLoop) -> str:
+        if self.dns_cache is not None:
+            cached_address = self.dns_cache.get(self.remote_to_check)
+            if cached_address is not None:
+                return cached_address
+
+        try:
+            addresses = await loop.getaddrinfo(self.remote_to_check, self.port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            if self.dns_cache is not None:
+                self.dns_cache.put(self.remote_to_check, None)
+            raise
+
+        address = str(addresses[0][4][0])
+        if self.dns_cache is not None:
+            self.dns_cache.put(self.remote_to_check, address)
+        return address
+
+
+async def run_detailed_tests_async(testers: List[AsyncConnectionTester],
+                                   max_concurrency: int = 100) -> List[ProbeResult]:
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    return await asyncio.gather(*(tester.run_detailed_test_async(semaphore) for tester in testers))
+
+
+def run_detailed_tests(testers: List[AsyncConnectionTester], max_concurrency: int = 100) -> List[ProbeResult]:
+    """
+        Runs all of the testers concurrently, at most max_concurrency at a time, and returns their results in the
+        same order.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run_detailed_tests_async(testers, max_concurrency))
+    finally:
+        loop.close()
+
+
+def run_tests(testers: List[AsyncConnectionTester], max_concurrency: int = 100) -> List[bool]:
+    return [result.passed for result in run_detailed_tests(testers, max_concurrency)]
@@ -0,0 +1,44 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class Clock:
+    """
+        Where StatusTracker and Monitor get the time from, the system clock unless a subclass says otherwise. now
+        gives the local time recorded in entries and monotonic the seconds used to plan runs, which never go
+        backwards.
+    """
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock(Clock):
+    """
+        A clock which only moves when advanced, so a simulation can jump straight from one scheduled run to the next.
+    """
+    def __init__(self, start: datetime) -> None:
+        self._start = start
+        self._elapsed = 0.0
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self._elapsed)
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def advance(self, seconds: float):
+        if seconds < 0:
+            logger.error("Cannot move a virtual clock backwards by %s seconds.", seconds)
+            raise ValueError("Seconds must not be negative, received {seconds}.".format(seconds=seconds))
+
+        self._elapsed += seconds
+
+    def advance_to(self, time: datetime):
+        # Times in the past leave the clock where it is, as a late job runs now rather than when it was due.
+        self._elapsed = max(self._elapsed, (time - self._start).total_seconds())
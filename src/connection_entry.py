@@ -1,41 +1,147 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
 from src.status_tracker import Status, StatusChange
+from src.connection_tester import ProbeLatency
 
 logger = logging.getLogger(__name__)
 
+EPOCH = datetime(1970, 1, 1)
+
+REQUIRED_KEYS = ("time", "result", "status", "status_change")
+LATENCY_KEYS = ("dns_time", "connect_time", "total_time")
+# Only written for HTTP probes.
+HTTP_KEYS = ("status_code", "first_byte_time")
+# Keys which older entries won't have.
+OPTIONAL_KEYS = ("target",) + LATENCY_KEYS + HTTP_KEYS
+ALL_KEYS = frozenset(REQUIRED_KEYS + OPTIONAL_KEYS)
+
+# Name lookups without going through the Enum metaclass.
+STATUSES = dict(Status.__members__)
+STATUS_CHANGES = dict(StatusChange.__members__)
+
+
+def _describe_keys(keys: tuple) -> str:
+    return "{keys} or {last_key}".format(keys=", ".join(keys[:-1]), last_key=keys[-1])
+
+
+def datetime_to_epoch_us(time: datetime) -> int:
+    # Times are naive local times, so this is a plain offset rather than a UTC timestamp. It round-trips exactly.
+    return (time - EPOCH) // timedelta(microseconds=1)
+
+
+def epoch_us_to_datetime(epoch_us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=epoch_us)
+
+
+def parse_time(time: str) -> datetime:
+    """
+        Parses times in the format written by str(datetime), "YYYY-MM-DD HH:MM:SS" followed by ".ffffff" when there
+        are microseconds. Slicing the fields out is several times faster than strptime.
+    """
+    length = len(time)
+    if ((length != 19 and length != 26) or
+            time[4] != "-" or time[7] != "-" or time[10] != " " or time[13] != ":" or time[16] != ":" or
+            (length == 26 and time[19] != ".") or
+            not (time[0:4] + time[5:7] + time[8:10] + time[11:13] + time[14:16] + time[17:19] + time[20:]).isdigit()):
+        logger.error("Failed to parse time: %s.", time)
+        raise ValueError("Time '{time}' is not in the format YYYY-MM-DD HH:MM:SS[.ffffff].".format(time=time))
+
+    return datetime(int(time[0:4]), int(time[5:7]), int(time[8:10]),
+                    int(time[11:13]), int(time[14:16]), int(time[17:19]),
+                    int(time[20:]) if length == 26 else 0)
+
+
+def format_time(time: datetime) -> str:
+    return str(time)
+
 
 class ConnectionEntry:
-    def __init__(self, time: datetime, result: bool, status: Status, status_change: StatusChange):
+    __slots__ = ("_time", "_result", "_status", "_status_change", "_target", "_latency", "_status_code",
+                 "_first_byte_time")
+
+    def __init__(self,
+                 time: datetime,
+                 result: bool,
+                 status: Status,
+                 status_change: StatusChange,
+                 target: Optional[str] = None,
+                 latency: Optional[ProbeLatency] = None,
+                 status_code: Optional[int] = None,
+                 first_byte_time: Optional[float] = None):
         self._time = time
         self._result = result
         self._status = status
         self._status_change = status_change
+        self._target = target
+        self._latency = latency
+        self._status_code = status_code
+        self._first_byte_time = first_byte_time
+
+    @property
+    def time(self) -> datetime:
+        return self._time
+
+    @property
+    def result(self) -> bool:
+        return self._result
+
+    @property
+    def status(self) -> Status:
+        return self._status
+
+    @property
+    def status_change(self) -> StatusChange:
+        return self._status_change
+
+    @property
+    def target(self) -> Optional[str]:
+        return self._target
+
+    @property
+    def latency(self) -> Optional[ProbeLatency]:
+        return self._latency
+
+    @property
+    def status_code(self) -> Optional[int]:
+        return self._status_code
+
+    @property
+    def first_byte_time(self) -> Optional[float]:
+        return self._first_byte_time
 
     @classmethod
     def from_json(cls, json_entry: dict):
-        if not all(key in json_entry for key in ("time", "result", "status", "status_change")):
+        if not all(key in json_entry for key in REQUIRED_KEYS):
             logger.error("Failed to create ConnectionEntry from dictionary: %s.", json_entry)
-            raise ValueError("Dictionary '{dict}' did not contain one of; time, result, status or status_change."
-                             .format(dict=json_entry))
-        if any(key not in ("time", "result", "status", "status_change") for key in json_entry):
+            raise ValueError("Dictionary '{dict}' did not contain one of; {keys}."
+                             .format(dict=json_entry, keys=_describe_keys(REQUIRED_KEYS)))
+        if not json_entry.keys() <= ALL_KEYS:
+            logger.error("Failed to create ConnectionEntry from dictionary: %s.", json_entry)
+            raise ValueError("Dictionary '{dict}' contains key which is not; {keys}."
+                             .format(dict=json_entry, keys=_describe_keys(REQUIRED_KEYS + OPTIONAL_KEYS)))
+        if json_entry["status"] not in STATUSES or json_entry["status_change"] not in STATUS_CHANGES:
             logger.error("Failed to create ConnectionEntry from dictionary: %s.", json_entry)
-            raise ValueError("Dictionary '{dict}' contains key which is not; time, result, status or status_change."
+            raise ValueError("Dictionary '{dict}' contains an unknown status or status change."
                              .format(dict=json_entry))
 
-        return ConnectionEntry(datetime.strptime(json_entry["time"],
-                                                 "%Y-%m-%d %H:%M:%S"),
-                               bool(json_entry["result"]),
-                               Status[json_entry["status"]],
-                               StatusChange[json_entry["status_change"]])
+        return _decode_entry(json_entry)
 
     def to_json(self):
         json_dict = {
-            "time": str(self._time),
+            "time": format_time(self._time),
             "result": self._result,
             "status": self._status.name,
             "status_change": self._status_change.name
         }
+        if self._target is not None:
+            json_dict["target"] = self._target
+        if self._latency is not None:
+            json_dict.update(zip(LATENCY_KEYS, self._latency))
+        if self._status_code is not None:
+            json_dict["status_code"] = self._status_code
+        if self._first_byte_time is not None:
+            json_dict["first_byte_time"] = self._first_byte_time
 
         return json_dict
 
@@ -44,7 +150,50 @@ class ConnectionEntry:
                 (self._time == other._time) and
                 (self._result == other._result) and
                 (self._status == other._status) and
-                (self._status_change == other._status_change))
+                (self._status_change == other._status_change) and
+                (self._target == other._target) and
+                (self._latency == other._latency) and
+                (self._status_code == other._status_code) and
+                (self._first_byte_time == other._first_byte_time))
 
     def __str__(self):
         return str(self.to_json())
+
+
+def _decode_entry(json_entry: dict) -> ConnectionEntry:
+    # Assumes the keys have already been checked, any other problem raises a KeyError, TypeError or ValueError.
+    latency = None
+    if "total_time" in json_entry or "dns_time" in json_entry or "connect_time" in json_entry:
+        latency = ProbeLatency(json_entry.get("dns_time"), json_entry.get("connect_time"), json_entry.get("total_time"))
+
+    return ConnectionEntry(parse_time(json_entry["time"]),
+                           bool(json_entry["result"]),
+                           STATUSES[json_entry["status"]],
+                           STATUS_CHANGES[json_entry["status_change"]],
+                           json_entry.get("target"),
+                           latency,
+                           json_entry.get("status_code"),
+                           json_entry.get("first_byte_time"))
+
+
+def encode_entries(entries: Iterable[ConnectionEntry]) -> List[dict]:
+    return [entry.to_json() for entry in entries]
+
+
+def decode_entries(json_entries: Iterable[dict]) -> List[ConnectionEntry]:
+    """
+        Decodes many entries at once. Each dictionary only has its keys checked before decoding, the full checks of
+        ConnectionEntry.from_json are only run to report a dictionary which fails, so malformed input still raises
+        the same ValueError.
+    """
+    entries = []
+    for json_entry in json_entries:
+        try:
+            if json_entry.keys() <= ALL_KEYS:
+                entries.append(_decode_entry(json_entry))
+                continue
+        except (KeyError, TypeError, ValueError, AttributeError):
+            pass
+        entries.append(ConnectionEntry.from_json(json_entry))
+
+    return entries
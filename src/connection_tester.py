@@ -1,24 +1,88 @@
 import logging
 import socket
+import time
+from enum import Enum
+from typing import NamedTuple, Optional
+
+from src.dns_cache import DnsCache
 
 logger = logging.getLogger(__name__)
 
 
+class ProbeOutcome(Enum):
+    """
+        This enum is used to indicate which part of a connection test failed, if any.
+    """
+    SUCCESS = 0             # The host name resolved and a connection was made
+    DNS_FAILURE = 1         # The host name could not be resolved
+    CONNECTION_FAILURE = 2  # The host name resolved but no connection could be made
+    HTTP_FAILURE = 3        # A connection was made but the request failed or got an unexpected status code
+
+
+class ProbeLatency(NamedTuple):
+    """
+        Durations in seconds of each part of a connection test, parts which weren't completed are None.
+    """
+    dns_time: Optional[float] = None
+    connect_time: Optional[float] = None
+    total_time: Optional[float] = None
+
+
+class ProbeResult(NamedTuple):
+    outcome: ProbeOutcome
+    latency: ProbeLatency = ProbeLatency()
+    # Only set by HTTP probes, the seconds from sending the request to receiving the response headers.
+    status_code: Optional[int] = None
+    first_byte_time: Optional[float] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.outcome == ProbeOutcome.SUCCESS
+
+
 class ConnectionTester:
-    def __init__(self, remote_to_check: str = "www.google.com"):
+    def __init__(self, remote_to_check: str = "www.google.com", dns_cache: Optional[DnsCache] = None, port: int = 80):
         logger.debug("PingTester created.")
         self.remote_to_check = remote_to_check
+        self.dns_cache = dns_cache
+        self.port = port
 
     def run_test(self) -> bool:
+        return self.run_detailed_test().passed
+
+    def run_detailed_test(self) -> ProbeResult:
+        start_time = time.perf_counter()
         try:
             # see if we can resolve the host name -- tells us if there is
             # a DNS listening
-            host = socket.gethostbyname(self.remote_to_check)
+            host = self._resolve()
+        except socket.error:
+            logger.exception("DNS")
+            total_time = time.perf_counter() - start_time
+            return ProbeResult(ProbeOutcome.DNS_FAILURE, ProbeLatency(total_time=total_time))
+        resolved_time = time.perf_counter()
+        dns_time = resolved_time - start_time
+
+        try:
             # connect to the host -- tells us if the host is actually
             # reachable
-            socket.create_connection((host, 80), 2)
-            return True
+            with socket.create_connection((host, self.port), 2):
+                connected_time = time.perf_counter()
+            return ProbeResult(ProbeOutcome.SUCCESS,
+                               ProbeLatency(dns_time, connected_time - resolved_time, connected_time - start_time))
         except socket.error:
             logger.exception("Test")
             pass
-        return False
+        total_time = time.perf_counter() - start_time
+        return ProbeResult(ProbeOutcome.CONNECTION_FAILURE, ProbeLatency(dns_time, total_time=total_time))
+
+    def _resolve(self) -> str:
+        return resolve(self.remote_to_check, self.dns_cache)
+
+
+def resolve(host_name: str, dns_cache: Optional[DnsCache] = None) -> str:
+    # Shared by the testers which resolve before connecting, so a DNS failure is detected the same way by each.
+    if dns_cache is not None:
+        return dns_cache.resolve(host_name)
+
+    return socket.gethostbyname(host_name)
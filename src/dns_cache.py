@@ -0,0 +1,87 @@
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DnsCache:
+    """
+        Caches host name resolutions for ttl seconds and failed resolutions for negative_ttl seconds, holding at
+        most max_size names and dropping the least recently used first. One cache can be shared between any
+        number of testers.
+    """
+    def __init__(self,
+                 ttl: float = 300,
+                 negative_ttl: float = 30,
+                 max_size: int = 1024,
+                 resolver: Optional[Callable[[str], str]] = None):
+        if max_size < 1:
+            raise ValueError("Cache size must be at least 1, received {size}.".format(size=max_size))
+
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._max_size = max_size
+        self._resolver = resolver
+
+        self._lock = threading.Lock()
+        # Maps host name to (expiry time, address), a missing address marks a failed resolution.
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def resolve(self, host_name: str) -> str:
+        address = self.get(host_name)
+        if address is not None:
+            return address
+
+        try:
+            address = self._resolver(host_name) if self._resolver else socket.gethostbyname(host_name)
+        except socket.gaierror:
+            self.put(host_name, None)
+            raise
+
+        self.put(host_name, address)
+        return address
+
+    def get(self, host_name: str) -> Optional[str]:
+        """
+            Returns the cached address or None when nothing is cached, a cached failure is raised as
+            socket.gaierror.
+        """
+        with self._lock:
+            cached = self._entries.get(host_name)
+            if cached is None:
+                return None
+
+            expiry_time, address = cached
+            if expiry_time <= time.monotonic():
+                del self._entries[host_name]
+                return None
+
+            self._entries.move_to_end(host_name)
+
+        if address is None:
+            raise socket.gaierror(socket.EAI_NONAME, "Cached failure to resolve {host}.".format(host=host_name))
+        return address
+
+    def put(self, host_name: str, address: Optional[str]):
+        ttl = self._ttl if address is not None else self._negative_ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[host_name] = (time.monotonic() + ttl, address)
+            self._entries.move_to_end(host_name)
+
+            while len(self._entries) > self._max_size:
+                removed_host, _ = self._entries.popitem(last=False)
+                logger.debug("DNS cache full, removed %s.", removed_host)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
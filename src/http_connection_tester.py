@@ -0,0 +1,198 @@
+import http.client
+import logging
+import socket
+import ssl
+import threading
+import time
+from typing import Container, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from src.connection_tester import ConnectionTester, ProbeLatency, ProbeOutcome, ProbeResult
+from src.dns_cache import DnsCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+SUCCESS_STATUSES = range(200, 400)
+
+
+class HttpUrl(NamedTuple):
+    scheme: str
+    host: str
+    port: int
+    # The host and port as given in the URL, for the Host header.
+    netloc: str
+    # The path and query to request.
+    path: str
+
+
+def parse_http_url(url: str) -> HttpUrl:
+    parsed_url = urlsplit(url)
+    if parsed_url.scheme not in DEFAULT_PORTS or not parsed_url.hostname:
+        logger.error("Failed to parse HTTP URL: %s.", url)
+        raise ValueError("URL '{url}' is not an http or https URL with a host.".format(url=url))
+
+    path = (parsed_url.path or "/") + ("?" + parsed_url.query if parsed_url.query else "")
+    return HttpUrl(parsed_url.scheme, parsed_url.hostname, parsed_url.port or DEFAULT_PORTS[parsed_url.scheme],
+                   parsed_url.netloc, path)
+
+
+class PoolKey(NamedTuple):
+    scheme: str
+    host: str
+    port: int
+
+
+class PooledConnection(NamedTuple):
+    connection: http.client.HTTPConnection
+    address: str
+
+
+class HttpConnectionPool:
+    """
+        Keeps idle keep-alive connections for each scheme, host and port, so a probe can reuse the connection the
+        last one left open rather than connecting again. Testers can share a pool, it is thread safe.
+    """
+    def __init__(self, max_idle_per_host: int = 2) -> None:
+        self._max_idle_per_host = max_idle_per_host
+        self._lock = threading.Lock()
+        self._idle: Dict[PoolKey, List[PooledConnection]] = {}
+
+    def acquire(self, key: PoolKey, address: str) -> Optional[http.client.HTTPConnection]:
+        # An idle connection to the address the host resolved to, or None if there isn't one.
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                pooled = idle.pop()
+                if pooled.address == address:
+                    return pooled.connection
+                # The host now resolves somewhere else, so connections to the old address are dropped.
+                pooled.connection.close()
+        return None
+
+    def release(self, key: PoolKey, address: str, connection: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle_per_host:
+                idle.append(PooledConnection(connection, address))
+                return
+        connection.close()
+
+    def idle_connections(self, key: PoolKey) -> int:
+        with self._lock:
+            return len(self._idle.get(key, []))
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for pooled in connections:
+                pooled.connection.close()
+
+
+class HttpConnectionTester(ConnectionTester):
+    """
+        Probes a URL with a HEAD or GET request, passing when the response has one of the expected status codes.
+        Connections are kept alive in the pool between probes, so the connect time is None when one was reused.
+        The host name is still resolved on every probe, so DNS failures are caught as they are by ConnectionTester.
+    """
+    def __init__(self,
+                 url: str = "http://www.google.com/",
+                 method: str = "HEAD",
+                 timeout: float = 5,
+                 expected_statuses: Container[int] = SUCCESS_STATUSES,
+                 pool: Optional[HttpConnectionPool] = None,
+                 dns_cache: Optional[DnsCache] = None,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        http_url = parse_http_url(url)
+        super().__init__(http_url.host, dns_cache, http_url.port)
+        self.url = url
+        self.method = method
+        self.timeout = timeout
+        self.expected_statuses = expected_statuses
+        self.pool = pool or HttpConnectionPool()
+        self._key = PoolKey(http_url.scheme, http_url.host, http_url.port)
+        self._path = http_url.path
+        self._ssl_context = (ssl_context or ssl.create_default_context()) if http_url.scheme == "https" else None
+
+    def run_detailed_test(self) -> ProbeResult:
+        start_time = time.perf_counter()
+        try:
+            address = self._resolve()
+        except socket.error:
+            logger.exception("DNS")
+            return ProbeResult(ProbeOutcome.DNS_FAILURE, ProbeLatency(total_time=time.perf_counter() - start_time))
+        resolved_time = time.perf_counter()
+        dns_time = resolved_time - start_time
+
+        connection = self.pool.acquire(self._key, address)
+        connect_time = None
+        if connection is not None:
+            try:
+                return self._request(connection, address, start_time, dns_time, connect_time)
+            except (http.client.HTTPException, OSError):
+                # The server may have closed the idle connection, so it is worth one more try on a new one.
+                logger.debug("Reused connection to %s failed, reconnecting.", self.remote_to_check, exc_info=True)
+                connection.close()
+
+        connect_start = time.perf_counter()
+        try:
+            connection = self._connect(address)
+        except OSError:
+            logger.exception("Test")
+            return ProbeResult(ProbeOutcome.CONNECTION_FAILURE,
+                               ProbeLatency(dns_time, total_time=time.perf_counter() - start_time))
+        connect_time = time.perf_counter() - connect_start
+
+        try:
+            return self._request(connection, address, start_time, dns_time, connect_time)
+        except (http.client.HTTPException, OSError):
+            logger.exception("HTTP")
+            connection.close()
+            return ProbeResult(ProbeOutcome.HTTP_FAILURE,
+                               ProbeLatency(dns_time, connect_time, time.perf_counter() - start_time))
+
+    def close(self):
+        self.pool.close()
+
+    def _connect(self, address: str) -> http.client.HTTPConnection:
+        # Connects to the resolved address, while requests and certificate checks still use the host name.
+        connection: http.client.HTTPConnection
+        sock = socket.create_connection((address, self.port), self.timeout)
+        if self._ssl_context is not None:
+            try:
+                sock = self._ssl_context.wrap_socket(sock, server_hostname=self.remote_to_check)
+            except OSError:
+                sock.close()
+                raise
+            connection = http.client.HTTPSConnection(self.remote_to_check, self.port, timeout=self.timeout,
+                                                     context=self._ssl_context)
+        else:
+            connection = http.client.HTTPConnection(self.remote_to_check, self.port, timeout=self.timeout)
+        connection.sock = sock
+        return connection
+
+    def _request(self,
+                 connection: http.client.HTTPConnection,
+                 address: str,
+                 start_time: float,
+                 dns_time: float,
+                 connect_time: Optional[float]) -> ProbeResult:
+        request_time = time.perf_counter()
+        connection.request(self.method, self._path)
+        response = connection.getresponse()
+        first_byte_time = time.perf_counter() - request_time
+        # The body has to be read before the connection can be used again.
+        response.read()
+        total_time = time.perf_counter() - start_time
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(self._key, address, connection)
+
+        outcome = ProbeOutcome.SUCCESS if response.status in self.expected_statuses else ProbeOutcome.HTTP_FAILURE
+        if outcome != ProbeOutcome.SUCCESS:
+            logger.warning("%s %s returned status %s.", self.method, self.url, response.status)
+        return ProbeResult(outcome, ProbeLatency(dns_time, connect_time, total_time), response.status,
+                           first_byte_time)
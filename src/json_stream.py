@@ -0,0 +1,127 @@
+import codecs
+import json
+import logging
+from typing import Any, BinaryIO, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = " \t\n\r"
+NUMBER_CHARACTERS = "0123456789+-.eE"
+
+
+class JsonArrayParser:
+    """
+        Parses the values of a top level JSON array one at a time, only holding the value currently being parsed
+        in memory. After each value is yielded, offset is the byte position just after it, which can be passed
+        back in as resume_offset to carry on from that point later.
+    """
+    def __init__(self,
+                 json_file: BinaryIO,
+                 resume_offset: Optional[int] = None,
+                 chunk_size: int = 65536,
+                 max_value_size: int = 1048576):
+        self._file = json_file
+        self._chunk_size = chunk_size
+        self._max_value_size = max_value_size
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+
+        self._buffer = ""
+        self._position = 0
+        self._end_of_file = False
+        # Byte offset of the character at _offset_position in the buffer.
+        self._byte_offset = resume_offset or 0
+        self._offset_position = 0
+        self.offset = self._byte_offset
+
+        if resume_offset is not None:
+            self._file.seek(resume_offset)
+        self._resuming = resume_offset is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        if not self._resuming:
+            self._expect("[")
+            if self._peek() == "]":
+                return
+        elif self._consume_separator():
+            return
+
+        while True:
+            value = self._parse_value()
+            self.offset = self._current_offset()
+            yield value
+
+            if self._consume_separator():
+                return
+
+    def _consume_separator(self) -> bool:
+        # Returns whether the end of the array has been reached.
+        separator = self._peek()
+        if separator not in ",]":
+            self._raise_error("Expected ',' or ']'")
+        self._position += 1
+        return separator == "]"
+
+    def _parse_value(self) -> Any:
+        if self._peek() in NUMBER_CHARACTERS:
+            # Unlike other values the end of a number can't be seen until the character after it.
+            while not self._end_of_file and self._number_end() == len(self._buffer):
+                self._read_chunk()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._end_of_file:
+                    raise
+                if len(self._buffer) - self._position > self._max_value_size:
+                    self._raise_error("Value larger than {size} characters".format(size=self._max_value_size))
+                self._read_chunk()
+                continue
+
+            self._position = end
+            return value
+
+    def _number_end(self) -> int:
+        end = self._position
+        while end < len(self._buffer) and self._buffer[end] in NUMBER_CHARACTERS:
+            end += 1
+        return end
+
+    def _expect(self, expected: str):
+        if self._peek() != expected:
+            self._raise_error("Expected '{expected}'".format(expected=expected))
+        self._position += 1
+
+    def _peek(self) -> str:
+        # Skips whitespace and returns the next character.
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._end_of_file:
+                self._raise_error("Unexpected end of file")
+            self._read_chunk()
+
+    def _read_chunk(self):
+        # Drop everything already parsed before reading more.
+        self._byte_offset = self._current_offset()
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+        self._offset_position = 0
+
+        chunk = self._file.read(self._chunk_size)
+        self._end_of_file = not chunk
+        self._buffer += self._text_decoder.decode(chunk, final=self._end_of_file)
+
+    def _current_offset(self) -> int:
+        # Only encodes what has been parsed since the last call, so working out offsets stays linear.
+        self._byte_offset += len(self._buffer[self._offset_position:self._position].encode("utf-8"))
+        self._offset_position = self._position
+        return self._byte_offset
+
+    def _raise_error(self, message: str):
+        offset = self._current_offset()
+        logger.error("%s at byte %s.", message, offset)
+        raise ValueError("{message} at byte {offset}.".format(message=message, offset=offset))
@@ -0,0 +1,355 @@
+import bisect
+import logging
+import math
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.connection_tester import ProbeResult
+from src.status_tracker import Status, StatusChange
+from src.throughput_tester import ThroughputResult
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Clear of node_exporter's 9100, which is often already listening on the same host.
+DEFAULT_PORT = 9832
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Finer buckets for the phases of a test run, most of which take well under a millisecond.
+PHASE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for value in values)
+    return "{" + ",".join("{name}=\"{value}\"".format(name=name, value=value)
+                          for name, value in zip(names, escaped)) + "}"
+
+
+class CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class GaugeChild:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+        self._value = 0.0
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function is not None else self._value
+
+    def set(self, value: float):
+        self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        # The value is read from the function whenever the metrics are rendered, costing nothing until then.
+        self._function = function
+
+
+class HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        # Counts per bucket, not cumulative, with the last for values above every bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """
+        A named metric with a child for each combination of label values. Children are created on first use and
+        can be kept by the caller, so updating them on the hot path is just a lock and an addition.
+    """
+    metric_type = ""
+
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 label_names: Sequence[str],
+                 child_factory: Callable[[], object]):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._child_factory = child_factory
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *label_values: str):
+        if len(label_values) != len(self.label_names):
+            raise ValueError("Metric {name} expects labels {labels}, received {values}."
+                             .format(name=self.name, labels=self.label_names, values=label_values))
+
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_values, self._child_factory())
+        return child
+
+    def render(self) -> List[str]:
+        lines = ["# HELP {name} {description}".format(name=self.name, description=self.description),
+                 "# TYPE {name} {type}".format(name=self.name, type=self.metric_type)]
+        with self._lock:
+            children = list(self._children.items())
+        for label_values, child in children:
+            lines.extend(self._render_child(label_values, child))
+        return lines
+
+    def _render_child(self, label_values: Tuple[str, ...], child) -> List[str]:
+        return ["{name}{labels} {value}".format(name=self.name,
+                                                labels=format_labels(self.label_names, label_values),
+                                                value=format_value(child.value))]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names, CounterChild)
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names, GaugeChild)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, label_names, lambda: HistogramChild(self.buckets))
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, label_values: Tuple[str, ...], child) -> List[str]:
+        bucket_names = self.label_names + ("le",)
+        lines = []
+        cumulative_count = 0
+        for bound, count in zip(self.buckets + (math.inf,), list(child.counts)):
+            cumulative_count += count
+            lines.append("{name}_bucket{labels} {value}".format(
+                name=self.name,
+                labels=format_labels(bucket_names, label_values + (format_value(bound),)),
+                value=cumulative_count))
+
+        labels = format_labels(self.label_names, label_values)
+        lines.append("{name}_sum{labels} {value}".format(name=self.name, labels=labels, value=format_value(child.sum)))
+        lines.append("{name}_count{labels} {value}".format(name=self.name, labels=labels, value=cumulative_count))
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def counter(self, name: str, description: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, label_names))
+
+    def gauge(self, name: str, description: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, label_names))
+
+    def histogram(self, name: str, description: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, label_names, buckets))
+
+    def get(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError("Metric '{name}' is already registered.".format(name=metric.name))
+            self._metrics[metric.name] = metric
+        return metric
+
+
+class TargetMetrics:
+    # The metric children for one target, looked up once so recording a test doesn't have to.
+    def __init__(self, monitor_metrics: "MonitorMetrics", target: str):
+        self.dns_time = monitor_metrics.probe_duration.labels(target, "dns")
+        self.connect_time = monitor_metrics.probe_duration.labels(target, "connect")
+        self.total_time = monitor_metrics.probe_duration.labels(target, "total")
+        self.first_byte_time = monitor_metrics.probe_duration.labels(target, "first_byte")
+        self.successes = monitor_metrics.probes.labels(target, "success")
+        self.failures = monitor_metrics.probes.labels(target, "failure")
+        self.statuses = {status: monitor_metrics.status.labels(target, status.name) for status in Status}
+        self.status_changes = {status_change: monitor_metrics.status_changes.labels(target, status_change.name)
+                               for status_change in StatusChange if status_change != StatusChange.NONE}
+
+        self.current_status = Status.UNKNOWN
+        self.statuses[Status.UNKNOWN].set(1)
+
+
+class MonitorMetrics:
+    """
+        The metrics recorded by Monitor and MultiTargetMonitor. Recording a test is a dictionary lookup for the
+        target followed by a few additions.
+    """
+    def __init__(self, registry: MetricsRegistry, prefix: str = "internet_monitor"):
+        self.registry = registry
+        self.probe_duration = registry.histogram(prefix + "_probe_duration_seconds",
+                                                 "Time taken by each phase of a probe.", ("target", "phase"))
+        self.probes = registry.counter(prefix + "_probes_total", "Probes run, by result.", ("target", "result"))
+        self.http_responses = registry.counter(prefix + "_http_responses_total",
+                                               "HTTP probe responses, by status code.", ("target", "code"))
+        self.throughput = registry.gauge(prefix + "_throughput_bytes_per_second",
+                                         "Bandwidth achieved by the last throughput test.", ("target",))
+        self.throughput_tests = registry.counter(prefix + "_throughput_tests_total", "Throughput tests run, by result.",
+                                                 ("target", "result"))
+        self.status = registry.gauge(prefix + "_status", "Current status, 1 for the current one and 0 otherwise.",
+                                     ("target", "status"))
+        self.status_changes = registry.counter(prefix + "_status_changes_total", "Status changes, by type.",
+                                               ("target", "change"))
+        self.write_duration = registry.histogram(prefix + "_write_duration_seconds",
+                                                 "Time taken by each write, flush and sync of entry writers.",
+                                                 ("writer", "operation"))
+        self.queue_depth = registry.gauge(prefix + "_queue_depth", "Entries waiting to be written.", ("queue",))
+        self.run_phase_duration = registry.histogram(prefix + "_run_phase_duration_seconds",
+                                                     "Time taken by each phase of a test run.", ("phase",),
+                                                     PHASE_BUCKETS)
+        self._targets: Dict[Optional[str], TargetMetrics] = {}
+        self._phases: Dict[str, HistogramChild] = {}
+
+    def record_test(self, target: Optional[str], probe_result: ProbeResult, status: Status,
+                    status_change: StatusChange):
+        target_metrics = self._targets.get(target)
+        if target_metrics is None:
+            target_metrics = self._targets.setdefault(target, TargetMetrics(self, target or ""))
+
+        latency = probe_result.latency
+        if latency.dns_time is not None:
+            target_metrics.dns_time.observe(latency.dns_time)
+        if latency.connect_time is not None:
+            target_metrics.connect_time.observe(latency.connect_time)
+        if latency.total_time is not None:
+            target_metrics.total_time.observe(latency.total_time)
+        if probe_result.first_byte_time is not None:
+            target_metrics.first_byte_time.observe(probe_result.first_byte_time)
+        if probe_result.status_code is not None:
+            self.http_responses.labels(target or "", str(probe_result.status_code)).inc()
+
+        if probe_result.passed:
+            target_metrics.successes.inc()
+        else:
+            target_metrics.failures.inc()
+
+        if status != target_metrics.current_status:
+            target_metrics.statuses[target_metrics.current_status].set(0)
+            target_metrics.statuses[status].set(1)
+            target_metrics.current_status = status
+        if status_change != StatusChange.NONE:
+            target_metrics.status_changes[status_change].inc()
+
+    def record_throughput(self, target: str, throughput_result: ThroughputResult):
+        self.throughput_tests.labels(target, "success" if throughput_result.passed else "failure").inc()
+        bandwidth = throughput_result.bandwidth
+        if bandwidth is not None:
+            self.throughput.labels(target).set(bandwidth)
+
+    def record_phase(self, phase: str, duration: float):
+        child = self._phases.get(phase)
+        if child is None:
+            child = self._phases.setdefault(phase, self.run_phase_duration.labels(phase))
+        child.observe(duration)
+
+    def record_write(self, writer: str, operation: str, duration: float):
+        self.write_duration.labels(writer, operation).observe(duration)
+
+    def watch_queue(self, queue: str, get_depth: Callable[[], float]):
+        self.queue_depth.labels(queue).set_function(get_depth)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """
+        Serves the registry in the Prometheus text format at /metrics from a background thread.
+    """
+    def __init__(self, registry: MetricsRegistry, host: str = "", port: int = DEFAULT_PORT):
+        registry_to_serve = registry
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = registry_to_serve.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, message_format, *args):
+                logger.debug("%s - %s", self.address_string(), message_format % args)
+
+        self._server = _ThreadingHTTPServer((host, port), MetricsHandler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        logger.info("Serving metrics on port %s.", self.port)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
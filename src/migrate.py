@@ -0,0 +1,194 @@
+"""
+    Converts the single JSON array written by JsonEntryWriter into one of the newer storage formats, reading it a
+    value at a time so memory use doesn't grow with the size of the history. Progress is saved to a state file after
+    every batch, so an interrupted migration carries on from where it stopped when run again.
+
+    python -m src.migrate data/test_data.json jsonl data/test_data.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from src.connection_entry import ConnectionEntry
+from src.json_stream import JsonArrayParser
+from src.notifiers.binary_entry_writer import BinaryEntryWriter, BinaryEntryReader
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryReader
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter, JsonLinesEntryReader
+from src.notifiers.segmented_entry_writer import SegmentedEntryWriter, SegmentedEntryReader
+from src.notifiers.sqlite_entry_writer import SqliteEntryWriter, SqliteEntryReader
+
+logger = logging.getLogger(__name__)
+
+
+class OutputFormat(NamedTuple):
+    writer: Callable[[str], EntryWriter]
+    reader: Callable[[str], EntryReader]
+
+
+FORMATS: Dict[str, OutputFormat] = {
+    "jsonl": OutputFormat(JsonLinesEntryWriter, JsonLinesEntryReader),
+    # Only stores the time, result, status and status change of each entry.
+    "binary": OutputFormat(BinaryEntryWriter, BinaryEntryReader),
+    "segmented": OutputFormat(SegmentedEntryWriter, SegmentedEntryReader),
+    "sqlite": OutputFormat(SqliteEntryWriter, SqliteEntryReader)
+}
+
+
+class MigrationState:
+    """
+        How far through the input the migration has got. offset is the byte offset just after the last migrated
+        value, and output_entries is how many entries the output should hold at that point.
+    """
+    def __init__(self, input_file: str, offset: Optional[int] = None, entries: int = 0, output_entries: int = 0):
+        self.input_file = input_file
+        self.offset = offset
+        self.entries = entries
+        self.output_entries = output_entries
+
+    @classmethod
+    def load(cls, state_file: str) -> Optional["MigrationState"]:
+        if not os.path.isfile(state_file):
+            return None
+
+        with open(state_file, "r") as state_data:
+            json_state = json.load(state_data)
+        return MigrationState(json_state["input_file"], json_state["offset"], json_state["entries"],
+                              json_state["output_entries"])
+
+    def save(self, state_file: str):
+        # Write then rename so an interruption never leaves a partly written state file.
+        with open(state_file + ".tmp", "w") as state_data:
+            json.dump({
+                "input_file": self.input_file,
+                "offset": self.offset,
+                "entries": self.entries,
+                "output_entries": self.output_entries
+            }, state_data)
+        os.replace(state_file + ".tmp", state_file)
+
+
+def count_entries(reader: EntryReader) -> int:
+    count = sum(1 for _ in reader.read_entries())
+    if isinstance(reader, (BinaryEntryReader, SqliteEntryReader)):
+        reader.close()
+    return count
+
+
+def migrate(input_file: str,
+            writer: EntryWriter,
+            state_file: str,
+            output_entries: int = 0,
+            batch_size: int = 1000,
+            progress_interval: int = 100000,
+            skip_invalid: bool = False) -> MigrationState:
+    """
+        Copies the entries of input_file into the writer, starting from the state file if there is one.
+        output_entries is the number of entries already in the output. If the output holds more than the state
+        expects, the migration was interrupted between writing a batch and saving the state, so that many entries
+        are skipped rather than written twice.
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1, received {size}.".format(size=batch_size))
+
+    state = MigrationState.load(state_file)
+    if state is None:
+        state = MigrationState(os.path.realpath(input_file), output_entries=output_entries)
+    elif state.input_file != os.path.realpath(input_file):
+        logger.error("State file %s is for %s, not %s.", state_file, state.input_file, input_file)
+        raise ValueError("State file '{state}' is for a different input file '{input}'."
+                         .format(state=state_file, input=state.input_file))
+    else:
+        logger.info("Resuming migration of %s after %s entries.", input_file, state.entries)
+
+    already_written = output_entries - state.output_entries
+    if already_written < 0:
+        logger.error("Output holds %s entries but %s were expected.", output_entries, state.output_entries)
+        raise ValueError("Output has fewer entries than the migration has written, it may have been modified.")
+
+    input_size = os.path.getsize(input_file)
+    with open(input_file, "rb") as input_data:
+        parser = JsonArrayParser(input_data, resume_offset=state.offset)
+        batch: List[ConnectionEntry] = []
+        for json_entry in parser:
+            try:
+                entry = ConnectionEntry.from_json(json_entry)
+            except ValueError:
+                if not skip_invalid:
+                    logger.error("Invalid entry ending at byte %s of %s.", parser.offset, input_file)
+                    raise
+                logger.warning("Skipping invalid entry ending at byte %s of %s.", parser.offset, input_file)
+                continue
+
+            state.entries += 1
+            if already_written:
+                already_written -= 1
+                state.output_entries += 1
+            else:
+                batch.append(entry)
+
+            if state.entries % progress_interval == 0:
+                logger.info("Migrated %s entries, %.1f%% of %s.", state.entries, 100 * parser.offset / input_size,
+                            input_file)
+            if len(batch) >= batch_size:
+                _write_batch(writer, batch, state, parser.offset, state_file)
+                batch = []
+
+        _write_batch(writer, batch, state, parser.offset, state_file)
+
+    logger.info("Finished migrating %s entries from %s.", state.entries, input_file)
+    return state
+
+
+def _write_batch(writer: EntryWriter, batch: List[ConnectionEntry], state: MigrationState, offset: int,
+                 state_file: str):
+    # The entries must be on disk before the state says they have been migrated.
+    if batch:
+        writer.write_new_entries(batch)
+        writer.flush()
+        writer.sync()
+
+    state.offset = offset
+    state.output_entries += len(batch)
+    state.save(state_file)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Migrate a JSON array history file into a newer storage format.")
+    parser.add_argument("input_file", help="JSON array file written by JsonEntryWriter.")
+    parser.add_argument("format", choices=sorted(FORMATS), help="Format to migrate to.")
+    parser.add_argument("output", help="Output file, or directory for the segmented format.")
+    parser.add_argument("--state-file", help="Where to save progress, defaults to the output with '.migration'.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Entries to write between saving progress.")
+    parser.add_argument("--progress-interval", type=int, default=100000, help="Entries between progress reports.")
+    parser.add_argument("--skip-invalid", action="store_true", help="Skip invalid entries instead of stopping.")
+    arguments = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    output_format = FORMATS[arguments.format]
+    state_file = arguments.state_file or arguments.output.rstrip(os.sep) + ".migration"
+    writer = output_format.writer(arguments.output)
+    output_entries = count_entries(output_format.reader(arguments.output))
+
+    try:
+        migrate(arguments.input_file, writer, state_file, output_entries, arguments.batch_size,
+                arguments.progress_interval, arguments.skip_invalid)
+        if isinstance(writer, SegmentedEntryWriter):
+            writer.seal()
+    except ValueError:
+        # Everything up to the last saved batch is in the output, which a later run carries on from.
+        state = MigrationState.load(state_file)
+        logger.exception("Migration failed, %s holds the first %s entries. Run again to resume once the problem is "
+                         "fixed.", arguments.output, state.output_entries if state is not None else output_entries)
+        return 1
+    finally:
+        writer.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
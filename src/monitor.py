@@ -1,11 +1,21 @@
 import logging
+import random
+import time
 from copy import deepcopy
 from datetime import datetime, timedelta
+from enum import Enum
+from typing import Optional
 from apscheduler.schedulers.blocking import BaseScheduler
 
+from src.clock import Clock
 from src.connection_tester import ConnectionTester
+from src.metrics import MonitorMetrics
+from src.profiler import RunProfiler
 from src.status_tracker import StatusTracker, Status
 from src.notifiers.entry_writer_notifier import EntryWriterNotifier
+from src.notifiers.throughput_entry_writer import ThroughputEntryWriter
+from src.throughput_entry import ThroughputEntry
+from src.throughput_tester import ThroughputTester
 
 
 logger = logging.getLogger(__name__)
@@ -15,6 +25,57 @@ REQUIRED_CONFIG = (
     "retry_interval",
     "error_interval"
 )
+# Config which can be left out, DEFAULT_CONFIG holds the values used instead.
+OPTIONAL_CONFIG = (
+    "scheduling_mode",
+    "jitter",
+    "late_threshold",
+    "profile_runs",
+    "throughput_interval"
+)
+DEFAULT_CONFIG = {
+    "scheduling_mode": "date",
+    "jitter": 0,
+    "late_threshold": 1,
+    "profile_runs": 0,
+    "throughput_interval": 3600
+}
+
+JOB_ID = "monitor"
+THROUGHPUT_JOB_ID = "monitor_throughput"
+
+
+class SchedulingMode(Enum):
+    """
+        This enum is used to indicate how the Monitor schedules its next test.
+    """
+    DATE = "date"               # Add a new date job after every test, timed from when the test started
+    PERSISTENT = "persistent"   # Move one long-lived job, timed from when each test was due so runs don't drift
+
+
+def get_job_delay(monitor_config: dict, status: Status) -> int:
+    if status == Status.OK:
+        job_delay = monitor_config["test_interval"]
+    elif status == Status.WARNING:
+        job_delay = monitor_config["retry_interval"]
+    elif status == Status.ERROR:
+        job_delay = monitor_config["error_interval"]
+    else:
+        logger.error("Invalid branch reached, status %s not recognised.", status)
+        job_delay = monitor_config["error_interval"]
+
+    return job_delay
+
+
+def get_config_value(monitor_config: dict, key: str):
+    return monitor_config.get(key, DEFAULT_CONFIG[key])
+
+
+def get_jitter(monitor_config: dict, random_generator: random.Random) -> float:
+    # A random delay of up to the jitter, so targets which start together don't stay in step.
+    jitter = get_config_value(monitor_config, "jitter")
+
+    return random_generator.uniform(0, jitter) if jitter else 0.0
 
 
 class Monitor:
@@ -23,13 +84,54 @@ class Monitor:
                  tester: ConnectionTester,
                  status_tracker: StatusTracker,
                  notifier: EntryWriterNotifier,
-                 monitor_config: dict):
+                 monitor_config: dict,
+                 metrics: Optional[MonitorMetrics] = None,
+                 profiler: Optional[RunProfiler] = None,
+                 clock: Optional[Clock] = None,
+                 throughput_tester: Optional[ThroughputTester] = None,
+                 throughput_writer: Optional[ThroughputEntryWriter] = None,
+                 random_generator: Optional[random.Random] = None):
         self._scheduler = scheduler
+        self._clock = clock or Clock()
+        # Its own generator, so seeding it for a repeatable run doesn't affect anything else using random.
+        self._random = random_generator or random.Random()
         self._tester = tester
         self._status_tracker = status_tracker
         self._notifier = notifier
+        self._metrics = metrics
         self._validate_config(monitor_config)
         self._config = deepcopy(monitor_config)
+        self._scheduling_mode = SchedulingMode(get_config_value(monitor_config, "scheduling_mode"))
+
+        # Monotonic times the next run is planned for, without and with jitter, when scheduling persistently.
+        self._planned_time: Optional[float] = None
+        self._due_time: Optional[float] = None
+        self._job_added = False
+        self._late_runs = 0
+        self._missed_runs = 0
+
+        self._profiler = profiler
+        profile_runs = get_config_value(monitor_config, "profile_runs")
+        if profile_runs:
+            if self._profiler is None:
+                self._profiler = RunProfiler()
+            self._profiler.request(profile_runs)
+
+        # Throughput tests are much heavier than connection tests, so they run on their own, longer interval.
+        self._throughput_tester = throughput_tester
+        self._throughput_writer = throughput_writer
+        if throughput_tester is not None:
+            self._scheduler.add_job(self.run_throughput_test, "interval",
+                                    seconds=get_config_value(monitor_config, "throughput_interval"),
+                                    id=THROUGHPUT_JOB_ID, coalesce=True, max_instances=1)
+
+    @property
+    def late_runs(self) -> int:
+        return self._late_runs
+
+    @property
+    def missed_runs(self) -> int:
+        return self._missed_runs
 
     @classmethod
     def _validate_config(cls, to_validate):
@@ -38,40 +140,138 @@ class Monitor:
                          REQUIRED_CONFIG, to_validate)
             raise ValueError("Dictionary '{dict}' did not contain one of; {required}."
                              .format(dict=to_validate, required=REQUIRED_CONFIG))
-        if any(key not in REQUIRED_CONFIG for key in to_validate):
+        if any(key not in REQUIRED_CONFIG and key not in OPTIONAL_CONFIG for key in to_validate):
             logger.error("Configuration failed validation, contains key which is not one of %s: %s.",
-                         REQUIRED_CONFIG, to_validate)
+                         REQUIRED_CONFIG + OPTIONAL_CONFIG, to_validate)
             raise ValueError("Dictionary '{dict}' contains key which is not; {required}."
-                             .format(dict=to_validate, required=REQUIRED_CONFIG))
+                             .format(dict=to_validate, required=REQUIRED_CONFIG + OPTIONAL_CONFIG))
+        if get_config_value(to_validate, "scheduling_mode") not in [mode.value for mode in SchedulingMode]:
+            logger.error("Configuration failed validation, unknown scheduling mode: %s.", to_validate)
+            raise ValueError("Scheduling mode '{mode}' is not one of; {modes}."
+                             .format(mode=to_validate["scheduling_mode"],
+                                     modes=[mode.value for mode in SchedulingMode]))
+        if get_config_value(to_validate, "jitter") < 0:
+            logger.error("Configuration failed validation, negative jitter: %s.", to_validate)
+            raise ValueError("Jitter must not be negative, received {jitter}.".format(jitter=to_validate["jitter"]))
+        if get_config_value(to_validate, "profile_runs") < 0:
+            logger.error("Configuration failed validation, negative profile runs: %s.", to_validate)
+            raise ValueError("Profile runs must not be negative, received {runs}."
+                             .format(runs=to_validate["profile_runs"]))
+        if get_config_value(to_validate, "throughput_interval") <= 0:
+            logger.error("Configuration failed validation, throughput interval is not positive: %s.", to_validate)
+            raise ValueError("Throughput interval must be positive, received {interval}."
+                             .format(interval=to_validate["throughput_interval"]))
 
     def _schedule_next_job(self, next_run_time: datetime):
         logger.info("Scheduling next job for %s.", next_run_time)
         self._scheduler.add_job(self.run_test, "date", run_date=next_run_time)
 
     def _get_next_job_time(self, previous_run_time: datetime, status: Status) -> datetime:
-        if status == Status.OK:
-            job_delay = self._config["test_interval"]
-        elif status == Status.WARNING:
-            job_delay = self._config["retry_interval"]
-        elif status == Status.ERROR:
-            job_delay = self._config["error_interval"]
+        delay = get_job_delay(self._config, status) + get_jitter(self._config, self._random)
+        next_time = previous_run_time + timedelta(seconds=delay)
+
+        return next_time
+
+    def _schedule_persistent_job(self, start_time: float, status: Status):
+        """
+            Plans the next run from when this one was planned rather than when it started, so the time taken by
+            each test doesn't add up. If this run finished after the next should have started, the runs which
+            couldn't happen are skipped and reported as missed.
+        """
+        delay = get_job_delay(self._config, status)
+        now = self._clock.monotonic()
+        next_planned_time = (self._planned_time if self._planned_time is not None else start_time) + delay
+
+        if next_planned_time <= now and delay > 0:
+            missed_runs = int((now - next_planned_time) // delay) + 1
+            self._missed_runs += missed_runs
+            logger.warning("Missed %s runs, the last test took %.3f seconds.", missed_runs, now - start_time)
+            next_planned_time += missed_runs * delay
+
+        self._planned_time = next_planned_time
+        self._due_time = next_planned_time + get_jitter(self._config, self._random)
+        next_run_time = self._clock.now() + timedelta(seconds=max(self._due_time - now, 0))
+
+        logger.info("Scheduling next job for %s.", next_run_time)
+        if self._job_added:
+            self._scheduler.modify_job(JOB_ID, next_run_time=next_run_time)
         else:
-            logger.error("Invalid branch reached, status s not recognised.", status)
-            job_delay = self._config["error_interval"]
+            # If a run ever fails before rescheduling, the interval still brings the job round again.
+            self._scheduler.add_job(self.run_test, "interval", seconds=max(delay, 1), id=JOB_ID,
+                                    next_run_time=next_run_time, coalesce=True, max_instances=1)
+            self._job_added = True
 
-        next_time = previous_run_time + timedelta(seconds=job_delay)
+    def _check_late(self, start_time: float):
+        if self._due_time is None:
+            return
 
-        return next_time
+        lateness = start_time - self._due_time
+        if lateness > get_config_value(self._config, "late_threshold"):
+            self._late_runs += 1
+            logger.warning("Test run started %.3f seconds late.", lateness)
 
     def run_test(self):
+        if self._profiler is None:
+            self._run_test()
+        else:
+            self._profiler.run(self._run_test)
+
+    def _run_test(self):
         logger.info("Beginning test run.")
-        run_time = datetime.now()
+        run_time = self._clock.now()
+        start_time = self._clock.monotonic()
+        if self._scheduling_mode == SchedulingMode.PERSISTENT:
+            self._check_late(start_time)
 
-        result = self._tester.run_test()
+        probe_start = time.perf_counter()
+        probe_result = self._tester.run_detailed_test()
+        result = probe_result.passed
 
+        status_start = time.perf_counter()
         status_change = self._status_tracker.submit_result(result)
         status = self._status_tracker.status
+        if self._metrics is not None:
+            self._metrics.record_test(self._tester.remote_to_check, probe_result, status, status_change)
+
+        notify_start = time.perf_counter()
+        self._notifier.notify(run_time, result, status, status_change, latency=probe_result.latency,
+                              status_code=probe_result.status_code, first_byte_time=probe_result.first_byte_time)
+
+        schedule_start = time.perf_counter()
+        if self._scheduling_mode == SchedulingMode.PERSISTENT:
+            self._schedule_persistent_job(start_time, status)
+        else:
+            self._schedule_next_job(self._get_next_job_time(run_time, status))
+
+        if self._metrics is not None:
+            end = time.perf_counter()
+            latency = probe_result.latency
+            if latency.dns_time is not None:
+                self._metrics.record_phase("resolve", latency.dns_time)
+            if latency.connect_time is not None:
+                self._metrics.record_phase("connect", latency.connect_time)
+            self._metrics.record_phase("probe", status_start - probe_start)
+            self._metrics.record_phase("status_tracking", notify_start - status_start)
+            # With a synchronous notifier this includes the write, a queued one only adds the entry to its queue
+            # and the write is timed by TimedEntryWriter.
+            self._metrics.record_phase("notify", schedule_start - notify_start)
+            self._metrics.record_phase("reschedule", end - schedule_start)
+            self._metrics.record_phase("run", end - probe_start)
+
+    def run_throughput_test(self):
+        if self._throughput_tester is None:
+            return
 
-        self._notifier.notify(run_time, result, status, status_change)
+        logger.info("Beginning throughput test.")
+        run_time = self._clock.now()
+        throughput_result = self._throughput_tester.run_throughput_test()
+        target = self._throughput_tester.remote_to_check
+        logger.info("Throughput test received %s bytes in %s seconds.",
+                    throughput_result.bytes_received, throughput_result.duration)
 
-        self._schedule_next_job(self._get_next_job_time(run_time, status))
+        if self._metrics is not None:
+            self._metrics.record_throughput(target, throughput_result)
+        if self._throughput_writer is not None:
+            self._throughput_writer.write_new_entry(ThroughputEntry(run_time, target, throughput_result.passed,
+                                                                    throughput_result.bytes_received,
+                                                                    throughput_result.duration))
@@ -0,0 +1,170 @@
+import heapq
+import logging
+import random
+import threading
+from copy import deepcopy
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from apscheduler.schedulers.blocking import BaseScheduler
+
+from src.async_connection_tester import AsyncConnectionTester, run_detailed_tests
+from src.clock import Clock
+from src.connection_tester import ConnectionTester, ProbeResult
+from src.metrics import MonitorMetrics
+from src.monitor import Monitor, get_job_delay, get_jitter
+from src.status_tracker import Status, StatusTracker
+from src.notifiers.entry_writer_notifier import EntryWriterNotifier
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = "multi_target_monitor"
+
+
+class Target:
+    def __init__(self, name: str, tester: ConnectionTester, status_tracker: StatusTracker, monitor_config: dict):
+        self.name = name
+        self.tester = tester
+        self.status_tracker = status_tracker
+        self.config = monitor_config
+        # Identifies this target's current place in the schedule.
+        self.schedule_sequence = 0
+        # When the next run was planned for, before any jitter.
+        self.planned_time: Optional[datetime] = None
+
+
+class MultiTargetMonitor:
+    """
+        Monitors any number of targets, each with their own tester, StatusTracker and intervals. Due times are
+        kept in a single heap which is checked by one long-lived interval job, rather than adding a job per test.
+    """
+    def __init__(self,
+                 scheduler: BaseScheduler,
+                 notifier: EntryWriterNotifier,
+                 tick_interval: float = 1,
+                 max_concurrency: int = 100,
+                 metrics: Optional[MonitorMetrics] = None,
+                 clock: Optional[Clock] = None,
+                 random_generator: Optional[random.Random] = None):
+        self._scheduler = scheduler
+        self._clock = clock or Clock()
+        self._random = random_generator or random.Random()
+        self._notifier = notifier
+        self._metrics = metrics
+        self._tick_interval = tick_interval
+        self._max_concurrency = max_concurrency
+
+        self._lock = threading.Lock()
+        self._targets: Dict[str, Target] = {}
+        # Entries are (due time, sequence number, target name), the sequence number keeps the ordering stable.
+        self._schedule: List[Tuple[datetime, int, str]] = []
+        self._sequence = 0
+
+    @property
+    def targets(self) -> List[str]:
+        return list(self._targets)
+
+    def get_target(self, name: str) -> Target:
+        return self._targets[name]
+
+    def add_target(self,
+                   name: str,
+                   tester: ConnectionTester,
+                   monitor_config: dict,
+                   status_tracker: Optional[StatusTracker] = None,
+                   first_run_time: Optional[datetime] = None):
+        Monitor._validate_config(monitor_config)
+
+        with self._lock:
+            if name in self._targets:
+                raise ValueError("Target '{name}' is already being monitored.".format(name=name))
+
+            logger.info("Adding target %s.", name)
+            target = Target(name, tester, status_tracker or StatusTracker(), deepcopy(monitor_config))
+            self._targets[name] = target
+            self._push(target, first_run_time or self._clock.now())
+
+    def remove_target(self, name: str):
+        with self._lock:
+            logger.info("Removing target %s.", name)
+            # Its place in the schedule is skipped over when it comes due.
+            del self._targets[name]
+
+    def start(self):
+        self._scheduler.add_job(self.run_due_tests, "interval", seconds=self._tick_interval, id=JOB_ID,
+                                coalesce=True, max_instances=1)
+
+    def run_due_tests(self):
+        run_time = self._clock.now()
+        due_targets = self._pop_due_targets(run_time)
+        if not due_targets:
+            return
+
+        logger.info("Beginning test run of %s targets.", len(due_targets))
+        results = self._run_tests(due_targets)
+
+        for target, probe_result in zip(due_targets, results):
+            status_change = target.status_tracker.submit_result(probe_result.passed)
+            status = target.status_tracker.status
+            if self._metrics is not None:
+                self._metrics.record_test(target.name, probe_result, status, status_change)
+
+            self._notifier.notify(run_time, probe_result.passed, status, status_change,
+                                  target.name, probe_result.latency, probe_result.status_code,
+                                  probe_result.first_byte_time)
+
+            with self._lock:
+                # The target may have been removed while it was being tested.
+                if self._targets.get(target.name) is target:
+                    self._push(target, self._get_next_planned_time(target, status, run_time),
+                               get_jitter(target.config, self._random))
+
+    def _pop_due_targets(self, run_time: datetime) -> List[Target]:
+        due_targets = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= run_time:
+                _, sequence, name = heapq.heappop(self._schedule)
+                target = self._targets.get(name)
+                if target is not None and target.schedule_sequence == sequence:
+                    due_targets.append(target)
+
+        return due_targets
+
+    def _get_next_planned_time(self, target: Target, status: Status, run_time: datetime) -> datetime:
+        """
+            Plans the next run from when this one was planned rather than the tick which ran it, so runs don't drift
+            by up to a tick each time. Runs which should already have happened are skipped, as Monitor does.
+        """
+        delay = get_job_delay(target.config, status)
+        next_planned_time = (target.planned_time or run_time) + timedelta(seconds=delay)
+
+        if next_planned_time <= run_time and delay > 0:
+            missed_runs = int((run_time - next_planned_time).total_seconds() // delay) + 1
+            logger.warning("Target %s missed %s runs.", target.name, missed_runs)
+            next_planned_time += timedelta(seconds=missed_runs * delay)
+
+        return next_planned_time
+
+    def _push(self, target: Target, planned_time: datetime, jitter: float = 0):
+        self._sequence += 1
+        target.schedule_sequence = self._sequence
+        target.planned_time = planned_time
+        heapq.heappush(self._schedule, (planned_time + timedelta(seconds=jitter), self._sequence, target.name))
+
+    def _run_tests(self, targets: List[Target]) -> List[ProbeResult]:
+        # Testers which can run concurrently are all run together, anything else runs one after another.
+        results: List[Optional[ProbeResult]] = [None] * len(targets)
+        async_indexes = []
+        async_testers: List[AsyncConnectionTester] = []
+
+        for index, target in enumerate(targets):
+            if isinstance(target.tester, AsyncConnectionTester):
+                async_indexes.append(index)
+                async_testers.append(target.tester)
+            else:
+                results[index] = target.tester.run_detailed_test()
+
+        if async_testers:
+            for index, result in zip(async_indexes, run_detailed_tests(async_testers, self._max_concurrency)):
+                results[index] = result
+
+        return [result for result in results if result is not None]
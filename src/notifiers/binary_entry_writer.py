@@ -0,0 +1,171 @@
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import numpy
+
+from src.connection_entry import ConnectionEntry, datetime_to_epoch_us, epoch_us_to_datetime
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryReader, prepare_data_file, sync_data_file
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+FILE_MAGIC = b"IMSE"
+FILE_VERSION = 1
+
+# Magic, format version and record size.
+HEADER = struct.Struct("<4sHH")
+# Microseconds since the epoch, result, Status value and StatusChange value.
+RECORD = struct.Struct("<qBBb")
+
+RECORD_DTYPE = numpy.dtype([
+    ("time", "<i8"),
+    ("result", "u1"),
+    ("status", "u1"),
+    ("status_change", "i1")
+])
+
+
+def pack_entry(entry: ConnectionEntry) -> bytes:
+    # Records are fixed width, so they have no room for a target or the probe details.
+    if entry.target is not None or entry.latency is not None or entry.status_code is not None \
+            or entry.first_byte_time is not None:
+        logger.error("Failed to pack entry with fields the binary format can't hold: %s.", entry)
+        raise ValueError("Entry '{entry}' has a target, latency, status code or first byte time, which binary "
+                         "entry files can't hold.".format(entry=entry))
+
+    return RECORD.pack(datetime_to_epoch_us(entry.time),
+                       entry.result,
+                       entry.status.value,
+                       entry.status_change.value)
+
+
+def unpack_entry(buffer, offset: int = 0) -> ConnectionEntry:
+    epoch_us, result, status, status_change = RECORD.unpack_from(buffer, offset)
+
+    return ConnectionEntry(epoch_us_to_datetime(epoch_us),
+                           bool(result),
+                           Status(status),
+                           StatusChange(status_change))
+
+
+def _check_header(header: bytes, file_path: str):
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != FILE_MAGIC or version != FILE_VERSION or record_size != RECORD.size:
+        logger.error("File %s is not a version %s binary entry file.", file_path, FILE_VERSION)
+        raise ValueError("File '{file}' is not a version {version} binary entry file."
+                         .format(file=file_path, version=FILE_VERSION))
+
+
+class BinaryEntryWriter(EntryWriter):
+    """
+        Appends each entry as a fixed width record, which lets readers index straight into the file. Only the time,
+        result and status of untargeted entries fit in a record, any other entry raises a ValueError.
+    """
+    def __init__(self, output_file: str):
+        self._output_file = output_file
+        prepare_data_file(output_file)
+        self._prepare_header()
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        logger.debug("Adding new entry: %s.", entry)
+
+        with open(self._output_file, "ab") as test_data:
+            test_data.write(pack_entry(entry))
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Adding %s new entries.", len(entries))
+
+        with open(self._output_file, "ab") as test_data:
+            test_data.write(b"".join(pack_entry(entry) for entry in entries))
+
+    def sync(self):
+        sync_data_file(self._output_file)
+
+    def _prepare_header(self):
+        with open(self._output_file, "rb+") as test_data:
+            header = test_data.read(HEADER.size)
+            if not header:
+                logger.debug("Empty file, writing the header.")
+                test_data.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, RECORD.size))
+                return
+
+            _check_header(header, self._output_file)
+
+            # An interrupted write can leave part of a record at the end of the file.
+            file_size = test_data.seek(0, os.SEEK_END)
+            partial_record = (file_size - HEADER.size) % RECORD.size
+            if partial_record:
+                logger.warning("Discarding incomplete entry at the end of %s.", self._output_file)
+                test_data.truncate(file_size - partial_record)
+
+
+class BinaryEntryReader(EntryReader):
+    """
+        Memory maps a file written by BinaryEntryWriter. Only the entries present when the reader is opened are
+        visible, and the reader must be closed once any views returned by records() or as_array() are released.
+    """
+    def __init__(self, input_file: str):
+        self._input_file = input_file
+
+        with open(input_file, "rb") as test_data:
+            header = test_data.read(HEADER.size)
+            _check_header(header, input_file)
+            file_size = test_data.seek(0, os.SEEK_END)
+            self._length = (file_size - HEADER.size) // RECORD.size
+
+            # Zero length files can't be mapped.
+            self._map = mmap.mmap(test_data.fileno(), 0, access=mmap.ACCESS_READ) if self._length else None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> ConnectionEntry:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Entry index out of range.")
+
+        return unpack_entry(self._map, HEADER.size + index * RECORD.size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read_entries(self) -> Iterator[ConnectionEntry]:
+        return self._read_entries_from(None)
+
+    def _read_entries_from(self, start: Optional[datetime]) -> Iterator[ConnectionEntry]:
+        first_index = self.find_index(start) if start is not None else 0
+        for index in range(first_index, self._length):
+            yield self[index]
+
+    def find_index(self, time: datetime) -> int:
+        """
+            Binary searches the timestamps for the index of the first entry at or after time, or the number of
+            entries if there isn't one.
+        """
+        return int(numpy.searchsorted(self.as_array()["time"], datetime_to_epoch_us(time), side="left"))
+
+    def records(self) -> memoryview:
+        if self._map is None:
+            return memoryview(b"")
+
+        return memoryview(self._map)[HEADER.size:HEADER.size + self._length * RECORD.size]
+
+    def as_array(self) -> numpy.ndarray:
+        if self._map is None:
+            return numpy.empty(0, dtype=RECORD_DTYPE)
+
+        return numpy.frombuffer(self._map, dtype=RECORD_DTYPE, count=self._length, offset=HEADER.size)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._length = 0
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from enum import Enum
+from typing import List
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.entry_writer_notifier import EntryWriter
+
+logger = logging.getLogger(__name__)
+
+
+class FsyncPolicy(Enum):
+    """
+        This enum is used to choose how often a BufferedEntryWriter forces written entries on to disk.
+    """
+    NEVER = 0       # Leave it to the operating system
+    PER_BATCH = 1   # Once after each batch is written
+    PER_ENTRY = 2   # After every single entry, entries are still only written when a batch is flushed
+
+
+class BufferedEntryWriter(EntryWriter):
+    """
+        Holds entries back from the wrapped writer and passes them on in batches, once batch_size entries are
+        waiting, once the oldest waiting entry is max_age seconds old or when flush is called. A batch which fails
+        to write is kept and tried again with the next one.
+    """
+    keeps_failed_entries = True
+
+    def __init__(self,
+                 writer: EntryWriter,
+                 batch_size: int = 100,
+                 max_age: float = 60,
+                 fsync_policy: FsyncPolicy = FsyncPolicy.PER_BATCH):
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1, received {size}.".format(size=batch_size))
+
+        self._writer = writer
+        self._batch_size = batch_size
+        self._max_age = max_age
+        self._fsync_policy = fsync_policy
+
+        self._lock = threading.Lock()
+        self._buffer: List[ConnectionEntry] = []
+        self._oldest_entry_time = 0.0
+
+    @property
+    def buffered_entries(self) -> int:
+        return len(self._buffer)
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        with self._lock:
+            if not self._buffer:
+                self._oldest_entry_time = time.monotonic()
+            self._buffer.extend(entries)
+
+            if len(self._buffer) >= self._batch_size or self._is_buffer_expired():
+                self._flush_buffer()
+
+    def flush(self):
+        with self._lock:
+            self._flush_buffer()
+
+    def flush_if_due(self):
+        # Expected to be called periodically so that entries don't sit in the buffer when no new ones arrive.
+        with self._lock:
+            if self._is_buffer_expired():
+                self._flush_buffer()
+
+    def sync(self):
+        self.flush()
+        self._writer.sync()
+
+    def close(self):
+        # Anything still buffered is written before the wrapped writer is closed.
+        try:
+            self.flush()
+        finally:
+            self._writer.close()
+
+    def _is_buffer_expired(self) -> bool:
+        return bool(self._buffer) and time.monotonic() - self._oldest_entry_time >= self._max_age
+
+    def _flush_buffer(self):
+        if not self._buffer:
+            return
+
+        logger.debug("Flushing %s buffered entries.", len(self._buffer))
+        entries = self._buffer
+        self._buffer = []
+
+        written = 0
+        try:
+            if self._fsync_policy == FsyncPolicy.PER_ENTRY:
+                for entry in entries:
+                    self._writer.write_new_entry(entry)
+                    written += 1
+                    self._writer.sync()
+            else:
+                self._writer.write_new_entries(entries)
+                written = len(entries)
+                if self._fsync_policy == FsyncPolicy.PER_BATCH:
+                    self._writer.sync()
+        except Exception:
+            logger.exception("Failed to flush buffered entries, keeping %s for the next attempt.",
+                             len(entries) - written)
+            # Anything not yet handed over goes back in front of entries that arrived since.
+            self._buffer = entries[written:] + self._buffer
+            raise
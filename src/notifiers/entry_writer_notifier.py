@@ -3,31 +3,107 @@ import os
 import logging
 from enum import Enum
 from datetime import datetime
+from typing import Collection, Iterable, Iterator, List, Optional
 
 from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
 from src.status_tracker import Status, StatusChange
 
 logger = logging.getLogger(__name__)
 
 
 class EntryWriter:
+    # Whether entries which failed to write are kept and retried by the writer, rather than lost.
+    keeps_failed_entries = False
+
     def write_new_entry(self, entry: ConnectionEntry):
         pass
 
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        for entry in entries:
+            self.write_new_entry(entry)
+
+    def flush(self):
+        # Writers which hold entries back should write them out here.
+        pass
+
+    def sync(self):
+        # Writers should make sure everything written so far is on disk here.
+        pass
+
+    def close(self):
+        # Writers holding files, connections or sockets should release them here.
+        pass
+
+
+class EntryReader:
+    def read_entries(self) -> Iterator[ConnectionEntry]:
+        return iter(())
+
+    def query(self,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              statuses: Optional[Collection[Status]] = None,
+              status_changes: Optional[Collection[StatusChange]] = None,
+              targets: Optional[Collection[str]] = None) -> Iterator[ConnectionEntry]:
+        """
+            Lazily yields the entries from start (inclusive) to end (exclusive) which match all of the given
+            filters. Entries are stored in time order, so reading stops as soon as an entry at or after end is found.
+        """
+        return filter_entries(self._read_entries_from(start), start, end, statuses, status_changes, targets)
+
+    def _read_entries_from(self, start: Optional[datetime]) -> Iterator[ConnectionEntry]:
+        # Readers which can skip straight to the first entry at or after start should do so here.
+        return self.read_entries()
+
 
 class EntryWriterNotifier:
     def __init__(self, writer: EntryWriter):
         self._writer = writer
 
-    def notify(self, time: datetime, result: bool, status: Status, status_change: StatusChange):
-        new_entry = ConnectionEntry(time, result, status, status_change)
+    def notify(self,
+               time: datetime,
+               result: bool,
+               status: Status,
+               status_change: StatusChange,
+               target: Optional[str] = None,
+               latency: Optional[ProbeLatency] = None,
+               status_code: Optional[int] = None,
+               first_byte_time: Optional[float] = None):
+        new_entry = ConnectionEntry(time, result, status, status_change, target, latency, status_code,
+                                    first_byte_time)
 
         self._writer.write_new_entry(new_entry)
 
+    def flush(self):
+        self._writer.flush()
+
+
+def filter_entries(entries: Iterable[ConnectionEntry],
+                   start: Optional[datetime] = None,
+                   end: Optional[datetime] = None,
+                   statuses: Optional[Collection[Status]] = None,
+                   status_changes: Optional[Collection[StatusChange]] = None,
+                   targets: Optional[Collection[str]] = None) -> Iterator[ConnectionEntry]:
+    for entry in entries:
+        if start is not None and entry.time < start:
+            continue
+        if end is not None and entry.time >= end:
+            return
+        if statuses is not None and entry.status not in statuses:
+            continue
+        if status_changes is not None and entry.status_change not in status_changes:
+            continue
+        if targets is not None and entry.target not in targets:
+            continue
+
+        yield entry
+
 
 class FileType(Enum):
     NONE = 0
     JSON_LIST = 1
+    JSON_LINES = 2
 
 
 def prepare_data_file(file_path: str, file_type: FileType = FileType.NONE):
@@ -43,3 +119,8 @@ def prepare_data_file(file_path: str, file_type: FileType = FileType.NONE):
         logger.debug("No existing file found, create a new one.")
         if file_type == FileType.JSON_LIST:
             json.dump([], new_file)
+
+
+def sync_data_file(file_path: str):
+    with open(file_path, "ab") as data_file:
+        os.fsync(data_file.fileno())
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryWriterNotifier
+from src.notifiers.queued_notifier import OverflowPolicy, QueuedNotifier
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """
+        This enum is used to indicate whether a CircuitBreaker is letting writes through.
+    """
+    CLOSED = 0      # Writes go through as normal
+    OPEN = 1        # Too many writes have failed, writes fail straight away
+    HALF_OPEN = 2   # The reset timeout has passed, the next write decides whether to close or open again
+
+
+class CircuitOpenError(OSError):
+    pass
+
+
+class RetryPolicy:
+    """
+        Retries a failed write up to max_attempts times in total, waiting initial_delay seconds after the first
+        failure and multiplier times longer after each one after that, up to max_delay.
+    """
+    def __init__(self, max_attempts: int = 5, initial_delay: float = 0.5, max_delay: float = 30,
+                 multiplier: float = 2):
+        if max_attempts < 1:
+            raise ValueError("Max attempts must be at least 1, received {attempts}.".format(attempts=max_attempts))
+
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    def get_delay(self, attempt: int) -> float:
+        # The delay before retrying after the given attempt, counting from 1.
+        return min(self.initial_delay * self.multiplier ** (attempt - 1), self.max_delay)
+
+
+class CircuitBreaker:
+    """
+        Opens after failure_threshold writes fail in a row, and lets one write through again after reset_timeout
+        seconds. If that write works the circuit closes, otherwise it opens for another reset_timeout.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+                self._state = CircuitState.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        return self.state != CircuitState.OPEN
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                logger.info("Circuit closed.")
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == CircuitState.HALF_OPEN or self._failures >= self._failure_threshold:
+                if self._state != CircuitState.OPEN:
+                    logger.warning("Circuit opened after %s failures.", self._failures)
+                self._state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryingEntryWriter(EntryWriter):
+    """
+        Retries failed writes to another writer with exponential backoff. While the circuit breaker is open writes
+        fail straight away with a CircuitOpenError rather than waiting on a sink which is known to be down.
+    """
+    def __init__(self,
+                 writer: EntryWriter,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        self._writer = writer
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return self._circuit_breaker
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        attempt = 1
+        while True:
+            if not self._circuit_breaker.allow_request():
+                raise CircuitOpenError("Circuit is open, not writing {count} entries.".format(count=len(entries)))
+
+            try:
+                self._writer.write_new_entries(entries)
+            except Exception:
+                self._circuit_breaker.record_failure()
+                if attempt >= self._retry_policy.max_attempts:
+                    raise
+
+                delay = self._retry_policy.get_delay(attempt)
+                logger.warning("Write attempt %s failed, retrying in %s seconds.", attempt, delay, exc_info=True)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self._circuit_breaker.record_success()
+            return
+
+    def flush(self):
+        self._writer.flush()
+
+    def sync(self):
+        self._writer.sync()
+
+    def close(self):
+        self._writer.close()
+
+
+class Sink:
+    """
+        A writer for FanOutNotifier to send entries to, along with how its queue, retries and circuit breaker
+        behave. By default a full queue drops its oldest entries, so a sink which is down can't hold up the others.
+    """
+    def __init__(self,
+                 name: str,
+                 writer: EntryWriter,
+                 max_size: int = 1000,
+                 batch_size: int = 100,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.writer = writer
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+
+
+class FanOutNotifier(EntryWriterNotifier):
+    """
+        Sends every entry to each of the sinks. Each sink has its own QueuedNotifier, so its own worker thread and
+        batches, writing through a RetryingEntryWriter.
+    """
+    def __init__(self, sinks: List[Sink]):
+        if len(set(sink.name for sink in sinks)) != len(sinks):
+            raise ValueError("Sink names must be unique, received {names}.".format(names=[sink.name for sink in sinks]))
+
+        # Each sink's queue owns the writing, there is no single writer to pass up.
+        super().__init__(EntryWriter())
+        self._notifiers: Dict[str, QueuedNotifier] = {
+            sink.name: QueuedNotifier(RetryingEntryWriter(sink.writer, sink.retry_policy, sink.circuit_breaker),
+                                      sink.max_size, sink.overflow_policy, sink.batch_size)
+            for sink in sinks
+        }
+
+    @property
+    def sinks(self) -> Dict[str, QueuedNotifier]:
+        return dict(self._notifiers)
+
+    def notify(self,
+               time: datetime,
+               result: bool,
+               status: Status,
+               status_change: StatusChange,
+               target: Optional[str] = None,
+               latency: Optional[ProbeLatency] = None,
+               status_code: Optional[int] = None,
+               first_byte_time: Optional[float] = None):
+        for notifier in self._notifiers.values():
+            notifier.notify(time, result, status, status_change, target, latency, status_code, first_byte_time)
+
+    def flush(self):
+        for notifier in self._notifiers.values():
+            notifier.flush()
+
+    def close(self, timeout: Optional[float] = None):
+        # Each queue closes its sink's writer once it has finished writing.
+        for notifier in self._notifiers.values():
+            notifier.close(timeout)
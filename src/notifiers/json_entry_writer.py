@@ -1,7 +1,9 @@
 import logging
 import json
-from src.connection_entry import ConnectionEntry
-from src.notifiers.entry_writer_notifier import EntryWriter, FileType, prepare_data_file
+from typing import Iterator, List
+from src.connection_entry import ConnectionEntry, encode_entries
+from src.json_stream import JsonArrayParser
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryReader, FileType, prepare_data_file, sync_data_file
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,17 @@ class JsonEntryWriter(EntryWriter):
 
         self._save_test_data(current_info)
 
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Adding %s new entries.", len(entries))
+
+        current_info = self._get_test_data()
+        current_info.extend(encode_entries(entries))
+
+        self._save_test_data(current_info)
+
+    def sync(self):
+        sync_data_file(self._output_file)
+
     def _get_test_data(self):
         with open(self._output_file, "r") as test_data:
             data = json.load(test_data)
@@ -28,3 +41,16 @@ class JsonEntryWriter(EntryWriter):
     def _save_test_data(self, new_test_data: list):
         with open(self._output_file, "w") as test_data:
             json.dump(new_test_data, test_data)
+
+
+class JsonEntryReader(EntryReader):
+    """
+        Reads a file written by JsonEntryWriter one entry at a time, rather than loading the whole list.
+    """
+    def __init__(self, input_file: str):
+        self._input_file = input_file
+
+    def read_entries(self) -> Iterator[ConnectionEntry]:
+        with open(self._input_file, "rb") as test_data:
+            for json_entry in JsonArrayParser(test_data):
+                yield ConnectionEntry.from_json(json_entry)
@@ -0,0 +1,138 @@
+import logging
+import json
+import os
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryReader, FileType, prepare_data_file, sync_data_file
+from src.notifiers.sparse_index import SparseIndex, index_file_path
+
+logger = logging.getLogger(__name__)
+
+
+class JsonLinesEntryWriter(EntryWriter):
+    """
+        Appends each entry as a single JSON object on its own line, so the cost of a write does not depend on how
+        much history is already stored. Unless index_interval is None, every index_interval-th entry is also added
+        to a SparseIndex alongside the file.
+    """
+    def __init__(self, output_file: str, index_interval: Optional[int] = 1000):
+        if index_interval is not None and index_interval < 1:
+            raise ValueError("Index interval must be at least 1, received {interval}.".format(interval=index_interval))
+
+        self._output_file = output_file
+        self._index_interval = index_interval
+        prepare_data_file(output_file, FileType.JSON_LINES)
+        self._discard_incomplete_entry()
+
+        self._index: Optional[SparseIndex] = None
+        # Number of entries to write before the next one is indexed.
+        self._entries_until_index = 0
+        if index_interval is not None:
+            self._prepare_index(index_interval)
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        logger.debug("Adding new entry: %s.", entry)
+
+        self._append_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Adding %s new entries.", len(entries))
+
+        self._append_entries(entries)
+
+    def sync(self):
+        sync_data_file(self._output_file)
+
+    def _append_entries(self, entries: List[ConnectionEntry]):
+        lines = [(json.dumps(entry.to_json()) + "\n").encode("utf-8") for entry in entries]
+
+        with open(self._output_file, "ab") as test_data:
+            offset = test_data.tell()
+            test_data.write(b"".join(lines))
+
+        if self._index is None or self._index_interval is None:
+            return
+
+        for entry, line in zip(entries, lines):
+            if self._entries_until_index == 0:
+                self._index.add(entry.time, offset)
+                self._entries_until_index = self._index_interval
+            self._entries_until_index -= 1
+            offset += len(line)
+
+    def _prepare_index(self, index_interval: int):
+        index_file = index_file_path(self._output_file)
+        data_size = os.path.getsize(self._output_file)
+
+        index = SparseIndex(index_file)
+        index.discard_incomplete_record()
+        # Rebuild the index if it is missing or refers to entries which are no longer in the file.
+        last_offset = index.last_offset
+        if (not os.path.isfile(index_file) or
+                (last_offset is None and data_size > 0) or
+                (last_offset is not None and last_offset >= data_size)):
+            index = SparseIndex.rebuild(self._output_file, index_interval)
+            last_offset = index.last_offset
+        self._index = index
+
+        if last_offset is not None:
+            with open(self._output_file, "rb") as test_data:
+                test_data.seek(last_offset)
+                entries_since_index = sum(1 for line in test_data if line.strip())
+            self._entries_until_index = max(index_interval - entries_since_index, 0)
+
+    def _discard_incomplete_entry(self):
+        # An interrupted write can leave a partial line at the end of the file, remove it so the next entry
+        # doesn't get appended on to it.
+        with open(self._output_file, "rb+") as test_data:
+            test_data.seek(0, os.SEEK_END)
+            file_size = test_data.tell()
+            if file_size == 0:
+                return
+
+            position = file_size
+            while position > 0:
+                read_size = min(4096, position)
+                position -= read_size
+                test_data.seek(position)
+                last_newline = test_data.read(read_size).rfind(b"\n")
+                if last_newline != -1:
+                    position += last_newline + 1
+                    break
+
+            if position != file_size:
+                logger.warning("Discarding incomplete entry at the end of %s.", self._output_file)
+                test_data.truncate(position)
+
+
+class JsonLinesEntryReader(EntryReader):
+    """
+        Reads a file written by JsonLinesEntryWriter, using its SparseIndex when there is one to skip to the start
+        of a query.
+    """
+    def __init__(self, input_file: str):
+        self._input_file = input_file
+
+    def read_entries(self) -> Iterator[ConnectionEntry]:
+        return self._read_entries_from_offset(0)
+
+    def _read_entries_from(self, start: Optional[datetime]) -> Iterator[ConnectionEntry]:
+        index_file = index_file_path(self._input_file)
+        if start is None or not os.path.isfile(index_file):
+            return self.read_entries()
+
+        return self._read_entries_from_offset(SparseIndex(index_file).find_offset(start))
+
+    def _read_entries_from_offset(self, offset: int) -> Iterator[ConnectionEntry]:
+        with open(self._input_file, "rb") as test_data:
+            test_data.seek(offset)
+            for line in test_data:
+                if not line.endswith(b"\n"):
+                    logger.warning("Ignoring incomplete entry at the end of %s.", self._input_file)
+                    return
+                if not line.strip():
+                    continue
+
+                yield ConnectionEntry.from_json(json.loads(line.decode("utf-8")))
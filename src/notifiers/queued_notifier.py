@@ -0,0 +1,187 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Deque, List, Optional
+
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryWriterNotifier
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    """
+        This enum is used to indicate what a QueuedNotifier does with a new entry when its queue is full.
+    """
+    BLOCK = 0           # Wait for the worker to make room
+    DROP_OLDEST = 1     # Discard the oldest queued entry
+    COALESCE = 2        # Queue in place of the newest entry of the same target, blocking if either is a status change
+
+
+class QueuedNotifier(EntryWriterNotifier):
+    """
+        Queues entries and writes them from a background thread, so a slow writer doesn't hold up the tests. Up to
+        batch_size queued entries are written at a time. close() writes everything still queued before returning.
+    """
+    def __init__(self,
+                 writer: EntryWriter,
+                 max_size: int = 1000,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 batch_size: int = 100):
+        if max_size < 1:
+            raise ValueError("Max size must be at least 1, received {size}.".format(size=max_size))
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1, received {size}.".format(size=batch_size))
+
+        super().__init__(writer)
+        self._max_size = max_size
+        self._overflow_policy = overflow_policy
+        self._batch_size = batch_size
+
+        self._queue: Deque[ConnectionEntry] = deque()
+        self._condition = threading.Condition()
+        # Entries taken from the queue which haven't been written yet.
+        self._in_flight = 0
+        self._closed = False
+
+        self._queued = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._written = 0
+        self._failed = 0
+
+        self._worker = threading.Thread(target=self._run, name="QueuedNotifier", daemon=True)
+        self._worker.start()
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._queue)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def coalesced(self) -> int:
+        return self._coalesced
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+    def notify(self,
+               time: datetime,
+               result: bool,
+               status: Status,
+               status_change: StatusChange,
+               target: Optional[str] = None,
+               latency: Optional[ProbeLatency] = None,
+               status_code: Optional[int] = None,
+               first_byte_time: Optional[float] = None):
+        new_entry = ConnectionEntry(time, result, status, status_change, target, latency, status_code,
+                                    first_byte_time)
+
+        with self._condition:
+            if self._closed:
+                logger.error("Entry %s received after the notifier was closed.", new_entry)
+                raise ValueError("Notifier has been closed.")
+
+            self._queued += 1
+            if len(self._queue) >= self._max_size and not self._make_room(new_entry):
+                return
+
+            self._queue.append(new_entry)
+            self._condition.notify_all()
+
+    def flush(self):
+        # Waits until everything queued so far has been written, then flushes the writer.
+        with self._condition:
+            self._condition.wait_for(lambda: not self._queue and not self._in_flight)
+        self._writer.flush()
+
+    def close(self, timeout: Optional[float] = None):
+        # The writer is closed once everything queued has been written, or left open if the worker is still writing.
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.warning("Timed out with %s entries still queued, leaving the writer open.", len(self._queue))
+            return
+
+        try:
+            self._writer.flush()
+        finally:
+            self._writer.close()
+        logger.info("Notifier closed, %s entries written, %s dropped, %s coalesced and %s failed.",
+                    self._written, self._dropped, self._coalesced, self._failed)
+
+    def _make_room(self, new_entry: ConnectionEntry) -> bool:
+        # Returns whether the new entry should still be added to the queue, must hold the condition.
+        if self._overflow_policy == OverflowPolicy.DROP_OLDEST:
+            dropped_entry = self._queue.popleft()
+            self._dropped += 1
+            logger.warning("Queue full, dropped entry %s.", dropped_entry)
+            return True
+
+        if self._overflow_policy == OverflowPolicy.COALESCE and new_entry.status_change == StatusChange.NONE:
+            for index in range(len(self._queue) - 1, -1, -1):
+                queued_entry = self._queue[index]
+                if queued_entry.target == new_entry.target:
+                    if queued_entry.status_change == StatusChange.NONE:
+                        # The new entry goes to the back rather than into the old one's place, as anything queued
+                        # after that is older and entries must reach the writer in time order.
+                        del self._queue[index]
+                        self._coalesced += 1
+                        return True
+                    break
+
+        self._condition.wait_for(lambda: len(self._queue) < self._max_size or self._closed)
+        if self._closed:
+            logger.error("Notifier closed while waiting to queue entry %s.", new_entry)
+            raise ValueError("Notifier has been closed.")
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+
+                batch: List[ConnectionEntry] = []
+                while self._queue and len(batch) < self._batch_size:
+                    batch.append(self._queue.popleft())
+                self._in_flight = len(batch)
+                self._condition.notify_all()
+
+            try:
+                self._writer.write_new_entries(batch)
+                written = len(batch)
+            except Exception:
+                if self._writer.keeps_failed_entries:
+                    # The writer still has them and will try again, so they aren't lost.
+                    logger.exception("Failed to write %s entries, the writer kept them to retry.", len(batch))
+                    written = len(batch)
+                else:
+                    logger.exception("Failed to write %s entries.", len(batch))
+                    written = 0
+
+            with self._condition:
+                self._written += written
+                self._failed += len(batch) - written
+                self._in_flight = 0
+                self._condition.notify_all()
@@ -0,0 +1,325 @@
+import glob
+import gzip
+import json
+import logging
+import lzma
+import os
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import BinaryIO, Collection, Iterator, List, Optional, cast
+
+from src.connection_entry import ConnectionEntry, format_time, parse_time
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryReader, filter_entries, sync_data_file
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+SEGMENT_PATTERN = "segment-*.jsonl*"
+
+
+class Compression(Enum):
+    """
+        This enum is used to indicate how sealed segments are compressed.
+    """
+    NONE = 0    # Sealed segments are left as plain JSON lines
+    GZIP = 1    # Fast, moderate compression
+    LZMA = 2    # Slower, better compression
+
+
+EXTENSIONS = {Compression.NONE: "", Compression.GZIP: ".gz", Compression.LZMA: ".xz"}
+
+
+class RetentionAction(Enum):
+    DELETE = 0
+    DOWNSAMPLE = 1
+
+
+class RetentionPolicy:
+    """
+        Applies the action to sealed segments whose last entry is more than max_age older than the newest entry.
+        Downsampling keeps every status change and at most one other entry per downsample_interval.
+    """
+    def __init__(self,
+                 max_age: timedelta,
+                 action: RetentionAction = RetentionAction.DELETE,
+                 downsample_interval: timedelta = timedelta(minutes=10)):
+        self.max_age = max_age
+        self.action = action
+        self.downsample_interval = downsample_interval
+
+
+class Segment:
+    def __init__(self,
+                 number: int,
+                 start: datetime,
+                 end: Optional[datetime] = None,
+                 entries: int = 0,
+                 compression: Optional[Compression] = None,
+                 downsampled: bool = False):
+        self.number = number
+        self.start = start
+        # The end and compression are only known once the segment has been sealed.
+        self.end = end
+        self.entries = entries
+        self.compression = compression
+        self.downsampled = downsampled
+
+    @property
+    def sealed(self) -> bool:
+        return self.compression is not None
+
+    @property
+    def file_name(self) -> str:
+        extension = EXTENSIONS[self.compression] if self.compression is not None else ""
+        return "segment-{number:06d}-{start:%Y%m%d}.jsonl{extension}".format(
+            number=self.number, start=self.start, extension=extension)
+
+    @classmethod
+    def from_json(cls, json_segment: dict):
+        return Segment(json_segment["number"],
+                       parse_time(json_segment["start"]),
+                       parse_time(json_segment["end"]) if json_segment["end"] is not None else None,
+                       json_segment["entries"],
+                       Compression[json_segment["compression"]] if json_segment["compression"] is not None else None,
+                       json_segment["downsampled"])
+
+    def to_json(self) -> dict:
+        return {
+            "number": self.number,
+            "start": format_time(self.start),
+            "end": format_time(self.end) if self.end is not None else None,
+            "entries": self.entries,
+            "compression": self.compression.name if self.compression is not None else None,
+            "downsampled": self.downsampled
+        }
+
+
+def open_segment(path: str, compression: Optional[Compression], mode: str) -> BinaryIO:
+    # Segments are always opened in binary mode.
+    if compression == Compression.GZIP:
+        return cast(BinaryIO, gzip.open(path, mode))
+    if compression == Compression.LZMA:
+        return cast(BinaryIO, lzma.open(path, mode))
+    return cast(BinaryIO, open(path, mode))
+
+
+def read_segment(path: str, compression: Optional[Compression]) -> Iterator[ConnectionEntry]:
+    with open_segment(path, compression, "rb") as segment_data:
+        for line in segment_data:
+            if not line.endswith(b"\n"):
+                logger.warning("Ignoring incomplete entry at the end of %s.", path)
+                return
+            if line.strip():
+                yield ConnectionEntry.from_json(json.loads(line.decode("utf-8")))
+
+
+def load_manifest(directory: str) -> List[Segment]:
+    manifest_file = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.isfile(manifest_file):
+        if glob.glob(os.path.join(directory, SEGMENT_PATTERN)):
+            logger.warning("Segments found in %s without a manifest, they will be ignored.", directory)
+        return []
+
+    with open(manifest_file, "r") as manifest:
+        return [Segment.from_json(json_segment) for json_segment in json.load(manifest)]
+
+
+def save_manifest(directory: str, segments: List[Segment]):
+    # Write then rename so readers never see a partly written manifest.
+    manifest_file = os.path.join(directory, MANIFEST_FILE)
+    with open(manifest_file + ".tmp", "w") as manifest:
+        json.dump([segment.to_json() for segment in segments], manifest)
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+
+class SegmentedEntryWriter(EntryWriter):
+    """
+        Writes entries as JSON lines into a directory of segments, starting a new segment each day when daily is set
+        and after every max_entries entries when given. Finished segments are sealed by compressing them, and a
+        manifest records the time range of each so readers can skip segments outside of a query.
+    """
+    def __init__(self,
+                 directory: str,
+                 daily: bool = True,
+                 max_entries: Optional[int] = None,
+                 compression: Compression = Compression.GZIP,
+                 retention: Optional[RetentionPolicy] = None):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("Max entries must be at least 1, received {entries}.".format(entries=max_entries))
+
+        self._directory = directory
+        self._daily = daily
+        self._max_entries = max_entries
+        self._compression = compression
+        self._retention = retention
+
+        os.makedirs(directory, exist_ok=True)
+        self._segments = load_manifest(directory)
+        self._active_writer: Optional[JsonLinesEntryWriter] = None
+        self._last_time: Optional[datetime] = None
+        if self._segments and not self._segments[-1].sealed:
+            self._resume_segment(self._segments[-1])
+
+    @property
+    def segments(self) -> List[Segment]:
+        return list(self._segments)
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Adding %s new entries.", len(entries))
+
+        batch: List[ConnectionEntry] = []
+        for entry in entries:
+            if self._active_writer is None or self._needs_rotation(entry, len(batch)):
+                self._write_batch(batch)
+                batch = []
+                self._start_segment(entry)
+            batch.append(entry)
+        self._write_batch(batch)
+
+    def sync(self):
+        if self._active_writer is not None:
+            sync_data_file(self._segment_path(self._segments[-1]))
+
+    def seal(self):
+        # Seals the active segment, so the next entry will start a new one.
+        if self._active_writer is None:
+            return
+
+        segment = self._segments[-1]
+        segment.end = self._last_time
+        self._active_writer = None
+
+        logger.info("Sealing %s.", segment.file_name)
+        active_file = self._segment_path(segment)
+        if self._compression != Compression.NONE:
+            compressed_file = active_file + EXTENSIONS[self._compression]
+            with open(active_file, "rb") as segment_data, \
+                    open_segment(compressed_file + ".tmp", self._compression, "wb") as compressed_data:
+                for line in segment_data:
+                    compressed_data.write(line)
+            os.replace(compressed_file + ".tmp", compressed_file)
+
+        segment.compression = self._compression
+        save_manifest(self._directory, self._segments)
+        if self._compression != Compression.NONE:
+            os.remove(active_file)
+
+    def apply_retention(self, now: datetime):
+        if self._retention is None:
+            return
+
+        cut_off = now - self._retention.max_age
+        expired = [segment for segment in self._segments
+                   if segment.sealed and segment.end is not None and segment.end < cut_off]
+        if not expired:
+            return
+
+        if self._retention.action == RetentionAction.DELETE:
+            for segment in expired:
+                logger.info("Deleting expired segment %s.", segment.file_name)
+                self._segments.remove(segment)
+            save_manifest(self._directory, self._segments)
+            for segment in expired:
+                os.remove(self._segment_path(segment))
+        else:
+            for segment in expired:
+                if not segment.downsampled:
+                    self._downsample(segment, self._retention.downsample_interval)
+
+    def _needs_rotation(self, entry: ConnectionEntry, batch_size: int) -> bool:
+        segment = self._segments[-1]
+        if self._daily and entry.time.date() != segment.start.date():
+            return True
+        return self._max_entries is not None and segment.entries + batch_size >= self._max_entries
+
+    def _write_batch(self, batch: List[ConnectionEntry]):
+        if not batch or self._active_writer is None:
+            return
+
+        self._active_writer.write_new_entries(batch)
+        self._segments[-1].entries += len(batch)
+        self._last_time = batch[-1].time
+
+    def _start_segment(self, entry: ConnectionEntry):
+        self.seal()
+        self.apply_retention(entry.time)
+
+        number = self._segments[-1].number + 1 if self._segments else 0
+        segment = Segment(number, entry.time)
+        self._segments.append(segment)
+        save_manifest(self._directory, self._segments)
+        self._active_writer = JsonLinesEntryWriter(self._segment_path(segment), index_interval=None)
+
+    def _resume_segment(self, segment: Segment):
+        self._active_writer = JsonLinesEntryWriter(self._segment_path(segment), index_interval=None)
+        # The manifest isn't rewritten on every write, so count what actually made it into the file.
+        segment.entries = 0
+        for entry in read_segment(self._segment_path(segment), None):
+            segment.entries += 1
+            self._last_time = entry.time
+
+    def _downsample(self, segment: Segment, interval: timedelta):
+        logger.info("Downsampling expired segment %s.", segment.file_name)
+        path = self._segment_path(segment)
+
+        kept = []
+        last_kept: Optional[datetime] = None
+        for entry in read_segment(path, segment.compression):
+            if (entry.status_change != StatusChange.NONE or last_kept is None or
+                    entry.time - last_kept >= interval):
+                kept.append(entry)
+                last_kept = entry.time
+
+        with open_segment(path + ".tmp", segment.compression, "wb") as segment_data:
+            for entry in kept:
+                segment_data.write((json.dumps(entry.to_json()) + "\n").encode("utf-8"))
+        os.replace(path + ".tmp", path)
+
+        segment.entries = len(kept)
+        segment.downsampled = True
+        save_manifest(self._directory, self._segments)
+
+    def _segment_path(self, segment: Segment) -> str:
+        return os.path.join(self._directory, segment.file_name)
+
+
+class SegmentedEntryReader(EntryReader):
+    """
+        Reads the segments written by a SegmentedEntryWriter in time order, using the manifest to skip any segment
+        which ends before the start of a query or starts at or after its end.
+    """
+    def __init__(self, directory: str):
+        self._directory = directory
+
+    def read_entries(self) -> Iterator[ConnectionEntry]:
+        return self._read_segments(None, None)
+
+    def query(self,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              statuses: Optional[Collection[Status]] = None,
+              status_changes: Optional[Collection[StatusChange]] = None,
+              targets: Optional[Collection[str]] = None) -> Iterator[ConnectionEntry]:
+        return filter_entries(self._read_segments(start, end), start, end, statuses, status_changes, targets)
+
+    def _read_entries_from(self, start: Optional[datetime]) -> Iterator[ConnectionEntry]:
+        return self._read_segments(start, None)
+
+    def _read_segments(self, start: Optional[datetime], end: Optional[datetime]) -> Iterator[ConnectionEntry]:
+        for segment in load_manifest(self._directory):
+            if start is not None and segment.end is not None and segment.end < start:
+                continue
+            if end is not None and segment.start >= end:
+                return
+
+            path = os.path.join(self._directory, segment.file_name)
+            if not os.path.isfile(path):
+                logger.warning("Segment %s is in the manifest but missing, skipping it.", segment.file_name)
+                continue
+
+            yield from read_segment(path, segment.compression)
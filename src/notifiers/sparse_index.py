@@ -0,0 +1,104 @@
+import bisect
+import json
+import logging
+import os
+import struct
+from datetime import datetime
+from typing import List, Optional
+
+from src.connection_entry import datetime_to_epoch_us, parse_time
+
+logger = logging.getLogger(__name__)
+
+# Microseconds since the epoch and the byte offset of the entry in the data file.
+INDEX_RECORD = struct.Struct("<qq")
+
+
+def index_file_path(data_file: str) -> str:
+    return data_file + ".idx"
+
+
+class SparseIndex:
+    """
+        Sidecar index of a JSON lines data file, recording the time and byte offset of every interval-th entry so
+        readers can seek close to a point in time instead of reading from the start of the file.
+    """
+    def __init__(self, index_file: str):
+        self._index_file = index_file
+        self._times: List[int] = []
+        self._offsets: List[int] = []
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def last_offset(self) -> Optional[int]:
+        return self._offsets[-1] if self._offsets else None
+
+    def add(self, time: datetime, offset: int):
+        epoch_us = datetime_to_epoch_us(time)
+        with open(self._index_file, "ab") as index:
+            index.write(INDEX_RECORD.pack(epoch_us, offset))
+
+        self._times.append(epoch_us)
+        self._offsets.append(offset)
+
+    def find_offset(self, time: datetime) -> int:
+        """
+            Returns the offset of the last indexed entry before time. Reading from here will reach every entry at
+            or after time.
+        """
+        position = bisect.bisect_left(self._times, datetime_to_epoch_us(time))
+
+        return self._offsets[position - 1] if position else 0
+
+    def discard_incomplete_record(self):
+        # An interrupted write can leave part of a record at the end of the file, which would misalign any records
+        # appended after it.
+        if not os.path.isfile(self._index_file):
+            return
+
+        complete_size = len(self._offsets) * INDEX_RECORD.size
+        if os.path.getsize(self._index_file) != complete_size:
+            logger.warning("Discarding incomplete record at the end of %s.", self._index_file)
+            with open(self._index_file, "rb+") as index:
+                index.truncate(complete_size)
+
+    @classmethod
+    def rebuild(cls, data_file: str, interval: int) -> "SparseIndex":
+        logger.info("Rebuilding index of %s.", data_file)
+        index_file = index_file_path(data_file)
+        if os.path.isfile(index_file):
+            os.remove(index_file)
+
+        sparse_index = SparseIndex(index_file)
+        # Creates the file even when there is nothing to index.
+        open(index_file, "ab").close()
+
+        with open(data_file, "rb") as test_data:
+            entry_number = 0
+            offset = 0
+            for line in test_data:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    if entry_number % interval == 0:
+                        sparse_index.add(parse_time(json.loads(line.decode("utf-8"))["time"]), offset)
+                    entry_number += 1
+                offset += len(line)
+
+        return sparse_index
+
+    def _load(self):
+        if not os.path.isfile(self._index_file):
+            return
+
+        with open(self._index_file, "rb") as index:
+            data = index.read()
+
+        # Ignores any record left incomplete by an interrupted write.
+        complete_size = len(data) - len(data) % INDEX_RECORD.size
+        for epoch_us, offset in INDEX_RECORD.iter_unpack(data[:complete_size]):
+            self._times.append(epoch_us)
+            self._offsets.append(offset)
@@ -0,0 +1,246 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Collection, Iterator, List, Optional
+from urllib.request import pathname2url
+
+from src.connection_entry import ConnectionEntry, datetime_to_epoch_us, epoch_us_to_datetime
+from src.connection_tester import ProbeLatency
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryReader
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+# Stored in the database's user_version, so a file written by a later schema is not misread.
+SCHEMA_VERSION = 2
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entries ("
+    "id INTEGER PRIMARY KEY, "
+    "time INTEGER NOT NULL, "
+    "result INTEGER NOT NULL, "
+    "status INTEGER NOT NULL, "
+    "status_change INTEGER NOT NULL, "
+    "target TEXT, "
+    "dns_time REAL, "
+    "connect_time REAL, "
+    "total_time REAL, "
+    "status_code INTEGER, "
+    "first_byte_time REAL)",
+    "CREATE INDEX IF NOT EXISTS entries_target_time ON entries (target, time)",
+    # Queries which aren't for particular targets still need to find a time range without a full scan.
+    "CREATE INDEX IF NOT EXISTS entries_time ON entries (time)"
+)
+# Statements which bring a database from the given version to the next.
+UPGRADES = {
+    1: ("ALTER TABLE entries ADD COLUMN status_code INTEGER",
+        "ALTER TABLE entries ADD COLUMN first_byte_time REAL")
+}
+
+COLUMNS = ("time", "result", "status", "status_change", "target", "dns_time", "connect_time", "total_time",
+           "status_code", "first_byte_time")
+INSERT = "INSERT INTO entries ({columns}) VALUES ({placeholders})".format(columns=", ".join(COLUMNS),
+                                                                          placeholders=", ".join("?" * len(COLUMNS)))
+SELECT = "SELECT {columns} FROM entries".format(columns=", ".join(COLUMNS))
+# Ties on time keep the order the entries were written in.
+ORDER = " ORDER BY time, id"
+
+
+def entry_to_row(entry: ConnectionEntry) -> tuple:
+    latency = entry.latency or ProbeLatency()
+    return (datetime_to_epoch_us(entry.time),
+            entry.result,
+            entry.status.value,
+            entry.status_change.value,
+            entry.target,
+            latency.dns_time,
+            latency.connect_time,
+            latency.total_time,
+            entry.status_code,
+            entry.first_byte_time)
+
+
+def row_to_entry(row: tuple) -> ConnectionEntry:
+    epoch_us, result, status, status_change, target, dns_time, connect_time, total_time, status_code, \
+        first_byte_time = row
+    latency = None
+    if dns_time is not None or connect_time is not None or total_time is not None:
+        latency = ProbeLatency(dns_time, connect_time, total_time)
+
+    return ConnectionEntry(epoch_us_to_datetime(epoch_us),
+                           bool(result),
+                           Status(status),
+                           StatusChange(status_change),
+                           target,
+                           latency,
+                           status_code,
+                           first_byte_time)
+
+
+def _check_schema_version(connection: sqlite3.Connection, file_path: str) -> int:
+    try:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.DatabaseError:
+        logger.error("File %s is not an SQLite database.", file_path)
+        raise ValueError("File '{file}' is not an SQLite database.".format(file=file_path))
+    if not 0 <= version <= SCHEMA_VERSION:
+        logger.error("File %s has schema version %s, expected %s.", file_path, version, SCHEMA_VERSION)
+        raise ValueError("File '{file}' is not a version {version} entry database."
+                         .format(file=file_path, version=SCHEMA_VERSION))
+
+    return version
+
+
+class SqliteEntryWriter(EntryWriter):
+    """
+        Inserts entries into an SQLite database, with a batch written in one transaction by a single prepared
+        statement. The database is in WAL mode so SqliteEntryReaders, in this process or any other, can query it
+        while entries are being written.
+
+        Commits are not synced to disk as they happen, sync checkpoints the log into the database to do that. The
+        writer can be used from any thread, but only one SqliteEntryWriter should have a database open at a time.
+    """
+    def __init__(self, output_file: str):
+        self._output_file = output_file
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Transactions are managed here rather than by the sqlite3 module.
+        self._connection = sqlite3.connect(output_file, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        try:
+            self._prepare_database()
+        except ValueError:
+            self._connection.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        logger.debug("Adding new entry: %s.", entry)
+
+        self._insert([entry_to_row(entry)])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Adding %s new entries.", len(entries))
+
+        if entries:
+            self._insert([entry_to_row(entry) for entry in entries])
+
+    def sync(self):
+        with self._lock:
+            self._connection.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _insert(self, rows: List[tuple]):
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(INSERT, rows)
+            except sqlite3.Error:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def _prepare_database(self):
+        version = _check_schema_version(self._connection, self._output_file)
+
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Safe in WAL mode, an interruption can only lose the latest commits, never corrupt the database.
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        if version == 0:
+            logger.debug("Creating entry tables in %s.", self._output_file)
+            self._connection.execute("BEGIN")
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            self._connection.execute("PRAGMA user_version={version}".format(version=SCHEMA_VERSION))
+            self._connection.execute("COMMIT")
+        elif version < SCHEMA_VERSION:
+            logger.info("Upgrading %s from schema version %s to %s.", self._output_file, version, SCHEMA_VERSION)
+            self._connection.execute("BEGIN")
+            for from_version in range(version, SCHEMA_VERSION):
+                for statement in UPGRADES[from_version]:
+                    self._connection.execute(statement)
+            self._connection.execute("PRAGMA user_version={version}".format(version=SCHEMA_VERSION))
+            self._connection.execute("COMMIT")
+
+
+class SqliteEntryReader(EntryReader):
+    """
+        Reads a database written by SqliteEntryWriter, opening it read only. Queries are run in SQL, so only the
+        matching entries are read, using the index on target and time when targets are given.
+    """
+    def __init__(self, input_file: str):
+        if not os.path.isfile(input_file):
+            logger.error("Failed to open entry database %s, it does not exist.", input_file)
+            raise ValueError("Entry database '{file}' does not exist.".format(file=input_file))
+
+        self._input_file = input_file
+        uri = "file:{path}?mode=ro".format(path=pathname2url(os.path.abspath(input_file)))
+        self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        try:
+            version = _check_schema_version(self._connection, input_file)
+            if 0 < version < SCHEMA_VERSION:
+                logger.error("Entry database %s has schema version %s, expected %s.", input_file, version,
+                             SCHEMA_VERSION)
+                raise ValueError("Entry database '{file}' is from an older version, opening it with a "
+                                 "SqliteEntryWriter upgrades it.".format(file=input_file))
+        except ValueError:
+            self._connection.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read_entries(self) -> Iterator[ConnectionEntry]:
+        return self._select("", [])
+
+    def query(self,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              statuses: Optional[Collection[Status]] = None,
+              status_changes: Optional[Collection[StatusChange]] = None,
+              targets: Optional[Collection[str]] = None) -> Iterator[ConnectionEntry]:
+        conditions = []
+        parameters: list = []
+        if start is not None:
+            conditions.append("time >= ?")
+            parameters.append(datetime_to_epoch_us(start))
+        if end is not None:
+            conditions.append("time < ?")
+            parameters.append(datetime_to_epoch_us(end))
+        for column, members in (("status", statuses), ("status_change", status_changes)):
+            if members is not None:
+                values = [member.value for member in members]
+                conditions.append("{column} IN ({placeholders})"
+                                  .format(column=column, placeholders=", ".join("?" * len(values))))
+                parameters.extend(values)
+        if targets is not None:
+            targets = list(targets)
+            conditions.append("target IN ({placeholders})".format(placeholders=", ".join("?" * len(targets))))
+            parameters.extend(targets)
+
+        return self._select(" WHERE " + " AND ".join(conditions) if conditions else "", parameters)
+
+    def close(self):
+        self._connection.close()
+
+    def _select(self, where: str, parameters: list) -> Iterator[ConnectionEntry]:
+        # The tables don't exist until the writer has created them.
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] == 0:
+            return
+        for row in self._connection.execute(SELECT + where + ORDER, parameters):
+            yield row_to_entry(row)
@@ -0,0 +1,56 @@
+import json
+import logging
+import socket
+from typing import List
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.status_tracker import Status
+
+logger = logging.getLogger(__name__)
+
+LOCAL0 = 16
+SEVERITIES = {
+    Status.UNKNOWN: 6,  # Informational
+    Status.OK: 6,       # Informational
+    Status.WARNING: 4,  # Warning
+    Status.ERROR: 3     # Error
+}
+
+
+def format_message(entry: ConnectionEntry, facility: int, hostname: str, app_name: str) -> bytes:
+    # RFC 5424, with the entry as JSON for the message and the severity following its status. Entry times are
+    # naive local times, the timestamp must give its offset from UTC.
+    priority = facility * 8 + SEVERITIES[entry.status]
+
+    return "<{priority}>1 {time} {hostname} {app_name} - - - {message}".format(
+        priority=priority,
+        time=entry.time.astimezone().isoformat(),
+        hostname=hostname,
+        app_name=app_name,
+        message=json.dumps(entry.to_json())).encode("utf-8")
+
+
+class SyslogEntryWriter(EntryWriter):
+    """
+        Sends each entry to a syslog collector as a UDP datagram. UDP gives no delivery guarantee, only failures to
+        send, such as an unreachable network, raise an OSError.
+    """
+    def __init__(self, host: str, port: int = 514, facility: int = LOCAL0, app_name: str = "internet-monitor"):
+        self._address = (host, port)
+        self._facility = facility
+        self._hostname = socket.gethostname() or "-"
+        self._app_name = app_name
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Sending %s new entries to %s:%s.", len(entries), *self._address)
+
+        for entry in entries:
+            self._socket.sendto(format_message(entry, self._facility, self._hostname, self._app_name), self._address)
+
+    def close(self):
+        self._socket.close()
@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+from typing import Iterator
+
+from src.notifiers.entry_writer_notifier import FileType, prepare_data_file, sync_data_file
+from src.throughput_entry import ThroughputEntry
+
+logger = logging.getLogger(__name__)
+
+
+class ThroughputEntryWriter:
+    """
+        Appends each throughput entry as a JSON object on its own line. Throughput tests run far less often than
+        connection tests, so entries are written straight away rather than buffered.
+    """
+    def __init__(self, output_file: str):
+        self._output_file = output_file
+        prepare_data_file(output_file, FileType.JSON_LINES)
+
+    def write_new_entry(self, entry: ThroughputEntry):
+        logger.debug("Adding new throughput entry: %s.", entry)
+
+        with open(self._output_file, "ab") as throughput_data:
+            throughput_data.write((json.dumps(entry.to_json()) + "\n").encode("utf-8"))
+
+    def sync(self):
+        sync_data_file(self._output_file)
+
+
+class ThroughputEntryReader:
+    def __init__(self, input_file: str):
+        self._input_file = input_file
+
+    def read_entries(self) -> Iterator[ThroughputEntry]:
+        if not os.path.isfile(self._input_file):
+            return
+
+        with open(self._input_file, "rb") as throughput_data:
+            for line in throughput_data:
+                if not line.endswith(b"\n"):
+                    logger.warning("Ignoring incomplete entry at the end of %s.", self._input_file)
+                    return
+                if not line.strip():
+                    continue
+
+                yield ThroughputEntry.from_json(json.loads(line.decode("utf-8")))
@@ -0,0 +1,48 @@
+import logging
+import time
+from typing import List
+
+from src.connection_entry import ConnectionEntry
+from src.metrics import MonitorMetrics
+from src.notifiers.entry_writer_notifier import EntryWriter
+
+logger = logging.getLogger(__name__)
+
+
+class TimedEntryWriter(EntryWriter):
+    """
+        Passes entries on to another writer, recording how long each write, flush and sync takes in the write
+        duration histogram under the given writer name.
+    """
+    def __init__(self, writer: EntryWriter, metrics: MonitorMetrics, name: str):
+        self._writer = writer
+        self._write_duration = metrics.write_duration.labels(name, "write")
+        self._flush_duration = metrics.write_duration.labels(name, "flush")
+        self._sync_duration = metrics.write_duration.labels(name, "sync")
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        start_time = time.perf_counter()
+        try:
+            self._writer.write_new_entries(entries)
+        finally:
+            self._write_duration.observe(time.perf_counter() - start_time)
+
+    def flush(self):
+        start_time = time.perf_counter()
+        try:
+            self._writer.flush()
+        finally:
+            self._flush_duration.observe(time.perf_counter() - start_time)
+
+    def sync(self):
+        start_time = time.perf_counter()
+        try:
+            self._writer.sync()
+        finally:
+            self._sync_duration.observe(time.perf_counter() - start_time)
+
+    def close(self):
+        self._writer.close()
@@ -0,0 +1,34 @@
+import json
+import logging
+import urllib.request
+from typing import Dict, List, Optional
+
+from src.connection_entry import ConnectionEntry, encode_entries
+from src.notifiers.entry_writer_notifier import EntryWriter
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookEntryWriter(EntryWriter):
+    """
+        POSTs entries to a URL as a JSON object, {"entries": [...]}, one request per batch. Anything other than a 2xx
+        response raises an OSError, which lets RetryingEntryWriter retry it.
+    """
+    def __init__(self, url: str, timeout: float = 5, headers: Optional[Dict[str, str]] = None):
+        self._url = url
+        self._timeout = timeout
+        self._headers = {"Content-Type": "application/json"}
+        self._headers.update(headers or {})
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        logger.debug("Posting %s new entries to %s.", len(entries), self._url)
+
+        body = json.dumps({"entries": encode_entries(entries)}).encode("utf-8")
+        request = urllib.request.Request(self._url, data=body, headers=self._headers, method="POST")
+        # urlopen raises HTTPError, an OSError, for any status outside of 2xx and 3xx.
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            if not 200 <= response.status < 300:
+                raise OSError("Webhook {url} responded with {status}.".format(url=self._url, status=response.status))
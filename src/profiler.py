@@ -0,0 +1,88 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RunProfiler:
+    """
+        Profiles the next few runs of a function with cProfile once requested, then writes the combined stats to
+        output_directory as a .prof file for pstats or snakeviz and a text report of the top report_lines functions
+        by cumulative time. Until it is requested, running a function through it costs a single check.
+
+        request only records how many runs were asked for, which run picks up under the lock. That keeps it safe to
+        call from a signal handler, which may interrupt run while the lock is held on the same thread.
+    """
+    def __init__(self, output_directory: str = "profiles", report_lines: int = 30):
+        self._output_directory = output_directory
+        self._report_lines = report_lines
+        self._lock = threading.Lock()
+        # Runs requested but not yet picked up by run, only ever replaced in a single assignment.
+        self._pending_runs = 0
+        self._remaining_runs = 0
+        self._profile: Optional[cProfile.Profile] = None
+
+    @property
+    def remaining_runs(self) -> int:
+        return self._pending_runs or self._remaining_runs
+
+    def request(self, runs: int):
+        if runs < 1:
+            raise ValueError("Runs must be at least 1, received {runs}.".format(runs=runs))
+
+        self._pending_runs = runs
+
+    def install_signal_handler(self, runs: int, signal_number: int = signal.SIGUSR1):
+        # Lets a running service be profiled with, for example, kill -USR1 <pid>.
+        signal.signal(signal_number, lambda received_signal, frame: self.request(runs))
+
+    def run(self, function: Callable[[], Any]) -> Any:
+        if self._pending_runs:
+            self._start_requested_runs()
+
+        profile = self._profile
+        if profile is None:
+            return function()
+
+        profile.enable()
+        try:
+            return function()
+        finally:
+            profile.disable()
+            with self._lock:
+                self._remaining_runs -= 1
+                finished = self._remaining_runs <= 0
+                if finished:
+                    self._profile = None
+            if finished:
+                self._write_report(profile)
+
+    def _start_requested_runs(self):
+        with self._lock:
+            runs, self._pending_runs = self._pending_runs, 0
+            if not runs:
+                return
+            logger.info("Profiling the next %s runs.", runs)
+            self._remaining_runs = runs
+            if self._profile is None:
+                self._profile = cProfile.Profile()
+
+    def _write_report(self, profile: cProfile.Profile):
+        os.makedirs(self._output_directory, exist_ok=True)
+        base_path = os.path.join(self._output_directory, "profile-{time:%Y%m%d-%H%M%S-%f}".format(time=datetime.now()))
+
+        profile.dump_stats(base_path + ".prof")
+
+        report = io.StringIO()
+        pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(self._report_lines)
+        with open(base_path + ".txt", "w") as report_file:
+            report_file.write(report.getvalue())
+
+        logger.info("Profile written to %s.prof and %s.txt.", base_path, base_path)
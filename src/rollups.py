@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.connection_entry import ConnectionEntry, datetime_to_epoch_us, epoch_us_to_datetime
+from src.notifiers.entry_writer_notifier import EntryReader, EntryWriter
+from src.status_tracker import Status, StatusChange
+
+logger = logging.getLogger(__name__)
+
+MICROSECONDS = 1000000
+
+
+class Resolution(Enum):
+    """
+        This enum is used to indicate the size of rollup buckets, the values are the bucket lengths in seconds.
+    """
+    MINUTE = 60
+    HOUR = 3600
+    DAY = 86400
+
+
+# Coarsest first, which is the order queries try them in.
+RESOLUTIONS = (Resolution.DAY, Resolution.HOUR, Resolution.MINUTE)
+
+
+class RollupBucket:
+    def __init__(self,
+                 successes: int = 0,
+                 failures: int = 0,
+                 status_changes: int = 0,
+                 time_in_status: Optional[Dict[Status, float]] = None):
+        self.successes = successes
+        self.failures = failures
+        self.status_changes = status_changes
+        self.time_in_status = time_in_status or {status: 0.0 for status in Status}
+
+    @property
+    def tests(self) -> int:
+        return self.successes + self.failures
+
+    @property
+    def uptime(self) -> float:
+        # The fraction of the recorded time which wasn't spent in ERROR.
+        total_time = sum(self.time_in_status.values())
+        if total_time <= 0:
+            return 1.0
+
+        return 1.0 - self.time_in_status[Status.ERROR] / total_time
+
+    def add(self, other: "RollupBucket"):
+        self.successes += other.successes
+        self.failures += other.failures
+        self.status_changes += other.status_changes
+        for status, seconds in other.time_in_status.items():
+            self.time_in_status[status] += seconds
+
+    @classmethod
+    def from_json(cls, json_bucket: list):
+        successes, failures, status_changes, *times = json_bucket
+        return RollupBucket(successes, failures, status_changes, dict(zip(Status, times)))
+
+    def to_json(self) -> list:
+        return [self.successes, self.failures, self.status_changes] + [self.time_in_status[status]
+                                                                       for status in Status]
+
+    def __eq__(self, other):
+        return isinstance(other, RollupBucket) and self.to_json() == other.to_json()
+
+    def __str__(self):
+        return str(self.to_json())
+
+
+class TargetRollups:
+    def __init__(self) -> None:
+        self.buckets: Dict[Resolution, Dict[int, RollupBucket]] = {resolution: {} for resolution in Resolution}
+        # Time (microseconds since the epoch) and status of the last entry, the time until the next entry is
+        # counted towards this status.
+        self.last_time: Optional[int] = None
+        self.last_status: Optional[Status] = None
+
+    def get_bucket(self, resolution: Resolution, bucket_start: int) -> RollupBucket:
+        buckets = self.buckets[resolution]
+        if bucket_start not in buckets:
+            buckets[bucket_start] = RollupBucket()
+        return buckets[bucket_start]
+
+
+class RollupStore:
+    """
+        Per minute, hour and day totals of test results, status changes and time spent in each Status, kept up
+        to date one entry at a time. The time between two entries is counted towards the first entry's status, up
+        to max_gap seconds so time the monitor wasn't running isn't counted. Buckets start at whole multiples of
+        their length from the epoch, in the same local time as the entries.
+    """
+    def __init__(self, rollup_file: Optional[str] = None, max_gap: float = 3600):
+        self._rollup_file = rollup_file
+        self._max_gap = int(max_gap * MICROSECONDS)
+        self._lock = threading.Lock()
+        self._targets: Dict[Optional[str], TargetRollups] = {}
+
+        if rollup_file is not None and os.path.isfile(rollup_file):
+            self._load()
+
+    @property
+    def targets(self) -> List[Optional[str]]:
+        return list(self._targets)
+
+    @classmethod
+    def rebuild(cls,
+                entries: Iterable[ConnectionEntry],
+                rollup_file: Optional[str] = None,
+                max_gap: float = 3600) -> "RollupStore":
+        logger.info("Rebuilding rollups.")
+        rollup_store = RollupStore(max_gap=max_gap)
+        rollup_store._rollup_file = rollup_file
+        for entry in entries:
+            rollup_store.add_entry(entry)
+
+        return rollup_store
+
+    def catch_up(self, reader: EntryReader) -> int:
+        """
+            Adds the entries from the raw history which are newer than the last one added for their target, so a
+            store saved before the monitor was stopped is brought back in line with the history. Returns how many
+            entries were added. An empty store is rebuilt from the whole history.
+        """
+        with self._lock:
+            last_times = {target: rollups.last_time for target, rollups in self._targets.items()}
+
+        # Nothing before the earliest of the targets' last entries can be missing, unless a target has none at all.
+        known_times = [last_time for last_time in last_times.values() if last_time is not None]
+        start = None
+        if known_times and len(known_times) == len(last_times):
+            start = epoch_us_to_datetime(min(known_times))
+
+        added = 0
+        for entry in reader.query(start=start):
+            last_time = last_times.get(entry.target)
+            if last_time is not None and datetime_to_epoch_us(entry.time) <= last_time:
+                continue
+            self.add_entry(entry)
+            added += 1
+
+        if added:
+            logger.info("Added %s entries to the rollups which were missing from the saved store.", added)
+        return added
+
+    def add_entry(self, entry: ConnectionEntry):
+        with self._lock:
+            rollups = self._targets.setdefault(entry.target, TargetRollups())
+            entry_time = datetime_to_epoch_us(entry.time)
+
+            for resolution in Resolution:
+                bucket = rollups.get_bucket(resolution, self._bucket_start(entry_time, resolution))
+                if entry.result:
+                    bucket.successes += 1
+                else:
+                    bucket.failures += 1
+                if entry.status_change != StatusChange.NONE:
+                    bucket.status_changes += 1
+
+            if rollups.last_time is not None and rollups.last_status is not None:
+                self._add_status_time(rollups, rollups.last_status, rollups.last_time,
+                                      min(entry_time, rollups.last_time + self._max_gap))
+
+            rollups.last_time = entry_time
+            rollups.last_status = entry.status
+
+    def get_buckets(self,
+                    resolution: Resolution,
+                    start: datetime,
+                    end: datetime,
+                    target: Optional[str] = None) -> List[Tuple[datetime, RollupBucket]]:
+        """
+            Returns every bucket of the resolution which starts from start (inclusive) to end (exclusive), including
+            empty ones.
+        """
+        first_bucket = self._bucket_start(datetime_to_epoch_us(start), resolution)
+        if first_bucket < datetime_to_epoch_us(start):
+            first_bucket += resolution.value * MICROSECONDS
+
+        with self._lock:
+            rollups = self._targets.get(target)
+            buckets = []
+            for bucket_start in range(first_bucket, datetime_to_epoch_us(end), resolution.value * MICROSECONDS):
+                bucket = RollupBucket()
+                if rollups is not None and bucket_start in rollups.buckets[resolution]:
+                    bucket.add(rollups.buckets[resolution][bucket_start])
+                buckets.append((epoch_us_to_datetime(bucket_start), bucket))
+
+        return buckets
+
+    def query(self, start: datetime, end: datetime, target: Optional[str] = None) -> RollupBucket:
+        """
+            Totals from start to end, rounded out to whole minutes, adding up the coarsest buckets which fit.
+        """
+        minute = Resolution.MINUTE.value * MICROSECONDS
+        position = self._bucket_start(datetime_to_epoch_us(start), Resolution.MINUTE)
+        end_time = -(-datetime_to_epoch_us(end) // minute) * minute
+
+        total = RollupBucket()
+        with self._lock:
+            rollups = self._targets.get(target)
+            if rollups is None:
+                return total
+
+            while position < end_time:
+                for resolution in RESOLUTIONS:
+                    size = resolution.value * MICROSECONDS
+                    if position % size == 0 and position + size <= end_time:
+                        break
+
+                bucket = rollups.buckets[resolution].get(position)
+                if bucket is not None:
+                    total.add(bucket)
+                position += size
+
+        return total
+
+    def prune(self, resolution: Resolution, before: datetime):
+        # Drops buckets of the resolution which start before the given time, coarser buckets still cover them.
+        cut_off = datetime_to_epoch_us(before)
+        with self._lock:
+            for rollups in self._targets.values():
+                buckets = rollups.buckets[resolution]
+                for bucket_start in [bucket_start for bucket_start in buckets if bucket_start < cut_off]:
+                    del buckets[bucket_start]
+
+    def save(self):
+        if self._rollup_file is None:
+            return
+
+        with self._lock:
+            json_rollups = [{
+                "target": target,
+                "last_time": rollups.last_time,
+                "last_status": rollups.last_status.name if rollups.last_status is not None else None,
+                "buckets": {resolution.name: {str(bucket_start): bucket.to_json()
+                                              for bucket_start, bucket in rollups.buckets[resolution].items()}
+                            for resolution in Resolution}
+            } for target, rollups in self._targets.items()]
+
+        # Write then rename so a crash part way through doesn't lose the previous rollups.
+        temporary_file = self._rollup_file + ".tmp"
+        with open(temporary_file, "w") as rollup_data:
+            json.dump(json_rollups, rollup_data)
+        os.replace(temporary_file, self._rollup_file)
+
+    def _load(self):
+        with open(self._rollup_file, "r") as rollup_data:
+            json_rollups = json.load(rollup_data)
+
+        for json_target in json_rollups:
+            rollups = TargetRollups()
+            rollups.last_time = json_target["last_time"]
+            if json_target["last_status"] is not None:
+                rollups.last_status = Status[json_target["last_status"]]
+            for resolution in Resolution:
+                rollups.buckets[resolution] = {int(bucket_start): RollupBucket.from_json(json_bucket)
+                                               for bucket_start, json_bucket
+                                               in json_target["buckets"][resolution.name].items()}
+            self._targets[json_target["target"]] = rollups
+
+    def _add_status_time(self, rollups: TargetRollups, status: Status, start: int, end: int):
+        # Splits the time across each bucket it overlaps.
+        for resolution in Resolution:
+            size = resolution.value * MICROSECONDS
+            position = start
+            while position < end:
+                bucket_start = self._bucket_start(position, resolution)
+                section_end = min(bucket_start + size, end)
+                rollups.get_bucket(resolution, bucket_start).time_in_status[status] += \
+                    (section_end - position) / MICROSECONDS
+                position = section_end
+
+    @staticmethod
+    def _bucket_start(epoch_us: int, resolution: Resolution) -> int:
+        size = resolution.value * MICROSECONDS
+        return epoch_us - epoch_us % size
+
+
+class RollupEntryWriter(EntryWriter):
+    """
+        Passes entries on to another writer and adds them to a RollupStore, saving the store every save_interval
+        entries and whenever the writer is flushed or synced.
+    """
+    def __init__(self, writer: EntryWriter, rollup_store: RollupStore, save_interval: int = 100):
+        self._writer = writer
+        self._rollup_store = rollup_store
+        self._save_interval = save_interval
+        self._unsaved_entries = 0
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        self._writer.write_new_entries(entries)
+
+        for entry in entries:
+            self._rollup_store.add_entry(entry)
+
+        self._unsaved_entries += len(entries)
+        if self._unsaved_entries >= self._save_interval:
+            self._save()
+
+    def flush(self):
+        self._writer.flush()
+        self._save()
+
+    def sync(self):
+        self._writer.sync()
+        self._save()
+
+    def close(self):
+        try:
+            self._writer.close()
+        finally:
+            self._save()
+
+    def _save(self):
+        self._rollup_store.save()
+        self._unsaved_entries = 0
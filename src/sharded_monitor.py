@@ -0,0 +1,298 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+
+from src.async_connection_tester import AsyncConnectionTester
+from src.connection_entry import ConnectionEntry, decode_entries, encode_entries
+from src.connection_tester import ConnectionTester
+from src.monitor import Monitor
+from src.multi_target_monitor import MultiTargetMonitor
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryWriterNotifier
+from src.status_tracker import Status, StatusTracker
+
+logger = logging.getLogger(__name__)
+
+# Messages from workers are (type, payload) tuples.
+ENTRIES_MESSAGE = "entries"
+HEARTBEAT_MESSAGE = "heartbeat"
+STOP_MESSAGE = "stop"
+
+
+class TargetSpec(NamedTuple):
+    """
+        Everything a worker process needs to create a target's tester and StatusTracker. It is pickled to send it
+        to the worker, so it holds plain values rather than the objects themselves.
+    """
+    name: str
+    remote_to_check: str
+    monitor_config: dict
+    port: int = 80
+    number_retry_attempts: Optional[int] = None
+
+
+class TargetState(NamedTuple):
+    status: Status
+    number_failures: int
+
+
+def create_tester(spec: TargetSpec) -> ConnectionTester:
+    return AsyncConnectionTester(spec.remote_to_check, spec.port)
+
+
+def get_shard(name: str, shards: int) -> int:
+    # A checksum rather than hash(), which differs between processes, so targets always land on the same shard.
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+
+class _PipeEntryWriter(EntryWriter):
+    # Sends entries to the aggregator in batches of batch_size, and whatever is left over on flush.
+    def __init__(self, connection: Connection, batch_size: int) -> None:
+        self._connection = connection
+        self._batch_size = batch_size
+        self._entries: List[ConnectionEntry] = []
+        self.last_sent = time.monotonic()
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self._entries.append(entry)
+        if len(self._entries) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._entries:
+            self._connection.send((ENTRIES_MESSAGE, encode_entries(self._entries)))
+            self._entries = []
+            self.last_sent = time.monotonic()
+
+    def send_heartbeat(self):
+        self._connection.send((HEARTBEAT_MESSAGE, None))
+        self.last_sent = time.monotonic()
+
+
+def _run_worker(specs: List[TargetSpec],
+                states: Dict[str, TargetState],
+                connection: Connection,
+                tester_factory: Callable[[TargetSpec], ConnectionTester],
+                tick_interval: float,
+                batch_size: int,
+                heartbeat_interval: float):
+    """
+        The body of a worker process: a MultiTargetMonitor for the shard's targets, ticked until the aggregator asks
+        it to stop or goes away.
+    """
+    writer = _PipeEntryWriter(connection, batch_size)
+    monitor = MultiTargetMonitor(BlockingScheduler(), EntryWriterNotifier(writer))
+    for spec in specs:
+        status_tracker = StatusTracker(spec.number_retry_attempts)
+        state = states.get(spec.name)
+        if state is not None:
+            status_tracker.restore(state.status, state.number_failures)
+        monitor.add_target(spec.name, tester_factory(spec), spec.monitor_config, status_tracker)
+
+    try:
+        while True:
+            monitor.run_due_tests()
+            writer.flush()
+            # Lets the aggregator tell a quiet worker from a hung one.
+            if time.monotonic() - writer.last_sent >= heartbeat_interval:
+                writer.send_heartbeat()
+
+            # Waiting on the pipe doubles as the sleep between ticks.
+            if connection.poll(tick_interval) and connection.recv()[0] == STOP_MESSAGE:
+                return
+    except (EOFError, BrokenPipeError):
+        # The aggregator has gone, so there is nobody left to send results to.
+        return
+
+
+class _Worker:
+    def __init__(self, shard: int, specs: List[TargetSpec]) -> None:
+        self.shard = shard
+        self.specs = specs
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.connection: Optional[Connection] = None
+        self.last_message = 0.0
+        self.restarts = 0
+
+
+class ShardedMonitor:
+    """
+        Splits targets between worker processes, each running a MultiTargetMonitor with the testers and
+        StatusTrackers for its shard, so testing and status tracking use every core rather than sharing one GIL.
+        Workers send their entries back over a pipe in batches, and a single aggregator thread writes them all to
+        writer.
+
+        A worker which exits, or sends nothing for heartbeat_timeout seconds, is restarted up to max_restarts times.
+        The aggregator remembers each target's last status, so a restarted worker carries on from where it was.
+        Workers are started with spawn, not fork, as the parent has threads running which fork would copy mid-state.
+    """
+    def __init__(self,
+                 writer: EntryWriter,
+                 targets: List[TargetSpec],
+                 workers: Optional[int] = None,
+                 tick_interval: float = 1,
+                 batch_size: int = 500,
+                 tester_factory: Callable[[TargetSpec], ConnectionTester] = create_tester,
+                 heartbeat_timeout: float = 30,
+                 max_restarts: int = 5):
+        if len(set(spec.name for spec in targets)) != len(targets):
+            raise ValueError("Target names must be unique.")
+        for spec in targets:
+            Monitor._validate_config(spec.monitor_config)
+
+        self._writer = writer
+        self._tick_interval = tick_interval
+        self._batch_size = batch_size
+        self._tester_factory = tester_factory
+        self._heartbeat_timeout = heartbeat_timeout
+        self._max_restarts = max_restarts
+        self._context = multiprocessing.get_context("spawn")
+
+        shards = workers or os.cpu_count() or 1
+        specs_by_shard: List[List[TargetSpec]] = [[] for _ in range(shards)]
+        for spec in targets:
+            specs_by_shard[get_shard(spec.name, shards)].append(spec)
+        self._workers = [_Worker(shard, specs) for shard, specs in enumerate(specs_by_shard) if specs]
+
+        self._lock = threading.Lock()
+        self._states: Dict[str, TargetState] = {}
+        self._stopping = threading.Event()
+        self._aggregator: Optional[threading.Thread] = None
+        self._entries_written = 0
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    @property
+    def restarts(self) -> int:
+        return sum(worker.restarts for worker in self._workers)
+
+    @property
+    def entries_written(self) -> int:
+        return self._entries_written
+
+    def get_shard_targets(self) -> List[List[str]]:
+        return [[spec.name for spec in worker.specs] for worker in self._workers]
+
+    def get_state(self, name: str) -> Optional[TargetState]:
+        with self._lock:
+            return self._states.get(name)
+
+    def start(self):
+        logger.info("Starting %s worker processes.", len(self._workers))
+        for worker in self._workers:
+            self._start_worker(worker)
+
+        self._aggregator = threading.Thread(target=self._aggregate, name="ShardedMonitorAggregator", daemon=True)
+        self._aggregator.start()
+
+    def stop(self, timeout: float = 10):
+        logger.info("Stopping worker processes.")
+        self._stopping.set()
+        for worker in self._workers:
+            try:
+                if worker.connection is not None:
+                    worker.connection.send((STOP_MESSAGE, None))
+            except OSError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(max(deadline - time.monotonic(), 0))
+                if worker.process.is_alive():
+                    logger.warning("Worker %s did not stop, terminating it.", worker.shard)
+                    worker.process.terminate()
+                    worker.process.join()
+
+        if self._aggregator is not None:
+            self._aggregator.join()
+        self._writer.flush()
+
+    def _start_worker(self, worker: _Worker):
+        parent_connection, child_connection = self._context.Pipe()
+        with self._lock:
+            states = {spec.name: self._states[spec.name] for spec in worker.specs if spec.name in self._states}
+
+        worker.process = self._context.Process(target=_run_worker,
+                                               args=(worker.specs, states, child_connection, self._tester_factory,
+                                                     self._tick_interval, self._batch_size,
+                                                     self._heartbeat_timeout / 3),
+                                               name="ShardedMonitorWorker-{shard}".format(shard=worker.shard),
+                                               daemon=True)
+        worker.process.start()
+        # The child has its own copy now, closing ours means a crash shows up as the pipe closing.
+        child_connection.close()
+        worker.connection = parent_connection
+        worker.last_message = time.monotonic()
+
+    def _aggregate(self):
+        while True:
+            stopping = self._stopping.is_set()
+            connections = {worker.connection: worker for worker in self._workers if worker.connection is not None}
+            if not connections:
+                return
+
+            for connection in wait(list(connections), timeout=self._tick_interval):
+                worker = connections[connection]
+                try:
+                    message_type, payload = connection.recv()
+                except (EOFError, OSError):
+                    self._handle_exit(worker)
+                    continue
+
+                worker.last_message = time.monotonic()
+                if message_type == ENTRIES_MESSAGE:
+                    self._write_entries(decode_entries(payload))
+
+            if not stopping:
+                self._check_heartbeats()
+
+    def _write_entries(self, entries: List[ConnectionEntry]):
+        with self._lock:
+            for entry in entries:
+                if entry.target is None:
+                    continue
+                previous = self._states.get(entry.target)
+                number_failures = 0 if entry.result else (previous.number_failures if previous else 0) + 1
+                self._states[entry.target] = TargetState(entry.status, number_failures)
+
+        self._writer.write_new_entries(entries)
+        self._entries_written += len(entries)
+
+    def _check_heartbeats(self):
+        now = time.monotonic()
+        for worker in self._workers:
+            if worker.connection is not None and now - worker.last_message > self._heartbeat_timeout:
+                logger.error("Worker %s has sent nothing for %.1f seconds, terminating it.",
+                             worker.shard, now - worker.last_message)
+                if worker.process is not None:
+                    worker.process.terminate()
+                    worker.process.join()
+                self._handle_exit(worker)
+
+    def _handle_exit(self, worker: _Worker):
+        if worker.connection is not None:
+            worker.connection.close()
+        worker.connection = None
+        if worker.process is not None:
+            worker.process.join()
+        if self._stopping.is_set():
+            return
+
+        exit_code = worker.process.exitcode if worker.process is not None else None
+        if worker.restarts >= self._max_restarts:
+            logger.error("Worker %s exited with code %s and has been restarted %s times already, giving up on it.",
+                         worker.shard, exit_code, worker.restarts)
+            return
+
+        worker.restarts += 1
+        logger.error("Worker %s exited with code %s, restarting it.", worker.shard, exit_code)
+        self._start_worker(worker)
@@ -0,0 +1,350 @@
+"""
+    Runs Monitor, StatusTracker and the notifier in virtual time, against a recorded history or a script of outages,
+    so intervals and retry attempts can be tuned offline. For example:
+
+        python -m src.simulation --history data/test_data.jsonl --retry-interval 30 --retry-attempts 3
+        python -m src.simulation --outages outages.json --start "2018-08-03 00:00:00" --end "2018-08-10 00:00:00"
+"""
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import logging
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from apscheduler.schedulers.base import BaseScheduler
+
+from src.analytics import HistorySummary, load_history, summarise
+from src.clock import VirtualClock
+from src.connection_entry import ConnectionEntry, parse_time
+from src.connection_tester import ConnectionTester, ProbeLatency, ProbeOutcome, ProbeResult
+from src.monitor import Monitor
+from src.notifiers.entry_writer_notifier import EntryWriter, EntryWriterNotifier
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryReader, JsonLinesEntryWriter
+from src.status_tracker import StatusChange, StatusTracker
+
+logger = logging.getLogger(__name__)
+
+OUTAGE_KEYS = ("start", "end")
+SIMULATED_LATENCY = ProbeLatency(0.01, 0.02, 0.03)
+
+
+class VirtualJob:
+    def __init__(self, job_id: str, function: Callable, args: tuple, kwargs: dict, interval: Optional[float]):
+        self.id = job_id
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.next_run_time: Optional[datetime] = None
+        self.sequence = 0
+
+
+class VirtualScheduler(BaseScheduler):
+    """
+        Stands in for the APScheduler scheduler Monitor is given, supporting the date and interval jobs it adds.
+        Rather than waiting, run_until moves the clock straight to each job in turn and runs it.
+    """
+    def __init__(self, clock: VirtualClock) -> None:
+        self._clock = clock
+        self._jobs: Dict[str, VirtualJob] = {}
+        self._queue: List[Tuple[datetime, int, str]] = []
+        self._sequence = itertools.count()
+
+    def add_job(self, func, trigger=None, args=None, kwargs=None, id=None, next_run_time=None, **trigger_args):
+        if trigger == "date":
+            interval = None
+            first_run_time = trigger_args.get("run_date") or self._clock.now()
+        elif trigger == "interval":
+            interval = trigger_args.get("seconds", 0)
+            first_run_time = next_run_time or self._clock.now() + timedelta(seconds=interval)
+        else:
+            logger.error("Virtual scheduler received unsupported trigger: %s.", trigger)
+            raise ValueError("Trigger '{trigger}' is not one of; date, interval.".format(trigger=trigger))
+
+        job = VirtualJob(id or "job-{number}".format(number=next(self._sequence)), func, tuple(args or ()),
+                         dict(kwargs or {}), interval)
+        self._jobs[job.id] = job
+        self._schedule(job, first_run_time)
+        return job
+
+    def modify_job(self, job_id, jobstore=None, **changes):
+        job = self._jobs[job_id]
+        if "next_run_time" in changes:
+            self._schedule(job, changes["next_run_time"])
+        return job
+
+    def remove_job(self, job_id, jobstore=None):
+        del self._jobs[job_id]
+
+    def wakeup(self):
+        pass
+
+    def shutdown(self, wait=True):
+        pass
+
+    def run_until(self, end: datetime) -> int:
+        # Runs every job due before end in time order, returning how many ran.
+        runs = 0
+        while self._queue and self._queue[0][0] < end:
+            run_time, sequence, job_id = heapq.heappop(self._queue)
+            job = self._jobs.get(job_id)
+            if job is None or job.sequence != sequence:
+                # The job was removed or moved since this was queued.
+                continue
+
+            self._clock.advance_to(run_time)
+            # The next run is planned before this one starts, as APScheduler does, so the job can move itself.
+            if job.interval is None:
+                del self._jobs[job.id]
+            else:
+                self._schedule(job, run_time + timedelta(seconds=job.interval))
+
+            job.function(*job.args, **job.kwargs)
+            runs += 1
+
+        self._clock.advance_to(end)
+        return runs
+
+    def _schedule(self, job: VirtualJob, run_time: datetime):
+        job.next_run_time = run_time
+        job.sequence = next(self._sequence)
+        heapq.heappush(self._queue, (run_time, job.sequence, job.id))
+
+
+def _failed_latency(outcome: ProbeOutcome, latency: ProbeLatency) -> ProbeLatency:
+    if outcome == ProbeOutcome.DNS_FAILURE:
+        return ProbeLatency(total_time=latency.total_time)
+    return ProbeLatency(latency.dns_time, total_time=latency.total_time)
+
+
+class Outage(NamedTuple):
+    start: datetime
+    end: datetime
+    outcome: ProbeOutcome = ProbeOutcome.CONNECTION_FAILURE
+
+
+def load_outages(outage_file: str) -> List[Outage]:
+    """
+        Reads a JSON list of outages, each with a start and end time and optionally the outcome tests should have
+        during it, for example {"start": "2018-08-03 12:00:00", "end": "2018-08-03 12:30:00", "outcome": "DNS_FAILURE"}.
+    """
+    with open(outage_file, "r") as outage_data:
+        json_outages = json.load(outage_data)
+
+    outages = []
+    for json_outage in json_outages:
+        if not all(key in json_outage for key in OUTAGE_KEYS):
+            logger.error("Failed to create Outage from dictionary: %s.", json_outage)
+            raise ValueError("Dictionary '{dict}' did not contain one of; {keys}."
+                             .format(dict=json_outage, keys=OUTAGE_KEYS))
+        outcome = json_outage.get("outcome", ProbeOutcome.CONNECTION_FAILURE.name)
+        if outcome not in ProbeOutcome.__members__ or outcome == ProbeOutcome.SUCCESS.name:
+            logger.error("Failed to create Outage from dictionary: %s.", json_outage)
+            raise ValueError("Outcome '{outcome}' is not one of; {outcomes}."
+                             .format(outcome=outcome, outcomes=", ".join(failure.name for failure in ProbeOutcome
+                                                                         if failure != ProbeOutcome.SUCCESS)))
+
+        outages.append(Outage(parse_time(json_outage["start"]), parse_time(json_outage["end"]),
+                              ProbeOutcome[outcome]))
+
+    return outages
+
+
+class ScriptedConnectionTester(ConnectionTester):
+    """
+        Fails with each outage's outcome from its start (inclusive) to its end (exclusive) and passes otherwise.
+    """
+    def __init__(self,
+                 clock: VirtualClock,
+                 outages: Iterable[Outage],
+                 latency: ProbeLatency = SIMULATED_LATENCY,
+                 remote_to_check: str = "simulated") -> None:
+        super().__init__(remote_to_check)
+        self._clock = clock
+        self._outages = sorted(outages, key=lambda outage: outage.start)
+        self._starts = [outage.start for outage in self._outages]
+        self._latency = latency
+
+        for previous, outage in zip(self._outages, self._outages[1:]):
+            if outage.start < previous.end:
+                logger.error("Outages overlap: %s and %s.", previous, outage)
+                raise ValueError("Outage starting {start} overlaps the one before it.".format(start=outage.start))
+
+    def run_detailed_test(self) -> ProbeResult:
+        now = self._clock.now()
+        index = bisect.bisect_right(self._starts, now) - 1
+        if index >= 0 and now < self._outages[index].end:
+            outcome = self._outages[index].outcome
+            return ProbeResult(outcome, _failed_latency(outcome, self._latency))
+
+        return ProbeResult(ProbeOutcome.SUCCESS, self._latency)
+
+
+class ReplayConnectionTester(ConnectionTester):
+    """
+        Replays recorded entries, each test getting the result of the latest entry recorded at or before the
+        virtual time. Before the first entry, the first entry's result is used. Only the given target's entries are
+        replayed, which must be given if the entries are for more than one target.
+    """
+    def __init__(self, clock: VirtualClock, entries: Iterable[ConnectionEntry], target: Optional[str] = None) -> None:
+        super().__init__(target or "replayed")
+        self._clock = clock
+        self._entries = [entry for entry in entries if target is None or entry.target == target]
+        self._times = [entry.time for entry in self._entries]
+
+        targets = set(entry.target for entry in self._entries)
+        if len(targets) > 1:
+            logger.error("Entries for several targets given to replay without a target: %s.", targets)
+            raise ValueError("Entries are for more than one target, {targets}, choose one to replay."
+                             .format(targets=", ".join(sorted(str(name) for name in targets))))
+
+        if not self._entries:
+            logger.error("No entries to replay for target %s.", target)
+            raise ValueError("There are no entries to replay for target '{target}'.".format(target=target))
+
+    def run_detailed_test(self) -> ProbeResult:
+        entry = self._entries[max(bisect.bisect_right(self._times, self._clock.now()) - 1, 0)]
+        latency = entry.latency or ProbeLatency()
+        if entry.result:
+            return ProbeResult(ProbeOutcome.SUCCESS, latency)
+
+        # Failures which never resolved the host name were DNS failures.
+        outcome = ProbeOutcome.DNS_FAILURE if entry.latency is not None and latency.dns_time is None \
+            else ProbeOutcome.CONNECTION_FAILURE
+        return ProbeResult(outcome, latency)
+
+
+class _RecordingEntryWriter(EntryWriter):
+    def __init__(self, writer: Optional[EntryWriter]) -> None:
+        self._writer = writer
+        self.entries: List[ConnectionEntry] = []
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.write_new_entries([entry])
+
+    def write_new_entries(self, entries: List[ConnectionEntry]):
+        self.entries.extend(entries)
+        if self._writer is not None:
+            self._writer.write_new_entries(entries)
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+
+class SimulationResult(NamedTuple):
+    runs: int
+    entries: List[ConnectionEntry]
+
+    @property
+    def status_changes(self) -> Dict[StatusChange, int]:
+        counts: Dict[StatusChange, int] = {status_change: 0 for status_change in StatusChange
+                                           if status_change != StatusChange.NONE}
+        for entry in self.entries:
+            if entry.status_change != StatusChange.NONE:
+                counts[entry.status_change] += 1
+        return counts
+
+    def summarise(self) -> Optional[HistorySummary]:
+        return summarise(load_history(self.entries)) if self.entries else None
+
+
+def simulate(clock: VirtualClock,
+             tester: ConnectionTester,
+             monitor_config: dict,
+             end: datetime,
+             number_retry_attempts: Optional[int] = None,
+             writer: Optional[EntryWriter] = None,
+             seed: Optional[int] = None) -> SimulationResult:
+    """
+        Runs a Monitor from the clock's current time until end, writing entries to writer as the live service would.
+        Jitter is random, so pass a seed for the same entries on every run.
+    """
+    scheduler = VirtualScheduler(clock)
+    recording_writer = _RecordingEntryWriter(writer)
+    monitor = Monitor(scheduler,
+                      tester,
+                      StatusTracker(number_retry_attempts, clock),
+                      EntryWriterNotifier(recording_writer),
+                      monitor_config,
+                      clock=clock,
+                      random_generator=random.Random(seed))
+
+    logger.info("Simulating from %s to %s.", clock.now(), end)
+    monitor.run_test()
+    runs = 1 + scheduler.run_until(end)
+    recording_writer.flush()
+
+    return SimulationResult(runs, recording_writer.entries)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate the monitor in virtual time.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--history", help="JSON lines file of recorded entries to replay.")
+    source.add_argument("--outages", help="JSON file of outages to simulate.")
+    parser.add_argument("--target", help="Only replay the entries for this target.")
+    parser.add_argument("--start", type=parse_time, help="Time to start, defaults to the first recorded entry.")
+    parser.add_argument("--end", type=parse_time, help="Time to stop, defaults to the last recorded entry.")
+    parser.add_argument("--test-interval", type=float, default=300, help="Seconds between tests while OK.")
+    parser.add_argument("--retry-interval", type=float, default=10, help="Seconds between tests while WARNING.")
+    parser.add_argument("--error-interval", type=float, default=60, help="Seconds between tests while ERROR.")
+    parser.add_argument("--retry-attempts", type=int, default=5, help="Failures allowed before an error.")
+    parser.add_argument("--scheduling-mode", choices=("date", "persistent"), default="date")
+    parser.add_argument("--jitter", type=float, default=0, help="Most seconds of random delay to add to each test.")
+    parser.add_argument("--seed", type=int, help="Seed for the jitter.")
+    parser.add_argument("--output", help="JSON lines file to write the simulated entries to.")
+    arguments = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    try:
+        if arguments.history:
+            reader = JsonLinesEntryReader(arguments.history)
+            # Only the target's own entries decide the default start and end.
+            entries = list(reader.query(targets=[arguments.target]) if arguments.target else reader.read_entries())
+            if not entries:
+                raise ValueError("History file '{file}' has no entries to replay.".format(file=arguments.history))
+            start = arguments.start or entries[0].time
+            end = arguments.end or entries[-1].time
+            clock = VirtualClock(start)
+            tester: ConnectionTester = ReplayConnectionTester(clock, entries, arguments.target)
+        else:
+            if arguments.start is None or arguments.end is None:
+                parser.error("--start and --end are required with --outages.")
+            start, end = arguments.start, arguments.end
+            clock = VirtualClock(start)
+            tester = ScriptedConnectionTester(clock, load_outages(arguments.outages))
+
+        monitor_config = {
+            "test_interval": arguments.test_interval,
+            "retry_interval": arguments.retry_interval,
+            "error_interval": arguments.error_interval,
+            "scheduling_mode": arguments.scheduling_mode,
+            "jitter": arguments.jitter
+        }
+        writer = JsonLinesEntryWriter(arguments.output) if arguments.output else None
+        result = simulate(clock, tester, monitor_config, end, arguments.retry_attempts, writer, arguments.seed)
+    except ValueError:
+        logger.exception("Simulation failed.")
+        return 1
+
+    summary = result.summarise()
+    json.dump({
+        "start": str(start),
+        "end": str(end),
+        "runs": result.runs,
+        "status_changes": {status_change.name: count for status_change, count in result.status_changes.items()},
+        "summary": summary._asdict() if summary is not None else None
+    }, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 import logging
 from enum import Enum
 from datetime import datetime
+from typing import Optional
+
+from src.clock import Clock
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +28,9 @@ class StatusChange(Enum):
 
 
 class StatusTracker:
-    def __init__(self, number_retry_attempts=None) -> None:
+    def __init__(self, number_retry_attempts=None, clock: Optional[Clock] = None) -> None:
+        self._clock = clock or Clock()
+
         # Don't know the initial status
         self._status = Status.UNKNOWN
         self._last_successful_run = datetime.min
@@ -42,6 +47,15 @@ class StatusTracker:
     def last_success(self) -> datetime:
         return self._last_successful_run
 
+    @property
+    def number_failures(self) -> int:
+        return self._number_failures
+
+    def restore(self, status: Status, number_failures: int):
+        # Carries on from a status tracked elsewhere, such as by a worker process which has since been restarted.
+        self._status = status
+        self._number_failures = number_failures
+
     def submit_result(self, test_passed: bool) -> StatusChange:
         if not test_passed:
             self._number_failures += 1
@@ -68,7 +82,7 @@ class StatusTracker:
             logger.debug("Branch: no status change.")
             # Make sure to update the last_successful_run if the status is OK and it hasn't changed.
             if self._status == Status.OK:
-                self._last_successful_run = datetime.now()
+                self._last_successful_run = self._clock.now()
 
             status_change = StatusChange.NONE
 
@@ -76,7 +90,7 @@ class StatusTracker:
         elif ((self._status != Status.OK) and
               (status == Status.OK)):
             logger.debug("Branch: status set to OK.")
-            resolved_time = datetime.now()
+            resolved_time = self._clock.now()
 
             if self._status == Status.ERROR:
                 status_change = StatusChange.ERROR_RESOLVED
@@ -0,0 +1,84 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from src.connection_entry import format_time, parse_time
+
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_KEYS = ("time", "target", "result", "bytes_received", "duration")
+
+
+class ThroughputEntry:
+    """
+        The result of one throughput test, stored alongside the ConnectionEntry records in a file of its own.
+        duration is the seconds from sending the request to receiving the last byte, or None if nothing arrived.
+    """
+    __slots__ = ("_time", "_target", "_result", "_bytes_received", "_duration")
+
+    def __init__(self, time: datetime, target: str, result: bool, bytes_received: int, duration: Optional[float]):
+        self._time = time
+        self._target = target
+        self._result = result
+        self._bytes_received = bytes_received
+        self._duration = duration
+
+    @property
+    def time(self) -> datetime:
+        return self._time
+
+    @property
+    def target(self) -> str:
+        return self._target
+
+    @property
+    def result(self) -> bool:
+        return self._result
+
+    @property
+    def bytes_received(self) -> int:
+        return self._bytes_received
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self._duration
+
+    @property
+    def bandwidth(self) -> Optional[float]:
+        # Bytes per second.
+        if not self._duration:
+            return None
+        return self._bytes_received / self._duration
+
+    @classmethod
+    def from_json(cls, json_entry: dict):
+        if set(json_entry) != set(THROUGHPUT_KEYS):
+            logger.error("Failed to create ThroughputEntry from dictionary: %s.", json_entry)
+            raise ValueError("Dictionary '{dict}' does not contain exactly; {keys}."
+                             .format(dict=json_entry, keys=", ".join(THROUGHPUT_KEYS)))
+
+        return cls(parse_time(json_entry["time"]),
+                   json_entry["target"],
+                   bool(json_entry["result"]),
+                   int(json_entry["bytes_received"]),
+                   json_entry["duration"])
+
+    def to_json(self):
+        return {
+            "time": format_time(self._time),
+            "target": self._target,
+            "result": self._result,
+            "bytes_received": self._bytes_received,
+            "duration": self._duration
+        }
+
+    def __eq__(self, other):
+        return ((isinstance(other, ThroughputEntry)) and
+                (self._time == other._time) and
+                (self._target == other._target) and
+                (self._result == other._result) and
+                (self._bytes_received == other._bytes_received) and
+                (self._duration == other._duration))
+
+    def __str__(self):
+        return str(self.to_json())
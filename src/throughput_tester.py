@@ -0,0 +1,162 @@
+import logging
+import socket
+import ssl
+import time
+from typing import NamedTuple, Optional, Tuple
+
+from src.connection_tester import ProbeOutcome, resolve
+from src.dns_cache import DnsCache
+from src.http_connection_tester import parse_http_url
+
+logger = logging.getLogger(__name__)
+
+# Redirects aren't followed, so their bodies say nothing about the bandwidth to the file.
+SUCCESS_STATUSES = range(200, 300)
+# Longest status line read before giving up on the response as not HTTP.
+MAX_STATUS_LINE = 1024
+
+
+def parse_status_line(head: bytearray) -> Optional[int]:
+    # The status code from the start of a response, or None if the whole status line hasn't arrived yet.
+    line_end = head.find(b"\r\n")
+    if line_end == -1:
+        if len(head) >= MAX_STATUS_LINE:
+            raise ValueError("Response does not start with an HTTP status line.")
+        return None
+
+    parts = head[:line_end].split(b" ", 2)
+    if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or len(parts[1]) != 3 or not parts[1].isdigit():
+        raise ValueError("Invalid HTTP status line: {line!r}.".format(line=bytes(head[:line_end])))
+    return int(parts[1])
+
+
+class ThroughputResult(NamedTuple):
+    """
+        duration is the seconds from sending the request to the last byte read, None if nothing was received or
+        the response wasn't a success.
+    """
+    outcome: ProbeOutcome
+    bytes_received: int = 0
+    duration: Optional[float] = None
+    status_code: Optional[int] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.outcome == ProbeOutcome.SUCCESS
+
+    @property
+    def bandwidth(self) -> Optional[float]:
+        # Bytes per second.
+        if not self.duration:
+            return None
+        return self.bytes_received / self.duration
+
+
+class ThroughputTester:
+    """
+        Downloads up to max_bytes from a URL and reports the bandwidth achieved, counting the response headers as
+        well as the body. Everything is read into one buffer allocated up front, overwriting it each time, since only
+        the number of bytes matters. The test gives up after timeout seconds in total, passing with however much
+        arrived by then, so a connection which is up but crawling shows as low bandwidth rather than a failure.
+        A response without a 2xx status fails the test instead of being measured.
+    """
+    def __init__(self,
+                 url: str,
+                 max_bytes: int = 1000000,
+                 buffer_size: int = 65536,
+                 timeout: float = 30,
+                 dns_cache: Optional[DnsCache] = None,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        http_url = parse_http_url(url)
+        if max_bytes < 1 or buffer_size < 1:
+            logger.error("Failed to create ThroughputTester, max_bytes %s and buffer_size %s must be positive.",
+                         max_bytes, buffer_size)
+            raise ValueError("Max bytes and buffer size must be at least 1, received {max_bytes} and {buffer_size}."
+                             .format(max_bytes=max_bytes, buffer_size=buffer_size))
+
+        self.url = url
+        self.remote_to_check = http_url.host
+        self.port = http_url.port
+        self.dns_cache = dns_cache
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._ssl_context = (ssl_context or ssl.create_default_context()) if http_url.scheme == "https" else None
+        self._request = ("GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n"
+                         .format(path=http_url.path, host=http_url.netloc).encode("ascii"))
+        self._buffer = memoryview(bytearray(buffer_size))
+
+    def run_test(self) -> bool:
+        return self.run_throughput_test().passed
+
+    def run_throughput_test(self) -> ThroughputResult:
+        deadline = time.monotonic() + self.timeout
+        try:
+            address = resolve(self.remote_to_check, self.dns_cache)
+        except socket.error:
+            logger.exception("DNS")
+            return ThroughputResult(ProbeOutcome.DNS_FAILURE)
+
+        try:
+            sock = socket.create_connection((address, self.port), max(deadline - time.monotonic(), 0.001))
+        except OSError:
+            logger.exception("Test")
+            return ThroughputResult(ProbeOutcome.CONNECTION_FAILURE)
+
+        try:
+            if self._ssl_context is not None:
+                sock = self._ssl_context.wrap_socket(sock, server_hostname=self.remote_to_check)
+            start_time = time.perf_counter()
+            sock.sendall(self._request)
+            bytes_received, status_code = self._receive(sock, deadline)
+            duration = time.perf_counter() - start_time
+        except OSError:
+            logger.exception("Throughput")
+            return ThroughputResult(ProbeOutcome.CONNECTION_FAILURE)
+        except ValueError:
+            logger.exception("Throughput")
+            return ThroughputResult(ProbeOutcome.HTTP_FAILURE)
+        finally:
+            sock.close()
+
+        if bytes_received == 0:
+            logger.warning("No data received from %s.", self.url)
+            return ThroughputResult(ProbeOutcome.CONNECTION_FAILURE)
+        if status_code is None:
+            logger.warning("Response from %s ended before its status line.", self.url)
+            return ThroughputResult(ProbeOutcome.HTTP_FAILURE)
+        if status_code not in SUCCESS_STATUSES:
+            logger.warning("GET %s returned status %s, not measuring its throughput.", self.url, status_code)
+            return ThroughputResult(ProbeOutcome.HTTP_FAILURE, status_code=status_code)
+        return ThroughputResult(ProbeOutcome.SUCCESS, bytes_received, duration, status_code)
+
+    def _receive(self, sock: socket.socket, deadline: float) -> Tuple[int, Optional[int]]:
+        # Returns the bytes received and the response's status code, stopping early if it isn't a success.
+        buffer = self._buffer
+        buffer_size = len(buffer)
+        bytes_received = 0
+        # The start of the response, kept until the status line has been read from it.
+        head = bytearray()
+        status_code = None
+        while bytes_received < self.max_bytes:
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                logger.warning("Throughput test of %s timed out after %s bytes.", self.url, bytes_received)
+                break
+            sock.settimeout(remaining_time)
+
+            try:
+                count = sock.recv_into(buffer, min(buffer_size, self.max_bytes - bytes_received))
+            except socket.timeout:
+                logger.warning("Throughput test of %s timed out after %s bytes.", self.url, bytes_received)
+                break
+            if count == 0:
+                break
+            bytes_received += count
+
+            if status_code is None:
+                head += buffer[:min(count, MAX_STATUS_LINE - len(head))]
+                status_code = parse_status_line(head)
+                if status_code is not None and status_code not in SUCCESS_STATUSES:
+                    break
+
+        return bytes_received, status_code
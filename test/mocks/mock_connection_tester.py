@@ -8,3 +8,4 @@ class MockConnectionTester(ConnectionTester):
 
         # Mock out functions
         self.run_test = MagicMock()
+        self.run_detailed_test = MagicMock()
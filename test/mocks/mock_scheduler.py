@@ -0,0 +1,19 @@
+from apscheduler.schedulers.blocking import BaseScheduler
+from unittest.mock import MagicMock
+
+
+class MockScheduler(BaseScheduler):
+    def __init__(self, *args, **kwargs):
+        super(BaseScheduler, self).__init__(*args, **kwargs)
+
+        # Mock out functions
+        self.shutdown = MagicMock()
+        self.wakeup = MagicMock()
+        self.add_job = MagicMock()
+        self.modify_job = MagicMock()
+
+    def wakeup(self):
+        pass
+
+    def shutdown(self, wait=True):
+        pass
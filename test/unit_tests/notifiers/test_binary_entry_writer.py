@@ -0,0 +1,142 @@
+import unittest
+import os
+from datetime import datetime
+
+from src.notifiers.binary_entry_writer import BinaryEntryWriter, BinaryEntryReader, HEADER, RECORD
+from src.status_tracker import Status, StatusChange
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+
+connection_entries = [
+    ConnectionEntry(datetime(2018, 8, 3, 20, 35, 43), True, Status.UNKNOWN, StatusChange.WARNING_RESOLVED),
+    ConnectionEntry(datetime(2018, 8, 3, 22, 35, 43, 250000), False, Status.ERROR, StatusChange.NEW_ERROR),
+    ConnectionEntry(datetime(2018, 8, 4, 1, 2, 3, 4), False, Status.WARNING, StatusChange.INVALID)
+]
+
+
+class TestBinaryEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                      "test_data.bin")
+
+    def tearDown(self):
+        os.remove(self.data_file)
+
+    def test_initiation_writes_header(self):
+        BinaryEntryWriter(self.data_file)
+
+        self.assertEqual(HEADER.size, os.path.getsize(self.data_file))
+
+    def test_initiation_rejects_other_files(self):
+        with open(self.data_file, "w+") as new_file:
+            new_file.write("[]          ")
+
+        with self.assertRaises(ValueError):
+            BinaryEntryWriter(self.data_file)
+
+    def test_write_entries_are_fixed_width(self):
+        writer = BinaryEntryWriter(self.data_file)
+        for entry in connection_entries:
+            writer.write_new_entry(entry)
+
+        self.assertEqual(HEADER.size + 3 * RECORD.size, os.path.getsize(self.data_file))
+
+    def test_write_entries_batch(self):
+        writer = BinaryEntryWriter(self.data_file)
+        writer.write_new_entries(connection_entries)
+        writer.sync()
+
+        with BinaryEntryReader(self.data_file) as reader:
+            self.assertEqual(connection_entries, list(reader.read_entries()))
+
+    def test_write_rejects_entries_it_cant_hold(self):
+        writer = BinaryEntryWriter(self.data_file)
+        entries = [
+            ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, "router"),
+            ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, latency=ProbeLatency(0.01)),
+            ConnectionEntry(datetime(2018, 8, 3), False, Status.OK, StatusChange.NONE, status_code=503),
+            ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, first_byte_time=0.02)
+        ]
+
+        for entry in entries:
+            with self.assertRaises(ValueError):
+                writer.write_new_entry(entry)
+            with self.assertRaises(ValueError):
+                writer.write_new_entries(connection_entries + [entry])
+
+        self.assertEqual(HEADER.size, os.path.getsize(self.data_file))
+
+    def test_initiation_discards_incomplete_entry(self):
+        writer = BinaryEntryWriter(self.data_file)
+        writer.write_new_entry(connection_entries[0])
+        with open(self.data_file, "ab") as test_data:
+            test_data.write(b"\x01\x02\x03")
+
+        BinaryEntryWriter(self.data_file)
+
+        self.assertEqual(HEADER.size + RECORD.size, os.path.getsize(self.data_file))
+
+
+class TestBinaryEntryReader(unittest.TestCase):
+    def setUp(self):
+        self.data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                      "test_data.bin")
+        writer = BinaryEntryWriter(self.data_file)
+        for entry in connection_entries:
+            writer.write_new_entry(entry)
+
+    def tearDown(self):
+        os.remove(self.data_file)
+
+    def test_read_entries(self):
+        with BinaryEntryReader(self.data_file) as reader:
+            self.assertEqual(connection_entries, list(reader.read_entries()))
+
+    def test_random_access(self):
+        with BinaryEntryReader(self.data_file) as reader:
+            self.assertEqual(3, len(reader))
+            self.assertEqual(connection_entries[1], reader[1])
+            self.assertEqual(connection_entries[2], reader[-1])
+            with self.assertRaises(IndexError):
+                reader[3]
+
+    def test_records_view(self):
+        with BinaryEntryReader(self.data_file) as reader:
+            records = reader.records()
+            self.assertEqual(3 * RECORD.size, records.nbytes)
+            records.release()
+
+    def test_as_array(self):
+        reader = BinaryEntryReader(self.data_file)
+        array = reader.as_array()
+
+        self.assertEqual([True, False, False], array["result"].astype(bool).tolist())
+        self.assertEqual([Status.UNKNOWN.value, Status.ERROR.value, Status.WARNING.value], array["status"].tolist())
+        self.assertEqual([StatusChange.WARNING_RESOLVED.value, StatusChange.NEW_ERROR.value,
+                          StatusChange.INVALID.value], array["status_change"].tolist())
+        self.assertEqual(250000, array["time"][1] % 1000000)
+
+        del array
+        reader.close()
+
+    def test_empty_file(self):
+        os.remove(self.data_file)
+        BinaryEntryWriter(self.data_file)
+
+        with BinaryEntryReader(self.data_file) as reader:
+            self.assertEqual(0, len(reader))
+            self.assertEqual([], list(reader.read_entries()))
+            self.assertEqual(0, len(reader.as_array()))
+
+    def test_find_index(self):
+        with BinaryEntryReader(self.data_file) as reader:
+            self.assertEqual(0, reader.find_index(datetime(2018, 8, 1)))
+            self.assertEqual(1, reader.find_index(datetime(2018, 8, 3, 21)))
+            self.assertEqual(1, reader.find_index(datetime(2018, 8, 3, 22, 35, 43, 250000)))
+            self.assertEqual(3, reader.find_index(datetime(2018, 8, 5)))
+
+    def test_query_time_range(self):
+        with BinaryEntryReader(self.data_file) as reader:
+            entries = list(reader.query(start=datetime(2018, 8, 3, 21), end=datetime(2018, 8, 4, 1, 2, 3, 4)))
+
+        self.assertEqual([connection_entries[1]], entries)
@@ -0,0 +1,119 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch, call
+
+from src.notifiers.buffered_entry_writer import BufferedEntryWriter, FsyncPolicy
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.status_tracker import Status, StatusChange
+from src.connection_entry import ConnectionEntry
+
+
+def make_entry(second: int) -> ConnectionEntry:
+    return ConnectionEntry(datetime(2018, 8, 3, 0, 0, second), True, Status.OK, StatusChange.NONE)
+
+
+class TestBufferedEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.patcher = patch("src.notifiers.buffered_entry_writer.time.monotonic", return_value=100.0)
+        self.addCleanup(self.patcher.stop)
+        self.mock_monotonic = self.patcher.start()
+
+        self.entry_writer = EntryWriter()
+        self.entry_writer.write_new_entry = MagicMock()
+        self.entry_writer.write_new_entries = MagicMock()
+        self.entry_writer.sync = MagicMock()
+        self.entry_writer.close = MagicMock()
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            BufferedEntryWriter(self.entry_writer, batch_size=0)
+
+    def test_entries_held_until_batch_full(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=3)
+
+        writer.write_new_entry(make_entry(1))
+        writer.write_new_entry(make_entry(2))
+        self.entry_writer.write_new_entries.assert_not_called()
+        self.assertEqual(2, writer.buffered_entries)
+
+        writer.write_new_entry(make_entry(3))
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1), make_entry(2), make_entry(3)])
+        self.entry_writer.sync.assert_called_once_with()
+        self.assertEqual(0, writer.buffered_entries)
+
+    def test_flush_on_age(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=10, max_age=30)
+
+        writer.write_new_entry(make_entry(1))
+        self.mock_monotonic.return_value = 130.0
+        writer.write_new_entry(make_entry(2))
+
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1), make_entry(2)])
+
+    def test_flush_if_due(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=10, max_age=30)
+        writer.write_new_entry(make_entry(1))
+
+        self.mock_monotonic.return_value = 129.0
+        writer.flush_if_due()
+        self.entry_writer.write_new_entries.assert_not_called()
+
+        self.mock_monotonic.return_value = 130.0
+        writer.flush_if_due()
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1)])
+
+    def test_explicit_flush(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=10)
+        writer.write_new_entry(make_entry(1))
+
+        writer.flush()
+        writer.flush()
+
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1)])
+
+    def test_fsync_never(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=1, fsync_policy=FsyncPolicy.NEVER)
+        writer.write_new_entry(make_entry(1))
+
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1)])
+        self.entry_writer.sync.assert_not_called()
+
+    def test_fsync_per_entry(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=2, fsync_policy=FsyncPolicy.PER_ENTRY)
+        writer.write_new_entries([make_entry(1), make_entry(2)])
+
+        self.entry_writer.write_new_entry.assert_has_calls([call(make_entry(1)), call(make_entry(2))])
+        self.assertEqual(2, self.entry_writer.sync.call_count)
+
+    def test_failed_flush_keeps_entries(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=10)
+        writer.write_new_entries([make_entry(1), make_entry(2)])
+        self.entry_writer.write_new_entries.side_effect = OSError("Disk full")
+
+        with self.assertRaises(OSError):
+            writer.flush()
+        self.assertEqual(2, writer.buffered_entries)
+
+        self.entry_writer.write_new_entries.side_effect = None
+        writer.flush()
+        self.entry_writer.write_new_entries.assert_called_with([make_entry(1), make_entry(2)])
+
+    def test_sync_flushes_first(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=10, fsync_policy=FsyncPolicy.NEVER)
+        writer.write_new_entry(make_entry(1))
+
+        writer.sync()
+
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1)])
+        self.entry_writer.sync.assert_called_once_with()
+
+    def test_close_flushes_first(self):
+        writer = BufferedEntryWriter(self.entry_writer, batch_size=10, fsync_policy=FsyncPolicy.NEVER)
+        writer.write_new_entry(make_entry(1))
+        self.entry_writer.write_new_entries.side_effect = OSError
+
+        with self.assertRaises(OSError):
+            writer.close()
+
+        self.entry_writer.write_new_entries.assert_called_once_with([make_entry(1)])
+        self.entry_writer.close.assert_called_once_with()
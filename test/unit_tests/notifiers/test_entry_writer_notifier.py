@@ -4,9 +4,11 @@ import json
 from datetime import datetime
 from unittest.mock import MagicMock
 
-from src.notifiers.entry_writer_notifier import EntryWriterNotifier, EntryWriter, FileType, prepare_data_file
+from src.notifiers.entry_writer_notifier import EntryWriterNotifier, EntryWriter, EntryReader, FileType, \
+    prepare_data_file
 from src.status_tracker import Status, StatusChange
 from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
 
 
 class TestEntryWriterNotifier(unittest.TestCase):
@@ -24,6 +26,96 @@ class TestEntryWriterNotifier(unittest.TestCase):
                                                                              Status.OK,
                                                                              StatusChange.ERROR_RESOLVED))
 
+    def test_entry_writer_notify_with_target(self):
+        self.entry_writer_notifier.notify(datetime(2018, 8, 3), False, Status.WARNING, StatusChange.NEW_WARNING,
+                                          "example.com")
+
+        self.entry_writer.write_new_entry.assert_called_with(ConnectionEntry(datetime(2018, 8, 3),
+                                                                             False,
+                                                                             Status.WARNING,
+                                                                             StatusChange.NEW_WARNING,
+                                                                             "example.com"))
+
+    def test_entry_writer_notify_with_latency(self):
+        self.entry_writer_notifier.notify(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE,
+                                          latency=ProbeLatency(0.1, 0.2, 0.3))
+
+        self.entry_writer.write_new_entry.assert_called_with(ConnectionEntry(datetime(2018, 8, 3),
+                                                                             True,
+                                                                             Status.OK,
+                                                                             StatusChange.NONE,
+                                                                             latency=ProbeLatency(0.1, 0.2, 0.3)))
+
+    def test_entry_writer_flush(self):
+        self.entry_writer.flush = MagicMock()
+
+        self.entry_writer_notifier.flush()
+
+        self.entry_writer.flush.assert_called_with()
+
+    def test_write_new_entries_defaults_to_single_writes(self):
+        entries = [ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE),
+                   ConnectionEntry(datetime(2018, 8, 4), False, Status.WARNING, StatusChange.NEW_WARNING)]
+
+        self.entry_writer.write_new_entries(entries)
+
+        self.assertEqual(2, self.entry_writer.write_new_entry.call_count)
+        self.entry_writer.write_new_entry.assert_called_with(entries[1])
+
+
+history = [
+    ConnectionEntry(datetime(2018, 8, 3, 0), True, Status.OK, StatusChange.NONE, "first"),
+    ConnectionEntry(datetime(2018, 8, 3, 1), False, Status.WARNING, StatusChange.NEW_WARNING, "second"),
+    ConnectionEntry(datetime(2018, 8, 3, 2), False, Status.ERROR, StatusChange.NEW_ERROR, "first"),
+    ConnectionEntry(datetime(2018, 8, 3, 3), True, Status.OK, StatusChange.ERROR_RESOLVED, "second"),
+    ConnectionEntry(datetime(2018, 8, 3, 4), True, Status.OK, StatusChange.NONE, "first")
+]
+
+
+class TestEntryReaderQuery(unittest.TestCase):
+    def setUp(self):
+        self.entries_read = 0
+
+        def read_entries():
+            for entry in history:
+                self.entries_read += 1
+                yield entry
+
+        self.entry_reader = EntryReader()
+        self.entry_reader.read_entries = read_entries
+
+    def test_query_everything(self):
+        self.assertEqual(history, list(self.entry_reader.query()))
+
+    def test_query_time_range(self):
+        entries = list(self.entry_reader.query(start=datetime(2018, 8, 3, 1), end=datetime(2018, 8, 3, 3)))
+
+        self.assertEqual(history[1:3], entries)
+        # Reading stops at the first entry past the end.
+        self.assertEqual(4, self.entries_read)
+
+    def test_query_is_lazy(self):
+        entries = self.entry_reader.query()
+        self.assertEqual(0, self.entries_read)
+
+        next(entries)
+        self.assertEqual(1, self.entries_read)
+
+    def test_query_statuses(self):
+        entries = list(self.entry_reader.query(statuses={Status.WARNING, Status.ERROR}))
+
+        self.assertEqual(history[1:3], entries)
+
+    def test_query_status_changes(self):
+        entries = list(self.entry_reader.query(status_changes={StatusChange.NEW_ERROR, StatusChange.ERROR_RESOLVED}))
+
+        self.assertEqual(history[2:4], entries)
+
+    def test_query_targets(self):
+        entries = list(self.entry_reader.query(start=datetime(2018, 8, 3, 1), targets={"first"}))
+
+        self.assertEqual([history[2], history[4]], entries)
+
 
 class TestPrepareDataFile(unittest.TestCase):
     def setUp(self):
@@ -58,3 +150,11 @@ class TestPrepareDataFile(unittest.TestCase):
         with open(self.data_file, "r") as json_file:
             json_data = json.load(json_file)
             self.assertEqual([], json_data)
+
+    def test_creates_json_lines_file(self):
+        prepare_data_file(self.data_file, file_type=FileType.JSON_LINES)
+
+        self.assertEquals(1, os.path.exists(self.data_file))
+        with open(self.data_file, "r") as file:
+            contents = file.read()
+            self.assertEqual("", contents)
@@ -0,0 +1,197 @@
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, call, patch
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.notifiers.fan_out_notifier import CircuitBreaker, CircuitOpenError, CircuitState, FanOutNotifier, \
+    RetryingEntryWriter, RetryPolicy, Sink
+from src.status_tracker import Status, StatusChange
+
+entry = ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE)
+
+
+class RecordingEntryWriter(EntryWriter):
+    def __init__(self):
+        self.entries = []
+        self.closed = False
+
+    def write_new_entries(self, entries):
+        self.entries.extend(entries)
+
+    def close(self):
+        self.closed = True
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_invalid_max_attempts(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+    def test_exponential_delays(self):
+        retry_policy = RetryPolicy(initial_delay=0.5, max_delay=3, multiplier=2)
+
+        self.assertEqual([0.5, 1, 2, 3, 3], [retry_policy.get_delay(attempt) for attempt in range(1, 6)])
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.patcher = patch("src.notifiers.fan_out_notifier.time.monotonic", return_value=100.0)
+        self.addCleanup(self.patcher.stop)
+        self.mock_monotonic = self.patcher.start()
+        self.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    def test_opens_after_threshold(self):
+        self.circuit_breaker.record_failure()
+        self.assertEqual(CircuitState.CLOSED, self.circuit_breaker.state)
+
+        self.circuit_breaker.record_failure()
+
+        self.assertEqual(CircuitState.OPEN, self.circuit_breaker.state)
+        self.assertFalse(self.circuit_breaker.allow_request())
+
+    def test_success_resets_failures(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_failure()
+
+        self.assertEqual(CircuitState.CLOSED, self.circuit_breaker.state)
+
+    def test_half_open_after_timeout(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_failure()
+
+        self.mock_monotonic.return_value = 110.0
+
+        self.assertEqual(CircuitState.HALF_OPEN, self.circuit_breaker.state)
+        self.assertTrue(self.circuit_breaker.allow_request())
+
+    def test_half_open_closes_on_success(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_failure()
+        self.mock_monotonic.return_value = 110.0
+        self.assertEqual(CircuitState.HALF_OPEN, self.circuit_breaker.state)
+
+        self.circuit_breaker.record_success()
+
+        self.assertEqual(CircuitState.CLOSED, self.circuit_breaker.state)
+
+    def test_half_open_reopens_on_failure(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_failure()
+        self.mock_monotonic.return_value = 110.0
+        self.assertEqual(CircuitState.HALF_OPEN, self.circuit_breaker.state)
+
+        self.circuit_breaker.record_failure()
+
+        self.assertEqual(CircuitState.OPEN, self.circuit_breaker.state)
+        self.mock_monotonic.return_value = 119.0
+        self.assertEqual(CircuitState.OPEN, self.circuit_breaker.state)
+
+
+class TestRetryingEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.patcher = patch("src.notifiers.fan_out_notifier.time.sleep")
+        self.addCleanup(self.patcher.stop)
+        self.mock_sleep = self.patcher.start()
+
+        self.entry_writer = EntryWriter()
+        self.entry_writer.write_new_entries = MagicMock()
+
+    def test_retries_with_backoff(self):
+        self.entry_writer.write_new_entries.side_effect = [OSError, OSError, None]
+        writer = RetryingEntryWriter(self.entry_writer, RetryPolicy(initial_delay=1, multiplier=3))
+
+        writer.write_new_entry(entry)
+
+        self.assertEqual(3, self.entry_writer.write_new_entries.call_count)
+        self.mock_sleep.assert_has_calls([call(1), call(3)])
+        self.assertEqual(CircuitState.CLOSED, writer.circuit_breaker.state)
+
+    def test_gives_up_after_max_attempts(self):
+        self.entry_writer.write_new_entries.side_effect = OSError
+        writer = RetryingEntryWriter(self.entry_writer, RetryPolicy(max_attempts=3),
+                                     CircuitBreaker(failure_threshold=10))
+
+        with self.assertRaises(OSError):
+            writer.write_new_entries([entry])
+
+        self.assertEqual(3, self.entry_writer.write_new_entries.call_count)
+        self.assertEqual(2, self.mock_sleep.call_count)
+
+    def test_open_circuit_fails_fast(self):
+        self.entry_writer.write_new_entries.side_effect = OSError
+        writer = RetryingEntryWriter(self.entry_writer, RetryPolicy(max_attempts=5),
+                                     CircuitBreaker(failure_threshold=2))
+
+        with self.assertRaises(CircuitOpenError):
+            writer.write_new_entries([entry])
+        with self.assertRaises(CircuitOpenError):
+            writer.write_new_entries([entry])
+
+        self.assertEqual(2, self.entry_writer.write_new_entries.call_count)
+
+
+class TestFanOutNotifier(unittest.TestCase):
+    def test_duplicate_sink_names(self):
+        with self.assertRaises(ValueError):
+            FanOutNotifier([Sink("file", EntryWriter()), Sink("file", EntryWriter())])
+
+    def test_entries_sent_to_every_sink(self):
+        first_writer = RecordingEntryWriter()
+        second_writer = RecordingEntryWriter()
+        notifier = FanOutNotifier([Sink("first", first_writer), Sink("second", second_writer, batch_size=1)])
+
+        notifier.notify(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, "example.com")
+        notifier.notify(datetime(2018, 8, 3, 0, 1), False, Status.WARNING, StatusChange.NEW_WARNING, "example.com")
+        notifier.close(5)
+
+        self.assertEqual(2, len(first_writer.entries))
+        self.assertEqual(first_writer.entries, second_writer.entries)
+        self.assertEqual(["first", "second"], list(notifier.sinks))
+        self.assertTrue(first_writer.closed)
+        self.assertTrue(second_writer.closed)
+
+    def test_dead_sink_does_not_hold_up_others(self):
+        release = threading.Event()
+
+        class HangingEntryWriter(EntryWriter):
+            def write_new_entries(self, entries):
+                release.wait(5)
+                raise OSError
+
+        file_writer = RecordingEntryWriter()
+        notifier = FanOutNotifier([Sink("file", file_writer),
+                                   Sink("webhook", HangingEntryWriter(), max_size=1,
+                                        retry_policy=RetryPolicy(max_attempts=1))])
+
+        for second in range(5):
+            notifier.notify(datetime(2018, 8, 3, 0, 0, second), True, Status.OK, StatusChange.NONE)
+        notifier.sinks["file"].flush()
+
+        self.assertEqual(5, len(file_writer.entries))
+        self.assertGreater(notifier.sinks["webhook"].dropped, 0)
+
+        release.set()
+        notifier.close(5)
+        self.assertEqual(0, notifier.sinks["webhook"].written)
+
+    def test_writer_left_open_while_still_writing(self):
+        release = threading.Event()
+
+        class HangingEntryWriter(RecordingEntryWriter):
+            def write_new_entries(self, entries):
+                release.wait(5)
+                super().write_new_entries(entries)
+
+        file_writer = RecordingEntryWriter()
+        hanging_writer = HangingEntryWriter()
+        notifier = FanOutNotifier([Sink("file", file_writer), Sink("webhook", hanging_writer)])
+
+        notifier.notify(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE)
+        notifier.close(0.1)
+
+        self.assertTrue(file_writer.closed)
+        self.assertFalse(hanging_writer.closed)
+        release.set()
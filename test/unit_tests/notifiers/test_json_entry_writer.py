@@ -4,7 +4,7 @@ import json
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
-from src.notifiers.json_entry_writer import JsonEntryWriter, FileType
+from src.notifiers.json_entry_writer import JsonEntryWriter, JsonEntryReader, FileType
 from src.status_tracker import Status, StatusChange
 from src.connection_entry import ConnectionEntry
 
@@ -94,6 +94,16 @@ class TestJsonEntryWriterWithFile(unittest.TestCase):
             data = json.load(blame_data)
             self.assertListEqual(final_data, data)
 
+    def test_read_entries(self):
+        entries = list(JsonEntryReader(self.data_file).read_entries())
+
+        self.assertEqual([ConnectionEntry.from_json(json_entry) for json_entry in connection_entry_data], entries)
+
+    def test_query_time_range(self):
+        entries = list(JsonEntryReader(self.data_file).query(start=datetime(2018, 8, 3, 21)))
+
+        self.assertEqual([ConnectionEntry.from_json(connection_entry_data[1])], entries)
+
 
 class TestJsonEntryWriterWithoutFile(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,259 @@
+import unittest
+import os
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter, JsonLinesEntryReader
+from src.notifiers.sparse_index import SparseIndex, index_file_path
+from src.status_tracker import Status, StatusChange
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+
+connection_entry_data = [
+    {
+        "time": "2018-08-03 20:35:43",
+        "result": True,
+        "status": "UNKNOWN",
+        "status_change": "WARNING_RESOLVED"
+    },
+    {
+        "time": "2018-08-03 22:35:43.250000",
+        "result": False,
+        "status": "ERROR",
+        "status_change": "NEW_ERROR"
+    }
+]
+
+
+def write_lines(data_file: str, entries: list, trailing: str = ""):
+    with open(data_file, "w+") as new_file:
+        for entry in entries:
+            new_file.write(json.dumps(entry) + "\n")
+        new_file.write(trailing)
+
+
+class TestJsonLinesEntryWriterInitialisation(unittest.TestCase):
+    def setUp(self):
+        self.data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                      "test_data.jsonl")
+
+    def tearDown(self):
+        os.remove(self.data_file)
+        if os.path.isfile(index_file_path(self.data_file)):
+            os.remove(index_file_path(self.data_file))
+
+    def test_initiation_creates_empty_file(self):
+        JsonLinesEntryWriter(self.data_file)
+
+        self.assertTrue(os.path.exists(self.data_file))
+        with open(self.data_file, "r") as file:
+            self.assertEqual("", file.read())
+
+    def test_initiation_doesnt_override_existing_file(self):
+        write_lines(self.data_file, connection_entry_data)
+
+        JsonLinesEntryWriter(self.data_file)
+
+        with open(self.data_file, "r") as file:
+            self.assertEqual(connection_entry_data, [json.loads(line) for line in file])
+
+    def test_initiation_discards_incomplete_entry(self):
+        write_lines(self.data_file, connection_entry_data, trailing='{"time": "2018-08-0')
+
+        JsonLinesEntryWriter(self.data_file)
+
+        with open(self.data_file, "r") as file:
+            self.assertEqual(connection_entry_data, [json.loads(line) for line in file])
+
+
+class TestJsonLinesEntryWriterWithFile(unittest.TestCase):
+    def setUp(self):
+        self.data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                      "test_data.jsonl")
+        write_lines(self.data_file, connection_entry_data)
+
+        self.writer = JsonLinesEntryWriter(self.data_file)
+
+    def tearDown(self):
+        os.remove(self.data_file)
+        if os.path.isfile(index_file_path(self.data_file)):
+            os.remove(index_file_path(self.data_file))
+
+    def test_write_entry_appends_line(self):
+        new_entry = ConnectionEntry(datetime(2018, 9, 24),
+                                    True,
+                                    Status.WARNING,
+                                    StatusChange.ERROR_RESOLVED)
+        self.writer.write_new_entry(new_entry)
+
+        with open(self.data_file, "r") as file:
+            lines = file.readlines()
+
+        self.assertEqual(3, len(lines))
+        self.assertEqual({
+                "time": "2018-09-24 00:00:00",
+                "result": True,
+                "status": "WARNING",
+                "status_change": "ERROR_RESOLVED"
+            },
+            json.loads(lines[2])
+        )
+
+    def test_write_entries_appends_lines(self):
+        new_entries = [ConnectionEntry(datetime(2018, 9, 24), True, Status.OK, StatusChange.NONE),
+                       ConnectionEntry(datetime(2018, 9, 25), False, Status.WARNING, StatusChange.NEW_WARNING)]
+        self.writer.write_new_entries(new_entries)
+        self.writer.sync()
+
+        entries = list(JsonLinesEntryReader(self.data_file).read_entries())
+
+        self.assertEqual(4, len(entries))
+        self.assertEqual(new_entries, entries[2:])
+
+    def test_read_entries(self):
+        entries = list(JsonLinesEntryReader(self.data_file).read_entries())
+
+        self.assertEqual([ConnectionEntry(datetime(2018, 8, 3, 20, 35, 43),
+                                          True,
+                                          Status.UNKNOWN,
+                                          StatusChange.WARNING_RESOLVED),
+                          ConnectionEntry(datetime(2018, 8, 3, 22, 35, 43, 250000),
+                                          False,
+                                          Status.ERROR,
+                                          StatusChange.NEW_ERROR)],
+                         entries)
+
+    def test_write_read_loop(self):
+        new_entry = ConnectionEntry(datetime(2018, 9, 24, 1, 2, 3, 456),
+                                    False,
+                                    Status.WARNING,
+                                    StatusChange.NEW_WARNING)
+        self.writer.write_new_entry(new_entry)
+
+        entries = list(JsonLinesEntryReader(self.data_file).read_entries())
+
+        self.assertEqual(new_entry, entries[-1])
+
+    def test_http_entry_write_read_loop(self):
+        new_entry = ConnectionEntry(datetime(2018, 9, 24), False, Status.WARNING, StatusChange.NEW_WARNING,
+                                    "http://example.com/", ProbeLatency(0.01, 0.02, 0.05), 503, 0.04)
+        self.writer.write_new_entry(new_entry)
+
+        entries = list(JsonLinesEntryReader(self.data_file).read_entries())
+
+        self.assertEqual(503, entries[-1].status_code)
+        self.assertEqual(new_entry, entries[-1])
+
+    def test_read_ignores_incomplete_entry(self):
+        with open(self.data_file, "a") as file:
+            file.write('{"time": "2018-08-0')
+
+        entries = list(JsonLinesEntryReader(self.data_file).read_entries())
+
+        self.assertEqual(2, len(entries))
+
+
+class TestJsonLinesEntryWriterIndex(unittest.TestCase):
+    def setUp(self):
+        self.data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                      "test_data.jsonl")
+        self.index_file = index_file_path(self.data_file)
+        self.entries = [ConnectionEntry(datetime(2018, 8, 3, hour), hour % 2 == 0, Status.OK, StatusChange.NONE)
+                        for hour in range(10)]
+
+    def tearDown(self):
+        for file in (self.data_file, self.index_file):
+            if os.path.isfile(file):
+                os.remove(file)
+
+    def read_offsets(self) -> list:
+        with open(self.data_file, "rb") as file:
+            offsets = []
+            offset = 0
+            for line in file:
+                offsets.append(offset)
+                offset += len(line)
+        return offsets
+
+    def test_invalid_interval(self):
+        with self.assertRaises(ValueError):
+            JsonLinesEntryWriter(self.data_file, index_interval=0)
+
+    def test_no_index(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=None)
+        writer.write_new_entries(self.entries)
+
+        self.assertFalse(os.path.exists(self.index_file))
+
+    def test_index_every_nth_entry(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=3)
+        writer.write_new_entries(self.entries[:4])
+        for entry in self.entries[4:]:
+            writer.write_new_entry(entry)
+
+        offsets = self.read_offsets()
+        index = SparseIndex(self.index_file)
+        self.assertEqual(4, len(index))
+        self.assertEqual(offsets[9], index.last_offset)
+        self.assertEqual(offsets[3], index.find_offset(datetime(2018, 8, 3, 5)))
+        self.assertEqual(offsets[3], index.find_offset(datetime(2018, 8, 3, 6)))
+        self.assertEqual(0, index.find_offset(datetime(2018, 8, 3, 0)))
+
+    def test_index_continues_after_restart(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=3)
+        writer.write_new_entries(self.entries[:5])
+
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=3)
+        writer.write_new_entries(self.entries[5:])
+
+        self.assertEqual(SparseIndex.rebuild(self.data_file, 3)._offsets, SparseIndex(self.index_file)._offsets)
+
+    def test_missing_index_rebuilt(self):
+        write_lines(self.data_file, [entry.to_json() for entry in self.entries])
+
+        JsonLinesEntryWriter(self.data_file, index_interval=4)
+
+        offsets = self.read_offsets()
+        self.assertEqual([offsets[0], offsets[4], offsets[8]], SparseIndex(self.index_file)._offsets)
+
+    def test_stale_index_rebuilt(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=2)
+        writer.write_new_entries(self.entries)
+        write_lines(self.data_file, [entry.to_json() for entry in self.entries[:3]])
+
+        JsonLinesEntryWriter(self.data_file, index_interval=2)
+
+        offsets = self.read_offsets()
+        self.assertEqual([offsets[0], offsets[2]], SparseIndex(self.index_file)._offsets)
+
+    def test_incomplete_index_record_discarded(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=2)
+        writer.write_new_entries(self.entries[:3])
+        with open(self.index_file, "ab") as index:
+            index.write(b"\x01\x02")
+
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=2)
+        writer.write_new_entries(self.entries[3:])
+
+        self.assertEqual(SparseIndex.rebuild(self.data_file, 2)._offsets, SparseIndex(self.index_file)._offsets)
+
+    def test_query_uses_index(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=2)
+        writer.write_new_entries(self.entries)
+
+        reader = JsonLinesEntryReader(self.data_file)
+        with patch.object(reader, "_read_entries_from_offset", wraps=reader._read_entries_from_offset) as read:
+            entries = list(reader.query(start=datetime(2018, 8, 3, 5), end=datetime(2018, 8, 3, 7)))
+
+        self.assertEqual(self.entries[5:7], entries)
+        read.assert_called_once_with(self.read_offsets()[4])
+
+    def test_query_without_index(self):
+        writer = JsonLinesEntryWriter(self.data_file, index_interval=None)
+        writer.write_new_entries(self.entries)
+
+        entries = list(JsonLinesEntryReader(self.data_file).query(start=datetime(2018, 8, 3, 5),
+                                                                  statuses={Status.OK}))
+
+        self.assertEqual(self.entries[5:], entries)
@@ -0,0 +1,203 @@
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from src.notifiers.buffered_entry_writer import BufferedEntryWriter
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.notifiers.queued_notifier import OverflowPolicy, QueuedNotifier
+from src.status_tracker import Status, StatusChange
+
+start_time = datetime(2018, 8, 3)
+
+
+class BlockingEntryWriter(EntryWriter):
+    # Holds up writes until released, so tests can fill the queue.
+    def __init__(self):
+        self.entries = []
+        self.release = threading.Event()
+        self.writing = threading.Event()
+        self.flush = MagicMock()
+        self.close = MagicMock()
+
+    def write_new_entries(self, entries):
+        self.writing.set()
+        self.release.wait(5)
+        self.entries.extend(entries)
+
+
+class TestQueuedNotifier(unittest.TestCase):
+    def setUp(self):
+        self.writer = BlockingEntryWriter()
+        self.notifiers = []
+
+    def tearDown(self):
+        self.writer.release.set()
+        for notifier in self.notifiers:
+            notifier.close(5)
+
+    def make_notifier(self, **kwargs) -> QueuedNotifier:
+        notifier = QueuedNotifier(self.writer, **kwargs)
+        self.notifiers.append(notifier)
+        return notifier
+
+    def notify(self, notifier: QueuedNotifier, second: int, status_change: StatusChange = StatusChange.NONE,
+               target: str = None):
+        notifier.notify(start_time + timedelta(seconds=second), True, Status.OK, status_change, target)
+
+    def fill_queue(self, notifier: QueuedNotifier, count: int):
+        # The first entry is taken by the worker, which then blocks on the writer.
+        self.notify(notifier, 0)
+        self.assertTrue(self.writer.writing.wait(5))
+        for second in range(1, count + 1):
+            self.notify(notifier, second)
+
+    def written_seconds(self) -> list:
+        return [entry.time.second for entry in self.writer.entries]
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            QueuedNotifier(self.writer, max_size=0)
+        with self.assertRaises(ValueError):
+            QueuedNotifier(self.writer, batch_size=0)
+
+    def test_entries_written_in_background(self):
+        self.writer.release.set()
+        notifier = self.make_notifier()
+
+        for second in range(5):
+            self.notify(notifier, second, target="example.com")
+        notifier.flush()
+
+        self.assertEqual(list(range(5)), self.written_seconds())
+        self.assertEqual("example.com", self.writer.entries[0].target)
+        self.assertEqual((5, 5, 0), (notifier.queued, notifier.written, notifier.dropped))
+        self.writer.flush.assert_called_once_with()
+
+    def test_notify_does_not_wait_for_writer(self):
+        notifier = self.make_notifier()
+
+        self.fill_queue(notifier, 3)
+
+        self.assertEqual(3, notifier.queue_size)
+        self.assertEqual([], self.writer.entries)
+
+    def test_drop_oldest(self):
+        notifier = self.make_notifier(max_size=2, overflow_policy=OverflowPolicy.DROP_OLDEST)
+
+        self.fill_queue(notifier, 4)
+        self.writer.release.set()
+        notifier.flush()
+
+        self.assertEqual([0, 3, 4], self.written_seconds())
+        self.assertEqual(2, notifier.dropped)
+
+    def test_coalesce(self):
+        notifier = self.make_notifier(max_size=2, overflow_policy=OverflowPolicy.COALESCE)
+
+        self.fill_queue(notifier, 4)
+        self.writer.release.set()
+        notifier.flush()
+
+        self.assertEqual([0, 1, 4], self.written_seconds())
+        self.assertEqual(2, notifier.coalesced)
+        self.assertEqual(0, notifier.dropped)
+
+    def test_coalesce_keeps_time_order(self):
+        notifier = self.make_notifier(max_size=2, overflow_policy=OverflowPolicy.COALESCE)
+        self.fill_queue(notifier, 0)
+        self.notify(notifier, 1, target="router")
+        self.notify(notifier, 2, target="google")
+
+        # Replaces the router entry, which is older than the google entry queued after it.
+        self.notify(notifier, 3, target="router")
+        self.writer.release.set()
+        notifier.flush()
+
+        self.assertEqual([0, 2, 3], self.written_seconds())
+        self.assertEqual([None, "google", "router"], [entry.target for entry in self.writer.entries])
+        self.assertEqual(1, notifier.coalesced)
+
+    def test_coalesce_keeps_status_changes(self):
+        notifier = self.make_notifier(max_size=2, overflow_policy=OverflowPolicy.COALESCE)
+        self.fill_queue(notifier, 1)
+        self.notify(notifier, 2, StatusChange.NEW_WARNING)
+
+        # Queue is full and the newest entry is a status change, so the next one has to wait.
+        blocked = threading.Thread(target=self.notify, args=(notifier, 3))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive())
+
+        self.writer.release.set()
+        blocked.join(5)
+        notifier.flush()
+
+        self.assertEqual([0, 1, 2, 3], self.written_seconds())
+        self.assertEqual(0, notifier.coalesced)
+
+    def test_block_waits_for_room(self):
+        notifier = self.make_notifier(max_size=1)
+        self.fill_queue(notifier, 1)
+
+        blocked = threading.Thread(target=self.notify, args=(notifier, 2))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive())
+
+        self.writer.release.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        notifier.flush()
+
+        self.assertEqual([0, 1, 2], self.written_seconds())
+
+    def test_close_drains_queue(self):
+        notifier = self.make_notifier(batch_size=2)
+        self.fill_queue(notifier, 4)
+        self.writer.release.set()
+
+        notifier.close(5)
+
+        self.assertEqual([0, 1, 2, 3, 4], self.written_seconds())
+        self.writer.flush.assert_called_once_with()
+        self.writer.close.assert_called_once_with()
+        with self.assertRaises(ValueError):
+            self.notify(notifier, 5)
+
+    def test_close_timed_out_leaves_writer_open(self):
+        notifier = self.make_notifier()
+        self.fill_queue(notifier, 1)
+
+        notifier.close(0.1)
+
+        self.writer.close.assert_not_called()
+
+    def test_failed_write_counted(self):
+        self.writer.release.set()
+        self.writer.write_new_entries = MagicMock(side_effect=[OSError, None])
+        notifier = self.make_notifier(batch_size=1)
+
+        self.notify(notifier, 0)
+        notifier.flush()
+        self.notify(notifier, 1)
+        notifier.flush()
+
+        self.assertEqual((1, 1), (notifier.failed, notifier.written))
+
+    def test_failed_write_kept_by_writer_not_counted(self):
+        self.writer.release.set()
+        wrapped_writer = MagicMock()
+        wrapped_writer.write_new_entries.side_effect = [OSError, None, None]
+        notifier = QueuedNotifier(BufferedEntryWriter(wrapped_writer, batch_size=1), batch_size=1)
+        self.notifiers.append(notifier)
+
+        self.notify(notifier, 0)
+        notifier.flush()
+        self.notify(notifier, 1)
+        notifier.flush()
+
+        self.assertEqual((0, 2), (notifier.failed, notifier.written))
+        # The failed entry was retried when the notifier was flushed.
+        self.assertEqual([0, 1], [entry.time.second for write in wrapped_writer.write_new_entries.call_args_list[1:]
+                                  for entry in write[0][0]])
@@ -0,0 +1,141 @@
+import gzip
+import os
+import shutil
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+from src.notifiers.segmented_entry_writer import Compression, RetentionAction, RetentionPolicy, \
+    SegmentedEntryReader, SegmentedEntryWriter, load_manifest, read_segment
+from src.status_tracker import Status, StatusChange
+
+start_time = datetime(2018, 8, 3)
+
+
+def make_entry(minutes: float, status_change: StatusChange = StatusChange.NONE) -> ConnectionEntry:
+    return ConnectionEntry(start_time + timedelta(minutes=minutes), True, Status.OK, status_change)
+
+
+class TestSegmentedEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_segments")
+
+    def tearDown(self):
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+    def segment_files(self) -> list:
+        return sorted(file_name for file_name in os.listdir(self.directory) if file_name.startswith("segment-"))
+
+    def test_invalid_max_entries(self):
+        with self.assertRaises(ValueError):
+            SegmentedEntryWriter(self.directory, max_entries=0)
+
+    def test_rolls_over_daily(self):
+        writer = SegmentedEntryWriter(self.directory)
+        entries = [make_entry(0), make_entry(60 * 23), make_entry(60 * 24), make_entry(60 * 49)]
+
+        writer.write_new_entries(entries)
+
+        segments = writer.segments
+        self.assertEqual([2, 1, 1], [segment.entries for segment in segments])
+        self.assertEqual([True, True, False], [segment.sealed for segment in segments])
+        self.assertEqual(start_time + timedelta(hours=23), segments[0].end)
+        self.assertEqual(["segment-000000-20180803.jsonl.gz",
+                          "segment-000001-20180804.jsonl.gz",
+                          "segment-000002-20180805.jsonl"], self.segment_files())
+        self.assertEqual(entries, list(SegmentedEntryReader(self.directory).read_entries()))
+
+    def test_rolls_over_after_max_entries(self):
+        writer = SegmentedEntryWriter(self.directory, daily=False, max_entries=2, compression=Compression.LZMA)
+        entries = [make_entry(minute) for minute in range(5)]
+
+        for entry in entries:
+            writer.write_new_entry(entry)
+
+        self.assertEqual([2, 2, 1], [segment.entries for segment in writer.segments])
+        self.assertEqual(Compression.LZMA, writer.segments[0].compression)
+        self.assertEqual(entries, list(SegmentedEntryReader(self.directory).read_entries()))
+
+    def test_sealed_segment_compressed(self):
+        writer = SegmentedEntryWriter(self.directory)
+        writer.write_new_entry(make_entry(0))
+
+        writer.seal()
+
+        with gzip.open(os.path.join(self.directory, "segment-000000-20180803.jsonl.gz"), "rb") as segment_data:
+            self.assertEqual(1, len(segment_data.readlines()))
+        self.assertEqual(["segment-000000-20180803.jsonl.gz"], self.segment_files())
+
+    def test_http_entries_read_back_from_sealed_segment(self):
+        writer = SegmentedEntryWriter(self.directory)
+        entries = [ConnectionEntry(start_time, True, Status.OK, StatusChange.NONE, "http://example.com/",
+                                   ProbeLatency(0.01, 0.02, 0.05), 200, 0.04),
+                   ConnectionEntry(start_time + timedelta(minutes=1), False, Status.WARNING, StatusChange.NEW_WARNING,
+                                   "http://example.com/", ProbeLatency(0.01, None, 0.03), 500, 0.02)]
+
+        writer.write_new_entries(entries)
+        writer.seal()
+
+        self.assertEqual(entries, list(SegmentedEntryReader(self.directory).read_entries()))
+
+    def test_uncompressed_segments(self):
+        writer = SegmentedEntryWriter(self.directory, compression=Compression.NONE)
+        writer.write_new_entries([make_entry(0), make_entry(60 * 24)])
+
+        self.assertEqual(["segment-000000-20180803.jsonl", "segment-000001-20180804.jsonl"], self.segment_files())
+        self.assertEqual(Compression.NONE, writer.segments[0].compression)
+        self.assertEqual(2, len(list(SegmentedEntryReader(self.directory).read_entries())))
+
+    def test_resumes_active_segment(self):
+        writer = SegmentedEntryWriter(self.directory, daily=False, max_entries=3)
+        writer.write_new_entries([make_entry(0), make_entry(1)])
+
+        writer = SegmentedEntryWriter(self.directory, daily=False, max_entries=3)
+        writer.write_new_entries([make_entry(2), make_entry(3)])
+
+        self.assertEqual([3, 1], [segment.entries for segment in writer.segments])
+        self.assertEqual(start_time + timedelta(minutes=2), writer.segments[0].end)
+
+    def test_reader_skips_segments_before_start(self):
+        writer = SegmentedEntryWriter(self.directory)
+        writer.write_new_entries([make_entry(0), make_entry(60 * 24), make_entry(60 * 48)])
+
+        with patch("src.notifiers.segmented_entry_writer.read_segment", wraps=read_segment) as mock_read:
+            entries = list(SegmentedEntryReader(self.directory).query(start_time + timedelta(days=1),
+                                                                      start_time + timedelta(days=1, hours=1)))
+
+        self.assertEqual([make_entry(60 * 24)], entries)
+        # Only the second segment is opened, the others are outside of the query.
+        self.assertEqual(1, mock_read.call_count)
+
+    def test_reader_without_manifest(self):
+        os.makedirs(self.directory)
+
+        self.assertEqual([], list(SegmentedEntryReader(self.directory).read_entries()))
+
+    def test_retention_deletes_old_segments(self):
+        writer = SegmentedEntryWriter(self.directory, retention=RetentionPolicy(timedelta(days=2)))
+
+        writer.write_new_entries([make_entry(60 * 24 * day) for day in range(5)])
+
+        self.assertEqual([2, 3, 4], [segment.number for segment in writer.segments])
+        self.assertEqual(3, len(self.segment_files()))
+        self.assertEqual([2, 3, 4], [segment.number for segment in load_manifest(self.directory)])
+
+    def test_retention_downsamples_old_segments(self):
+        retention = RetentionPolicy(timedelta(days=1), RetentionAction.DOWNSAMPLE, timedelta(minutes=10))
+        writer = SegmentedEntryWriter(self.directory, retention=retention)
+        first_day = [make_entry(minute) for minute in range(30)]
+        first_day[13] = make_entry(13, StatusChange.NEW_WARNING)
+
+        writer.write_new_entries(first_day + [make_entry(60 * 24), make_entry(60 * 48)])
+
+        segment = writer.segments[0]
+        self.assertTrue(segment.downsampled)
+        self.assertEqual(4, segment.entries)
+        kept = [entry.time for entry in SegmentedEntryReader(self.directory).read_entries()]
+        self.assertEqual([start_time + timedelta(minutes=minute) for minute in [0, 10, 13, 23]] +
+                         [start_time + timedelta(days=1), start_time + timedelta(days=2)], kept)
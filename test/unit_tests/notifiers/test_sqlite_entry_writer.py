@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import unittest
+from datetime import datetime
+
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency
+from src.notifiers.sqlite_entry_writer import SqliteEntryWriter, SqliteEntryReader, SCHEMA_VERSION
+from src.status_tracker import Status, StatusChange
+
+connection_entries = [
+    ConnectionEntry(datetime(2018, 8, 3, 20, 35, 43), True, Status.OK, StatusChange.NONE, "router"),
+    ConnectionEntry(datetime(2018, 8, 3, 22, 35, 43, 250000), False, Status.WARNING, StatusChange.NEW_WARNING,
+                    "google", ProbeLatency(0.01, None, 5.0)),
+    ConnectionEntry(datetime(2018, 8, 4, 1, 2, 3, 4), False, Status.ERROR, StatusChange.NEW_ERROR, "google",
+                    ProbeLatency(0.01, 0.02, 0.04)),
+    ConnectionEntry(datetime(2018, 8, 4, 1, 2, 3, 4), True, Status.OK, StatusChange.ERROR_RESOLVED),
+    ConnectionEntry(datetime(2018, 8, 4, 2), False, Status.WARNING, StatusChange.NONE, "http://example.com/",
+                    ProbeLatency(0.01, 0.02, 0.05), 503, 0.04)
+]
+
+
+class TestSqliteEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data.db")
+
+    def tearDown(self):
+        for file_path in [self.data_file, self.data_file + "-wal", self.data_file + "-shm"]:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def read_entries(self) -> list:
+        with SqliteEntryReader(self.data_file) as reader:
+            return list(reader.read_entries())
+
+    def test_initiation_creates_database(self):
+        with SqliteEntryWriter(self.data_file):
+            pass
+
+        connection = sqlite3.connect(self.data_file)
+        self.assertEqual("wal", connection.execute("PRAGMA journal_mode").fetchone()[0])
+        self.assertEqual(SCHEMA_VERSION, connection.execute("PRAGMA user_version").fetchone()[0])
+        indexes = [row[1] for row in connection.execute("PRAGMA index_list(entries)")]
+        connection.close()
+        self.assertIn("entries_target_time", indexes)
+        self.assertEqual([], self.read_entries())
+
+    def test_initiation_rejects_other_files(self):
+        with open(self.data_file, "w+") as new_file:
+            new_file.write("[]" * 100)
+
+        with self.assertRaises(ValueError):
+            SqliteEntryWriter(self.data_file)
+        with self.assertRaises(ValueError):
+            SqliteEntryReader(self.data_file)
+
+    def test_initiation_rejects_other_versions(self):
+        connection = sqlite3.connect(self.data_file)
+        connection.execute("PRAGMA user_version={version}".format(version=SCHEMA_VERSION + 1))
+        connection.close()
+
+        with self.assertRaises(ValueError):
+            SqliteEntryWriter(self.data_file)
+
+    def test_older_version_upgraded(self):
+        connection = sqlite3.connect(self.data_file)
+        connection.execute("CREATE TABLE entries (id INTEGER PRIMARY KEY, time INTEGER NOT NULL, "
+                           "result INTEGER NOT NULL, status INTEGER NOT NULL, status_change INTEGER NOT NULL, "
+                           "target TEXT, dns_time REAL, connect_time REAL, total_time REAL)")
+        connection.execute("INSERT INTO entries (time, result, status, status_change) VALUES (0, 1, 1, 0)")
+        connection.execute("PRAGMA user_version=1")
+        connection.commit()
+        connection.close()
+
+        with self.assertRaises(ValueError):
+            SqliteEntryReader(self.data_file)
+        with SqliteEntryWriter(self.data_file) as writer:
+            writer.write_new_entries(connection_entries[4:])
+
+        entries = self.read_entries()
+        self.assertEqual(ConnectionEntry(datetime(1970, 1, 1), True, Status.OK, StatusChange.NONE), entries[0])
+        self.assertEqual(connection_entries[4:], entries[1:])
+
+    def test_reader_rejects_missing_file(self):
+        with self.assertRaises(ValueError):
+            SqliteEntryReader(self.data_file)
+
+    def test_write_entries(self):
+        with SqliteEntryWriter(self.data_file) as writer:
+            for entry in connection_entries:
+                writer.write_new_entry(entry)
+
+        self.assertEqual(connection_entries, self.read_entries())
+
+    def test_write_entries_batch(self):
+        with SqliteEntryWriter(self.data_file) as writer:
+            writer.write_new_entries(connection_entries)
+            writer.write_new_entries([])
+            writer.sync()
+
+        self.assertEqual(connection_entries, self.read_entries())
+
+    def test_reopen_appends(self):
+        with SqliteEntryWriter(self.data_file) as writer:
+            writer.write_new_entries(connection_entries[:2])
+        with SqliteEntryWriter(self.data_file) as writer:
+            writer.write_new_entries(connection_entries[2:])
+
+        self.assertEqual(connection_entries, self.read_entries())
+
+    def test_reader_sees_entries_while_writing(self):
+        with SqliteEntryWriter(self.data_file) as writer, SqliteEntryReader(self.data_file) as reader:
+            writer.write_new_entry(connection_entries[0])
+            self.assertEqual(connection_entries[:1], list(reader.read_entries()))
+
+            writer.write_new_entries(connection_entries[1:])
+            self.assertEqual(connection_entries, list(reader.read_entries()))
+
+    def test_write_from_threads(self):
+        with SqliteEntryWriter(self.data_file) as writer:
+            threads = [threading.Thread(target=writer.write_new_entries, args=(connection_entries,))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(20, len(self.read_entries()))
+
+    def test_query(self):
+        with SqliteEntryWriter(self.data_file) as writer:
+            writer.write_new_entries(connection_entries)
+
+        with SqliteEntryReader(self.data_file) as reader:
+            self.assertEqual(connection_entries, list(reader.query()))
+            self.assertEqual(connection_entries[1:3],
+                             list(reader.query(start=datetime(2018, 8, 3, 22, 35, 43, 250000),
+                                               end=datetime(2018, 8, 4, 1, 2, 3, 5),
+                                               targets=["google"])))
+            self.assertEqual(connection_entries[:2], list(reader.query(end=datetime(2018, 8, 4, 1, 2, 3, 4))))
+            self.assertEqual([connection_entries[0], connection_entries[3]],
+                             list(reader.query(statuses=[Status.OK])))
+            self.assertEqual(connection_entries[1:3],
+                             list(reader.query(status_changes={StatusChange.NEW_WARNING, StatusChange.NEW_ERROR})))
+            self.assertEqual([], list(reader.query(statuses=[])))
+
+    def test_query_matches_filter_entries(self):
+        with SqliteEntryWriter(self.data_file) as writer:
+            writer.write_new_entries(connection_entries)
+
+        queries = [
+            {"start": datetime(2018, 8, 4)},
+            {"statuses": [Status.ERROR, Status.WARNING], "targets": ["google", "router"]},
+            {"end": datetime(2018, 8, 4), "status_changes": [StatusChange.NONE]}
+        ]
+        with SqliteEntryReader(self.data_file) as reader:
+            for query in queries:
+                self.assertEqual(list(super(SqliteEntryReader, reader).query(**query)), list(reader.query(**query)))
+
+
+if __name__ == '__main__':
+    unittest.main()
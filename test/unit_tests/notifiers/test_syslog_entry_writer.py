@@ -0,0 +1,45 @@
+import json
+import socket
+import unittest
+from datetime import datetime
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.syslog_entry_writer import SyslogEntryWriter, format_message, LOCAL0
+from src.status_tracker import Status, StatusChange
+
+
+class TestSyslogEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.collector = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.collector.bind(("127.0.0.1", 0))
+        self.collector.settimeout(5)
+        self.writer = SyslogEntryWriter("127.0.0.1", self.collector.getsockname()[1], app_name="monitor")
+
+    def tearDown(self):
+        self.writer.close()
+        self.collector.close()
+
+    def test_format_message(self):
+        entry = ConnectionEntry(datetime(2018, 8, 3, 1, 2, 3), False, Status.ERROR, StatusChange.NEW_ERROR)
+
+        message = format_message(entry, LOCAL0, "host", "monitor").decode("utf-8")
+
+        timestamp = message.split(" ")[1]
+        self.assertTrue(message.startswith("<131>1 2018-08-03T01:02:03"))
+        self.assertRegex(timestamp, r"^2018-08-03T01:02:03[+-]\d{2}:\d{2}$")
+        self.assertEqual(entry.time.timestamp(), datetime.strptime(timestamp.replace(":", ""), "%Y-%m-%dT%H%M%S%z")
+                         .timestamp())
+        self.assertIn(" host monitor - - - ", message)
+        self.assertEqual(entry, ConnectionEntry.from_json(json.loads(message.split(" - - - ", 1)[1])))
+
+    def test_sends_datagram_per_entry(self):
+        entries = [ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE),
+                   ConnectionEntry(datetime(2018, 8, 3, 0, 1), False, Status.WARNING, StatusChange.NEW_WARNING)]
+
+        self.writer.write_new_entries(entries)
+
+        first = self.collector.recv(4096).decode("utf-8")
+        second = self.collector.recv(4096).decode("utf-8")
+        self.assertTrue(first.startswith("<134>1 2018-08-03T00:00:00"))
+        self.assertIn(" monitor - - - ", first)
+        self.assertTrue(second.startswith("<132>1 2018-08-03T00:01:00"))
@@ -0,0 +1,36 @@
+import os
+import unittest
+from datetime import datetime
+
+from src.notifiers.throughput_entry_writer import ThroughputEntryReader, ThroughputEntryWriter
+from src.throughput_entry import ThroughputEntry
+
+TEST_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_throughput.jsonl")
+
+
+class TestThroughputEntryWriter(unittest.TestCase):
+    def tearDown(self):
+        if os.path.isfile(TEST_FILE):
+            os.remove(TEST_FILE)
+
+    def test_write_and_read(self):
+        entries = [ThroughputEntry(datetime(2018, 8, 3, 12), "example.com", True, 1000000, 2.5),
+                   ThroughputEntry(datetime(2018, 8, 3, 13), "example.com", False, 0, None)]
+        writer = ThroughputEntryWriter(TEST_FILE)
+
+        for entry in entries:
+            writer.write_new_entry(entry)
+        writer.sync()
+
+        self.assertEqual(entries, list(ThroughputEntryReader(TEST_FILE).read_entries()))
+
+    def test_incomplete_entry_ignored(self):
+        entry = ThroughputEntry(datetime(2018, 8, 3, 12), "example.com", True, 1000000, 2.5)
+        ThroughputEntryWriter(TEST_FILE).write_new_entry(entry)
+        with open(TEST_FILE, "ab") as throughput_data:
+            throughput_data.write(b"{\"time\": ")
+
+        self.assertEqual([entry], list(ThroughputEntryReader(TEST_FILE).read_entries()))
+
+    def test_missing_file(self):
+        self.assertEqual([], list(ThroughputEntryReader(TEST_FILE).read_entries()))
@@ -0,0 +1,49 @@
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from src.connection_entry import ConnectionEntry
+from src.metrics import MetricsRegistry, MonitorMetrics
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.notifiers.timed_entry_writer import TimedEntryWriter
+from src.status_tracker import Status, StatusChange
+
+entry = ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE)
+
+
+class TestTimedEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MonitorMetrics(MetricsRegistry())
+        self.entry_writer = EntryWriter()
+        self.entry_writer.write_new_entries = MagicMock()
+        self.entry_writer.flush = MagicMock()
+        self.entry_writer.sync = MagicMock()
+        self.entry_writer.close = MagicMock()
+        self.writer = TimedEntryWriter(self.entry_writer, self.metrics, "file")
+
+    def count(self, operation: str) -> int:
+        return sum(self.metrics.write_duration.labels("file", operation).counts)
+
+    def test_operations_timed(self):
+        self.writer.write_new_entry(entry)
+        self.writer.write_new_entries([entry, entry])
+        self.writer.flush()
+        self.writer.sync()
+
+        self.entry_writer.write_new_entries.assert_called_with([entry, entry])
+        self.entry_writer.flush.assert_called_once_with()
+        self.entry_writer.sync.assert_called_once_with()
+        self.assertEqual((2, 1, 1), (self.count("write"), self.count("flush"), self.count("sync")))
+
+    def test_close_passed_on(self):
+        self.writer.close()
+
+        self.entry_writer.close.assert_called_once_with()
+
+    def test_failed_write_timed(self):
+        self.entry_writer.write_new_entries.side_effect = OSError
+
+        with self.assertRaises(OSError):
+            self.writer.write_new_entry(entry)
+
+        self.assertEqual(1, self.count("write"))
@@ -0,0 +1,75 @@
+import json
+import threading
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.webhook_entry_writer import WebhookEntryWriter
+from src.status_tracker import Status, StatusChange
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, self.headers, json.loads(body.decode("utf-8"))))
+        self.send_response(self.server.response_status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWebhookEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), RecordingHandler)
+        self.server.requests = []
+        self.server.response_status = 200
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = "http://127.0.0.1:{port}/hook".format(port=self.server.server_address[1])
+
+        self.entries = [ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, "example.com"),
+                        ConnectionEntry(datetime(2018, 8, 3, 0, 1), False, Status.WARNING, StatusChange.NEW_WARNING)]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_posts_batch(self):
+        writer = WebhookEntryWriter(self.url, headers={"Authorization": "Bearer token"})
+
+        writer.write_new_entries(self.entries)
+
+        self.assertEqual(1, len(self.server.requests))
+        path, headers, body = self.server.requests[0]
+        self.assertEqual("/hook", path)
+        self.assertEqual("application/json", headers["Content-Type"])
+        self.assertEqual("Bearer token", headers["Authorization"])
+        self.assertEqual(self.entries, [ConnectionEntry.from_json(entry) for entry in body["entries"]])
+
+    def test_single_entry(self):
+        WebhookEntryWriter(self.url).write_new_entry(self.entries[0])
+
+        self.assertEqual([self.entries[0].to_json()], self.server.requests[0][2]["entries"])
+
+    def test_error_response_raises(self):
+        self.server.response_status = 503
+
+        with self.assertRaises(OSError):
+            WebhookEntryWriter(self.url).write_new_entries(self.entries)
+
+    def test_unreachable_raises(self):
+        port = self.server.server_address[1]
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(OSError):
+            WebhookEntryWriter("http://127.0.0.1:{port}/hook".format(port=port), timeout=1).write_new_entry(
+                self.entries[0])
+
+        # Let tearDown shut down a server which is still running.
+        self.server = HTTPServer(("127.0.0.1", 0), RecordingHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
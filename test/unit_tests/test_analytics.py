@@ -0,0 +1,140 @@
+import math
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy
+
+from src import analytics
+from src.connection_entry import ConnectionEntry
+from src.notifiers.binary_entry_writer import BinaryEntryWriter, BinaryEntryReader
+from src.status_tracker import Status, StatusChange, StatusTracker
+
+start_time = datetime(2018, 8, 3)
+
+
+def make_history(results: list, interval: int = 10, target: Optional[str] = None, offset: int = 0) -> list:
+    # Runs the results through a real StatusTracker so the entries have the statuses the service would record.
+    status_tracker = StatusTracker(number_retry_attempts=1)
+    entries = []
+    for index, result in enumerate(results):
+        status_change = status_tracker.submit_result(result)
+        entries.append(ConnectionEntry(start_time + timedelta(seconds=index * interval + offset),
+                                       result,
+                                       status_tracker.status,
+                                       status_change,
+                                       target))
+    return entries
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        # OK, WARNING, ERROR, ERROR, OK, OK, WARNING, ERROR, ERROR
+        self.entries = make_history([True, False, False, False, True, True, False, False, False])
+        self.history = analytics.load_history(self.entries)
+
+    def test_load_history(self):
+        self.assertEqual(9, self.history.size)
+        self.assertEqual([Status.OK.value, Status.WARNING.value, Status.ERROR.value],
+                         self.history.status[:3].tolist())
+        self.assertEqual(StatusChange.NEW_ERROR.value, self.history.status_change[2])
+        self.assertEqual(numpy.bool_, self.history.result.dtype)
+
+    def test_failure_count_and_success_rate(self):
+        self.assertEqual(6, analytics.failure_count(self.history))
+        self.assertAlmostEqual(3 / 9, analytics.success_rate(self.history))
+
+    def test_find_outages(self):
+        outages = analytics.find_outages(self.history)
+
+        self.assertEqual(2, outages.size)
+        self.assertEqual([True, False], outages.resolved.tolist())
+        # The first outage runs from the third entry to the fifth, the second is still going at the last entry.
+        self.assertEqual([20.0, 10.0], outages.durations.tolist())
+
+    def test_repeated_new_error_counted_once(self):
+        entries = [ConnectionEntry(start_time + timedelta(seconds=index), False, Status.ERROR, status_change)
+                   for index, status_change in enumerate([StatusChange.NEW_ERROR, StatusChange.NEW_ERROR,
+                                                          StatusChange.ERROR_RESOLVED])]
+
+        outages = analytics.find_outages(analytics.load_history(entries))
+
+        self.assertEqual([2.0], outages.durations.tolist())
+
+    def test_uptime(self):
+        self.assertAlmostEqual(1 - 30 / 80, analytics.uptime(self.history))
+
+    def test_mean_time_to_recovery(self):
+        self.assertEqual(20.0, analytics.mean_time_to_recovery(self.history))
+        self.assertTrue(math.isnan(analytics.mean_time_to_recovery(analytics.load_history(self.entries[:4]))))
+
+    def test_time_in_status(self):
+        self.assertEqual({Status.UNKNOWN: 0.0, Status.OK: 30.0, Status.WARNING: 20.0, Status.ERROR: 30.0},
+                         analytics.time_in_status(self.history))
+
+    def test_empty_history(self):
+        summary = analytics.summarise(analytics.load_history([]))
+
+        self.assertEqual(0, summary.entries)
+        self.assertEqual(0, summary.outages)
+        self.assertEqual(1.0, summary.uptime)
+
+    def test_summarise(self):
+        summary = analytics.summarise(self.history)
+
+        self.assertEqual(9, summary.entries)
+        self.assertEqual(6, summary.failures)
+        self.assertEqual(2, summary.outages)
+        self.assertEqual(20.0, summary.mean_time_to_recovery)
+
+    def test_interleaved_targets(self):
+        # Target a is down from 20 to 6010 seconds, target b has two short outages in that time.
+        entries_a = make_history([True, False, False] + [False] * 598 + [True], target="a")
+        entries_b = make_history([True, False, False, True] * 2 + [True] * 594, target="b", offset=5)
+        entries = sorted(entries_a + entries_b, key=lambda entry: entry.time)
+
+        with self.assertRaises(ValueError):
+            analytics.load_history(entries)
+        history = analytics.load_history(entries, "a")
+        summaries = analytics.summarise_targets(entries)
+
+        self.assertEqual(len(entries_a), history.size)
+        self.assertEqual([5990.0], analytics.find_outages(history).durations.tolist())
+        self.assertEqual({"a", "b"}, set(summaries))
+        self.assertEqual(1, summaries["a"].outages)
+        self.assertEqual(5990.0, summaries["a"].mean_time_to_recovery)
+        self.assertAlmostEqual(1 - 5990 / 6010, summaries["a"].uptime)
+        self.assertEqual(2, summaries["b"].outages)
+        self.assertEqual(10.0, summaries["b"].mean_time_to_recovery)
+
+    def test_history_from_binary_records(self):
+        data_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data.bin")
+        self.addCleanup(os.remove, data_file)
+        BinaryEntryWriter(data_file).write_new_entries(self.entries)
+
+        reader = BinaryEntryReader(data_file)
+        history = analytics.history_from_records(reader.as_array())
+
+        self.assertEqual(analytics.summarise(self.history), analytics.summarise(history))
+        del history
+        reader.close()
+
+    def test_million_entries(self):
+        count = 1000000
+        status_change = numpy.zeros(count, dtype=numpy.int8)
+        status_change[1000::2000] = StatusChange.NEW_ERROR.value
+        status_change[1100::2000] = StatusChange.ERROR_RESOLVED.value
+        history = analytics.History(numpy.arange(count, dtype=numpy.int64) * 10 * analytics.MICROSECONDS,
+                                    numpy.ones(count, dtype=numpy.bool_),
+                                    numpy.ones(count, dtype=numpy.uint8),
+                                    status_change)
+
+        began = time.perf_counter()
+        summary = analytics.summarise(history)
+        analytics.time_in_status(history)
+
+        self.assertLess(time.perf_counter() - began, 1)
+        self.assertEqual(500, summary.outages)
+        self.assertEqual(1000.0, summary.mean_time_to_recovery)
@@ -0,0 +1,111 @@
+import asyncio
+import socket
+import unittest
+from unittest.mock import patch
+
+from src.async_connection_tester import AsyncConnectionTester, run_tests
+from src.connection_tester import ProbeOutcome
+from src.dns_cache import DnsCache
+
+
+class TestAsyncConnectionTester(unittest.TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(100)
+        self.open_port = self.server.getsockname()[1]
+
+        # Bind then close a socket to find a port with nothing listening on it.
+        closed_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed_socket.bind(("127.0.0.1", 0))
+        self.closed_port = closed_socket.getsockname()[1]
+        closed_socket.close()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_run_test_open_port(self):
+        tester = AsyncConnectionTester("localhost", port=self.open_port)
+
+        self.assertTrue(tester.run_test())
+
+    def test_run_test_closed_port(self):
+        tester = AsyncConnectionTester("127.0.0.1", port=self.closed_port)
+
+        self.assertFalse(tester.run_test())
+
+    def test_run_test_unresolvable_host(self):
+        tester = AsyncConnectionTester("host.invalid", port=self.open_port)
+
+        self.assertFalse(tester.run_test())
+
+    def test_detailed_results(self):
+        success = AsyncConnectionTester("127.0.0.1", port=self.open_port).run_detailed_test()
+        self.assertEqual(ProbeOutcome.SUCCESS, success.outcome)
+        self.assertIsNotNone(success.latency.connect_time)
+        self.assertGreaterEqual(success.latency.total_time, success.latency.connect_time)
+
+        connection_failure = AsyncConnectionTester("127.0.0.1", port=self.closed_port).run_detailed_test()
+        self.assertEqual(ProbeOutcome.CONNECTION_FAILURE, connection_failure.outcome)
+        self.assertIsNotNone(connection_failure.latency.dns_time)
+        self.assertIsNone(connection_failure.latency.connect_time)
+
+        dns_failure = AsyncConnectionTester("host.invalid", port=self.open_port).run_detailed_test()
+        self.assertEqual(ProbeOutcome.DNS_FAILURE, dns_failure.outcome)
+        self.assertIsNone(dns_failure.latency.dns_time)
+
+    def test_dns_cache_used(self):
+        dns_cache = DnsCache()
+        dns_cache.put("cached.invalid", "127.0.0.1")
+        dns_cache.put("failed.example.com", None)
+
+        self.assertTrue(AsyncConnectionTester("cached.invalid", port=self.open_port, dns_cache=dns_cache).run_test())
+        self.assertEqual(ProbeOutcome.DNS_FAILURE,
+                         AsyncConnectionTester("failed.example.com", port=self.open_port, dns_cache=dns_cache)
+                         .run_detailed_test().outcome)
+
+    def test_dns_cache_filled(self):
+        dns_cache = DnsCache()
+
+        AsyncConnectionTester("localhost", port=self.open_port, dns_cache=dns_cache).run_test()
+
+        self.assertIsNotNone(dns_cache.get("localhost"))
+
+    def test_run_tests_keeps_order(self):
+        testers = [AsyncConnectionTester("127.0.0.1", port=self.open_port),
+                   AsyncConnectionTester("127.0.0.1", port=self.closed_port),
+                   AsyncConnectionTester("127.0.0.1", port=self.open_port)]
+
+        self.assertEqual([True, False, True], run_tests(testers))
+
+    def test_run_test_timeout(self):
+        async def slow_connection(*args, **kwargs):
+            await asyncio.sleep(5)
+
+        tester = AsyncConnectionTester("127.0.0.1", port=self.open_port, timeout=0.05)
+
+        with patch("src.async_connection_tester.asyncio.open_connection", slow_connection):
+            self.assertFalse(tester.run_test())
+
+    def test_run_tests_limits_concurrency(self):
+        in_progress = []
+        most_in_progress = []
+
+        class MockWriter:
+            def close(self):
+                pass
+
+        async def tracked_connection(*args, **kwargs):
+            in_progress.append(1)
+            most_in_progress.append(len(in_progress))
+            await asyncio.sleep(0.01)
+            in_progress.pop()
+            return None, MockWriter()
+
+        testers = [AsyncConnectionTester("127.0.0.1", port=self.open_port) for _ in range(20)]
+
+        with patch("src.async_connection_tester.asyncio.open_connection", tracked_connection):
+            results = run_tests(testers, max_concurrency=5)
+
+        self.assertEqual([True] * 20, results)
+        self.assertEqual(5, max(most_in_progress))
@@ -0,0 +1,50 @@
+import json
+import os
+import unittest
+
+from benchmarks.__main__ import compare, main
+from benchmarks.harness import BenchmarkResult, make_entries, measure
+
+OUTPUT_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_benchmarks.json")
+
+
+class TestHarness(unittest.TestCase):
+    def test_measure(self):
+        calls = []
+
+        result = measure("example", calls.append, 10, repeat=3, setup=lambda: len(calls), parameters={"size": 1})
+
+        self.assertEqual([0, 1, 2], calls)
+        self.assertEqual(3, len(result.times))
+        self.assertEqual("example[size=1]", result.key)
+        self.assertEqual(10 / min(result.times), result.to_json()["operations_per_second"])
+
+    def test_make_entries(self):
+        entries = make_entries(100, 50)
+
+        self.assertEqual(100, len(entries))
+        self.assertFalse(entries[0].result)
+        self.assertTrue(entries[1].result)
+        self.assertLess(entries[0].time, entries[1].time)
+
+    def test_compare(self):
+        baseline = {"benchmarks": [BenchmarkResult("example", {}, 10, [2.0]).to_json()]}
+
+        lines = compare([BenchmarkResult("example", {}, 10, [1.0]), BenchmarkResult("other", {}, 10, [1.0])],
+                        baseline)
+
+        self.assertEqual(["example: 10 ops/s, +100.0% against the baseline."], lines)
+
+
+class TestMain(unittest.TestCase):
+    def tearDown(self):
+        if os.path.isfile(OUTPUT_FILE):
+            os.remove(OUTPUT_FILE)
+
+    def test_results_written_as_json(self):
+        self.assertEqual(0, main(["--quick", "--suite", "status_tracker", "--output", OUTPUT_FILE]))
+
+        with open(OUTPUT_FILE) as output_file:
+            output = json.load(output_file)
+        self.assertTrue(output["quick"])
+        self.assertEqual(["status_tracker.submit_result"] * 2, [result["name"] for result in output["benchmarks"]])
@@ -0,0 +1,44 @@
+import unittest
+from datetime import datetime
+
+from freezegun import freeze_time
+
+from src.clock import Clock, VirtualClock
+
+
+class TestClock(unittest.TestCase):
+    @freeze_time("2018-08-03")
+    def test_now(self):
+        self.assertEqual(datetime(2018, 8, 3), Clock().now())
+
+
+class TestVirtualClock(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(datetime(2018, 8, 3))
+
+    def test_starts_at_start(self):
+        self.assertEqual(datetime(2018, 8, 3), self.clock.now())
+        self.assertEqual(0, self.clock.monotonic())
+
+    def test_advance(self):
+        self.clock.advance(90.5)
+
+        self.assertEqual(datetime(2018, 8, 3, 0, 1, 30, 500000), self.clock.now())
+        self.assertEqual(90.5, self.clock.monotonic())
+
+    def test_advance_backwards(self):
+        with self.assertRaises(ValueError):
+            self.clock.advance(-1)
+
+    def test_advance_to(self):
+        self.clock.advance_to(datetime(2018, 8, 4))
+
+        self.assertEqual(datetime(2018, 8, 4), self.clock.now())
+        self.assertEqual(86400, self.clock.monotonic())
+
+    def test_advance_to_past_does_nothing(self):
+        self.clock.advance(60)
+
+        self.clock.advance_to(datetime(2018, 8, 3))
+
+        self.assertEqual(60, self.clock.monotonic())
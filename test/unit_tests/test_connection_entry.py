@@ -1,7 +1,8 @@
 import unittest
 from datetime import datetime
-from src.connection_entry import ConnectionEntry
+from src.connection_entry import ConnectionEntry, decode_entries, encode_entries, parse_time
 from src.status_tracker import Status, StatusChange
+from src.connection_tester import ProbeLatency
 
 
 class TestConnectionEntry(unittest.TestCase):
@@ -100,7 +101,8 @@ class TestConnectionEntry(unittest.TestCase):
         with self.assertRaises(ValueError) as ex:
             ConnectionEntry.from_json(input_json)
 
-        self.assertEqual("Dictionary '{dict}' contains key which is not; time, result, status or status_change."
+        self.assertEqual("Dictionary '{dict}' contains key which is not; time, result, status, status_change, target, "
+                         "dns_time, connect_time, total_time, status_code or first_byte_time."
                          .format(dict=input_json),
                          str(ex.exception))
 
@@ -141,3 +143,139 @@ class TestConnectionEntry(unittest.TestCase):
         second_json = ConnectionEntry.from_json(first_json).to_json()
 
         self.assertEqual(first_json, second_json)
+
+    def test_target_to_from_json_loop(self):
+        first_connection_entry = ConnectionEntry(datetime(2018, 8, 3),
+                                                 False,
+                                                 Status.WARNING,
+                                                 StatusChange.NEW_WARNING,
+                                                 "example.com:443")
+
+        json_entry = first_connection_entry.to_json()
+        second_connection_entry = ConnectionEntry.from_json(json_entry)
+
+        self.assertEqual("example.com:443", json_entry["target"])
+        self.assertEqual(first_connection_entry, second_connection_entry)
+
+    def test_from_json_without_target(self):
+        connection_entry = ConnectionEntry.from_json({
+            "time": str(datetime(2018, 8, 3)),
+            "result": True,
+            "status": Status.OK.name,
+            "status_change": StatusChange.NONE.name
+        })
+
+        self.assertIsNone(connection_entry.target)
+
+    def test_latency_to_from_json_loop(self):
+        first_connection_entry = ConnectionEntry(datetime(2018, 8, 3),
+                                                 False,
+                                                 Status.WARNING,
+                                                 StatusChange.NEW_WARNING,
+                                                 latency=ProbeLatency(0.015, None, 2.0))
+
+        json_entry = first_connection_entry.to_json()
+        second_connection_entry = ConnectionEntry.from_json(json_entry)
+
+        self.assertEqual(0.015, json_entry["dns_time"])
+        self.assertIsNone(json_entry["connect_time"])
+        self.assertEqual(first_connection_entry, second_connection_entry)
+
+    def test_from_json_without_latency(self):
+        connection_entry = ConnectionEntry.from_json({
+            "time": str(datetime(2018, 8, 3)),
+            "result": True,
+            "status": Status.OK.name,
+            "status_change": StatusChange.NONE.name
+        })
+
+        self.assertIsNone(connection_entry.latency)
+        self.assertNotIn("total_time", connection_entry.to_json())
+
+    def test_http_fields_to_from_json_loop(self):
+        first_connection_entry = ConnectionEntry(datetime(2018, 8, 3),
+                                                 False,
+                                                 Status.WARNING,
+                                                 StatusChange.NEW_WARNING,
+                                                 "http://example.com/",
+                                                 ProbeLatency(0.015, 0.02, 0.1),
+                                                 503,
+                                                 0.06)
+
+        json_entry = first_connection_entry.to_json()
+        second_connection_entry = ConnectionEntry.from_json(json_entry)
+
+        self.assertEqual(503, json_entry["status_code"])
+        self.assertEqual(0.06, json_entry["first_byte_time"])
+        self.assertEqual(first_connection_entry, second_connection_entry)
+        self.assertEqual([first_connection_entry], decode_entries(encode_entries([first_connection_entry])))
+
+    def test_from_json_without_http_fields(self):
+        connection_entry = ConnectionEntry.from_json({
+            "time": str(datetime(2018, 8, 3)),
+            "result": True,
+            "status": Status.OK.name,
+            "status_change": StatusChange.NONE.name,
+            "total_time": 0.1
+        })
+
+        self.assertIsNone(connection_entry.status_code)
+        self.assertIsNone(connection_entry.first_byte_time)
+        self.assertNotIn("status_code", connection_entry.to_json())
+
+    def test_no_instance_dictionary(self):
+        connection_entry = ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE)
+
+        with self.assertRaises(AttributeError):
+            connection_entry.extra = 1
+
+    def test_from_json_unknown_status(self):
+        input_json = {
+            "time": str(datetime(2018, 8, 3)),
+            "result": True,
+            "status": "BROKEN",
+            "status_change": StatusChange.NONE.name
+        }
+
+        with self.assertRaises(ValueError):
+            ConnectionEntry.from_json(input_json)
+
+    def test_encode_decode_entries_loop(self):
+        entries = [ConnectionEntry(datetime(2018, 8, 3, 1, 2, 3, 456789), True, Status.OK, StatusChange.NONE),
+                   ConnectionEntry(datetime(2018, 8, 3, 1, 2, 4), False, Status.WARNING, StatusChange.NEW_WARNING,
+                                   "example.com", ProbeLatency(0.01, None, 2.0)),
+                   ConnectionEntry(datetime(2018, 8, 3, 1, 2, 5), False, Status.ERROR, StatusChange.NEW_ERROR,
+                                   latency=ProbeLatency())]
+
+        json_entries = encode_entries(entries)
+
+        self.assertEqual([entry.to_json() for entry in entries], json_entries)
+        self.assertEqual(entries, decode_entries(json_entries))
+
+    def test_decode_entries_rejects_malformed(self):
+        valid = ConnectionEntry(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE).to_json()
+        malformed = [
+            {key: value for key, value in valid.items() if key != "status"},
+            dict(valid, extra=1),
+            dict(valid, status="BROKEN"),
+            dict(valid, time="03/08/2018")
+        ]
+
+        for json_entry in malformed:
+            with self.subTest(json_entry=json_entry):
+                with self.assertRaises(ValueError):
+                    decode_entries([valid, json_entry])
+
+
+class TestParseTime(unittest.TestCase):
+    def test_round_trip(self):
+        for time in [datetime(2018, 8, 3), datetime(2018, 8, 3, 23, 59, 59, 1), datetime(1, 1, 1, 0, 0, 0, 999999)]:
+            with self.subTest(time=time):
+                self.assertEqual(time, parse_time(str(time)))
+
+    def test_invalid(self):
+        for time in ["", "2018-08-03", "2018-08-03T00:00:00", "2018-08-03 00:00:00.5", "2018-08-03 00:00:60",
+                     "2018-13-03 00:00:00", "2018-08-03 00:00:00+01:00", "2018-08-03 0a:00:00", "2018-08-03 +1:00:00"]:
+            with self.subTest(time=time):
+                with self.assertRaises(ValueError):
+                    parse_time(time)
@@ -1,5 +1,9 @@
+import socket
 import unittest
-from src.connection_tester import ConnectionTester
+from unittest.mock import patch
+
+from src.connection_tester import ConnectionTester, ProbeOutcome
+from src.dns_cache import DnsCache
 
 
 class TestConnectionTester(unittest.TestCase):
@@ -11,3 +15,68 @@ class TestConnectionTester(unittest.TestCase):
 
         self.assertTrue(have_connection, "No connection established, this could be due to your connection being down or"
                                          "a software bug.")
+
+
+class TestConnectionTesterDetailedResults(unittest.TestCase):
+    def setUp(self):
+        self.resolve_patcher = patch("src.connection_tester.socket.gethostbyname", return_value="10.0.0.1")
+        self.addCleanup(self.resolve_patcher.stop)
+        self.mock_gethostbyname = self.resolve_patcher.start()
+
+        self.connect_patcher = patch("src.connection_tester.socket.create_connection")
+        self.addCleanup(self.connect_patcher.stop)
+        self.mock_create_connection = self.connect_patcher.start()
+
+        self.connection_tester = ConnectionTester("example.com")
+
+    def test_success(self):
+        result = self.connection_tester.run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.SUCCESS, result.outcome)
+        self.assertTrue(result.passed)
+        self.assertIsNotNone(result.latency.dns_time)
+        self.assertIsNotNone(result.latency.connect_time)
+        self.assertGreaterEqual(result.latency.total_time, result.latency.connect_time)
+        self.assertTrue(self.connection_tester.run_test())
+        self.mock_create_connection.assert_called_with(("10.0.0.1", 80), 2)
+
+    def test_port(self):
+        ConnectionTester("example.com", port=8080).run_detailed_test()
+
+        self.mock_create_connection.assert_called_with(("10.0.0.1", 8080), 2)
+
+    def test_socket_closed(self):
+        self.connection_tester.run_test()
+
+        self.mock_create_connection.return_value.__exit__.assert_called()
+
+    def test_dns_failure(self):
+        self.mock_gethostbyname.side_effect = socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+        result = self.connection_tester.run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.DNS_FAILURE, result.outcome)
+        self.assertIsNone(result.latency.dns_time)
+        self.assertIsNotNone(result.latency.total_time)
+        self.assertFalse(self.connection_tester.run_test())
+        self.mock_create_connection.assert_not_called()
+
+    def test_connection_failure(self):
+        self.mock_create_connection.side_effect = ConnectionRefusedError()
+
+        result = self.connection_tester.run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.CONNECTION_FAILURE, result.outcome)
+        self.assertIsNotNone(result.latency.dns_time)
+        self.assertIsNone(result.latency.connect_time)
+        self.assertFalse(self.connection_tester.run_test())
+
+    def test_shared_dns_cache(self):
+        dns_cache = DnsCache()
+        first_tester = ConnectionTester("example.com", dns_cache)
+        second_tester = ConnectionTester("example.com", dns_cache)
+
+        first_tester.run_test()
+        second_tester.run_test()
+
+        self.mock_gethostbyname.assert_called_once_with("example.com")
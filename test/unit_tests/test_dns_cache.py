@@ -0,0 +1,64 @@
+import socket
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.dns_cache import DnsCache
+
+
+class TestDnsCache(unittest.TestCase):
+    def setUp(self):
+        self.patcher = patch("src.dns_cache.time.monotonic", return_value=100.0)
+        self.addCleanup(self.patcher.stop)
+        self.mock_monotonic = self.patcher.start()
+
+        self.resolver = MagicMock(return_value="10.0.0.1")
+        self.dns_cache = DnsCache(ttl=60, negative_ttl=10, max_size=2, resolver=self.resolver)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            DnsCache(max_size=0)
+
+    def test_resolution_cached(self):
+        self.assertEqual("10.0.0.1", self.dns_cache.resolve("example.com"))
+        self.assertEqual("10.0.0.1", self.dns_cache.resolve("example.com"))
+
+        self.resolver.assert_called_once_with("example.com")
+
+    def test_resolution_expires(self):
+        self.dns_cache.resolve("example.com")
+
+        self.mock_monotonic.return_value = 160.0
+        self.resolver.return_value = "10.0.0.2"
+
+        self.assertEqual("10.0.0.2", self.dns_cache.resolve("example.com"))
+        self.assertEqual(2, self.resolver.call_count)
+
+    def test_failure_cached(self):
+        self.resolver.side_effect = socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+        with self.assertRaises(socket.gaierror):
+            self.dns_cache.resolve("example.invalid")
+        with self.assertRaises(socket.gaierror):
+            self.dns_cache.resolve("example.invalid")
+        self.resolver.assert_called_once_with("example.invalid")
+
+        # Failures are kept for less time than successes.
+        self.mock_monotonic.return_value = 110.0
+        self.resolver.side_effect = None
+        self.assertEqual("10.0.0.1", self.dns_cache.resolve("example.invalid"))
+
+    def test_least_recently_used_removed(self):
+        self.dns_cache.resolve("first.com")
+        self.dns_cache.resolve("second.com")
+        self.dns_cache.resolve("first.com")
+        self.dns_cache.resolve("third.com")
+
+        self.assertEqual(2, len(self.dns_cache))
+        self.assertEqual("10.0.0.1", self.dns_cache.get("first.com"))
+        self.assertIsNone(self.dns_cache.get("second.com"))
+
+    def test_clear(self):
+        self.dns_cache.resolve("example.com")
+        self.dns_cache.clear()
+
+        self.assertIsNone(self.dns_cache.get("example.com"))
@@ -0,0 +1,186 @@
+import socket
+import socketserver
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock, patch
+
+from src.connection_tester import ProbeOutcome
+from src.http_connection_tester import HttpConnectionPool, HttpConnectionTester, HttpUrl, PoolKey, parse_http_url
+
+
+class ProbeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_HEAD(self):
+        self.respond(b"")
+
+    def do_GET(self):
+        self.respond(b"hello")
+
+    def respond(self, body: bytes):
+        self.server.requests.append((self.command, self.path))
+        self.send_response(self.server.response_status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        # Closing without telling the client leaves it holding a connection which has gone stale.
+        self.close_connection = self.server.drop_connections
+
+    def log_message(self, *args):
+        pass
+
+
+class ProbeServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestHttpConnectionTester(unittest.TestCase):
+    def setUp(self):
+        self.server = ProbeServer(("127.0.0.1", 0), ProbeHandler)
+        self.server.connections = 0
+        self.server.requests = []
+        self.server.response_status = 200
+        self.server.drop_connections = False
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = "http://localhost:{port}/health?full=1".format(port=self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_success(self):
+        tester = HttpConnectionTester(self.url)
+        self.addCleanup(tester.close)
+
+        result = tester.run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.SUCCESS, result.outcome)
+        self.assertEqual(200, result.status_code)
+        self.assertIsNotNone(result.latency.dns_time)
+        self.assertIsNotNone(result.latency.connect_time)
+        self.assertGreaterEqual(result.latency.total_time, result.first_byte_time)
+        self.assertEqual([("HEAD", "/health?full=1")], self.server.requests)
+        self.assertEqual("localhost", tester.remote_to_check)
+
+    def test_connection_reused(self):
+        tester = HttpConnectionTester(self.url, method="GET")
+        self.addCleanup(tester.close)
+
+        results = [tester.run_detailed_test() for _ in range(3)]
+
+        self.assertTrue(all(result.passed for result in results))
+        self.assertIsNotNone(results[0].latency.connect_time)
+        self.assertIsNone(results[1].latency.connect_time)
+        self.assertIsNone(results[2].latency.connect_time)
+        self.assertEqual(1, self.server.connections)
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_stale_connection_replaced(self):
+        self.server.drop_connections = True
+        tester = HttpConnectionTester(self.url)
+        self.addCleanup(tester.close)
+
+        first_result = tester.run_detailed_test()
+        second_result = tester.run_detailed_test()
+
+        self.assertTrue(first_result.passed)
+        self.assertTrue(second_result.passed)
+        self.assertIsNotNone(second_result.latency.connect_time)
+        self.assertEqual(2, self.server.connections)
+
+    def test_unexpected_status(self):
+        self.server.response_status = 503
+        tester = HttpConnectionTester(self.url)
+        self.addCleanup(tester.close)
+
+        result = tester.run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.HTTP_FAILURE, result.outcome)
+        self.assertEqual(503, result.status_code)
+        self.assertFalse(tester.run_test())
+
+    def test_expected_statuses(self):
+        self.server.response_status = 404
+        tester = HttpConnectionTester(self.url, expected_statuses=[404])
+        self.addCleanup(tester.close)
+
+        self.assertTrue(tester.run_test())
+
+    def test_connection_failure(self):
+        with socket.socket() as unused_socket:
+            unused_socket.bind(("127.0.0.1", 0))
+            port = unused_socket.getsockname()[1]
+        tester = HttpConnectionTester("http://127.0.0.1:{port}/".format(port=port))
+
+        result = tester.run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.CONNECTION_FAILURE, result.outcome)
+        self.assertIsNone(result.status_code)
+        self.assertIsNotNone(result.latency.dns_time)
+
+    @patch("src.connection_tester.socket.gethostbyname",
+           side_effect=socket.gaierror(socket.EAI_NONAME, "Name or service not known"))
+    def test_dns_failure(self, mock_gethostbyname):
+        result = HttpConnectionTester(self.url).run_detailed_test()
+
+        self.assertEqual(ProbeOutcome.DNS_FAILURE, result.outcome)
+        self.assertEqual(0, self.server.connections)
+
+    def test_invalid_url(self):
+        with self.assertRaises(ValueError):
+            HttpConnectionTester("ftp://example.com/")
+
+    def test_https_port(self):
+        self.assertEqual(443, HttpConnectionTester("https://example.com/").port)
+
+
+class TestParseHttpUrl(unittest.TestCase):
+    def test_parse_http_url(self):
+        self.assertEqual(HttpUrl("http", "example.com", 80, "example.com", "/"), parse_http_url("http://example.com"))
+        self.assertEqual(HttpUrl("https", "example.com", 8443, "Example.com:8443", "/file?size=1"),
+                         parse_http_url("https://Example.com:8443/file?size=1"))
+
+    def test_invalid_url(self):
+        for url in ["ftp://example.com/", "http:///path", "example.com"]:
+            with self.assertRaises(ValueError):
+                parse_http_url(url)
+
+
+class TestHttpConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = HttpConnectionPool(max_idle_per_host=1)
+        self.key = PoolKey("http", "example.com", 80)
+
+    def test_acquire_released_connection(self):
+        connection = MagicMock()
+        self.pool.release(self.key, "10.0.0.1", connection)
+
+        self.assertIs(connection, self.pool.acquire(self.key, "10.0.0.1"))
+        self.assertIsNone(self.pool.acquire(self.key, "10.0.0.1"))
+
+    def test_new_address_drops_connection(self):
+        connection = MagicMock()
+        self.pool.release(self.key, "10.0.0.1", connection)
+
+        self.assertIsNone(self.pool.acquire(self.key, "10.0.0.2"))
+        connection.close.assert_called_once_with()
+
+    def test_extra_connections_closed(self):
+        connections = [MagicMock(), MagicMock()]
+        for connection in connections:
+            self.pool.release(self.key, "10.0.0.1", connection)
+
+        self.assertEqual(1, self.pool.idle_connections(self.key))
+        connections[1].close.assert_called_once_with()
+
+        self.pool.close()
+        connections[0].close.assert_called_once_with()
+        self.assertEqual(0, self.pool.idle_connections(self.key))
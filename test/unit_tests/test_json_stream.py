@@ -0,0 +1,59 @@
+import io
+import unittest
+
+from src.json_stream import JsonArrayParser
+
+json_data = '[ {"time": "2018-08-03 20:35:43", "note": "café"}, 12, [1, 2], 3.5 ]'.encode("utf-8")
+
+
+class TestJsonArrayParser(unittest.TestCase):
+    def test_parses_values(self):
+        values = list(JsonArrayParser(io.BytesIO(json_data)))
+
+        self.assertEqual([{"time": "2018-08-03 20:35:43", "note": "café"}, 12, [1, 2], 3.5], values)
+
+    def test_parses_values_split_across_chunks(self):
+        values = list(JsonArrayParser(io.BytesIO(json_data), chunk_size=1))
+
+        self.assertEqual([{"time": "2018-08-03 20:35:43", "note": "café"}, 12, [1, 2], 3.5], values)
+
+    def test_empty_array(self):
+        self.assertEqual([], list(JsonArrayParser(io.BytesIO(b" [ ] "))))
+
+    def test_offset_is_after_each_value(self):
+        parser = JsonArrayParser(io.BytesIO(json_data), chunk_size=4)
+        offsets = []
+        for _ in parser:
+            offsets.append(parser.offset)
+
+        self.assertEqual([b"}", b"2", b"]", b"5"], [json_data[offset - 1:offset] for offset in offsets])
+
+    def test_resume_from_offset(self):
+        parser = JsonArrayParser(io.BytesIO(json_data), chunk_size=4)
+        iterator = iter(parser)
+        next(iterator)
+        next(iterator)
+
+        resumed = JsonArrayParser(io.BytesIO(json_data), resume_offset=parser.offset, chunk_size=4)
+
+        self.assertEqual([[1, 2], 3.5], list(resumed))
+
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError) as ex:
+            list(JsonArrayParser(io.BytesIO(b'{"time": 1}')))
+
+        self.assertEqual("Expected '[' at byte 0.", str(ex.exception))
+
+    def test_missing_separator(self):
+        with self.assertRaises(ValueError) as ex:
+            list(JsonArrayParser(io.BytesIO(b"[1 2]")))
+
+        self.assertEqual("Expected ',' or ']' at byte 3.", str(ex.exception))
+
+    def test_truncated_file(self):
+        with self.assertRaises(ValueError):
+            list(JsonArrayParser(io.BytesIO(b'[{"time": 1}, {"ti'), chunk_size=4))
+
+    def test_value_too_large(self):
+        with self.assertRaises(ValueError):
+            list(JsonArrayParser(io.BytesIO(b'["' + b"a" * 100), chunk_size=8, max_value_size=16))
@@ -0,0 +1,155 @@
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from src.connection_tester import ProbeLatency, ProbeOutcome, ProbeResult
+from src.metrics import MetricsRegistry, MetricsServer, MonitorMetrics, format_labels
+from src.status_tracker import Status, StatusChange
+from src.throughput_tester import ThroughputResult
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter(self):
+        counter = self.registry.counter("tests_total", "Tests run.", ("result",))
+        counter.labels("success").inc()
+        counter.labels("success").inc(2)
+        counter.labels("failure").inc()
+
+        self.assertEqual("# HELP tests_total Tests run.\n"
+                         "# TYPE tests_total counter\n"
+                         "tests_total{result=\"success\"} 3.0\n"
+                         "tests_total{result=\"failure\"} 1.0\n", self.registry.render())
+
+    def test_gauge(self):
+        gauge = self.registry.gauge("depth", "Queue depth.")
+        gauge.set(5)
+        gauge.labels().dec(2)
+
+        self.assertIn("depth 3.0\n", self.registry.render())
+
+        gauge.labels().set_function(lambda: 7)
+        self.assertIn("depth 7.0\n", self.registry.render())
+
+    def test_histogram(self):
+        histogram = self.registry.histogram("duration_seconds", "Durations.", ("target",), buckets=(1, 0.1))
+        child = histogram.labels("a")
+        for value in [0.05, 0.1, 0.5, 2]:
+            child.observe(value)
+
+        self.assertEqual("# HELP duration_seconds Durations.\n"
+                         "# TYPE duration_seconds histogram\n"
+                         "duration_seconds_bucket{target=\"a\",le=\"0.1\"} 2\n"
+                         "duration_seconds_bucket{target=\"a\",le=\"1.0\"} 3\n"
+                         "duration_seconds_bucket{target=\"a\",le=\"+Inf\"} 4\n"
+                         "duration_seconds_sum{target=\"a\"} 2.65\n"
+                         "duration_seconds_count{target=\"a\"} 4\n", self.registry.render())
+
+    def test_wrong_number_of_labels(self):
+        counter = self.registry.counter("tests_total", "Tests run.", ("result",))
+
+        with self.assertRaises(ValueError):
+            counter.labels()
+
+    def test_duplicate_metric(self):
+        self.registry.counter("tests_total", "Tests run.")
+
+        with self.assertRaises(ValueError):
+            self.registry.gauge("tests_total", "Tests run.")
+
+    def test_label_escaping(self):
+        self.assertEqual("{target=\"a\\\"b\\\\c\\nd\"}", format_labels(("target",), ("a\"b\\c\nd",)))
+
+    def test_concurrent_increments(self):
+        counter = self.registry.counter("tests_total", "Tests run.")
+
+        def increment():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(4000, counter.labels().value)
+
+
+class TestMonitorMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MonitorMetrics(MetricsRegistry())
+
+    def test_record_test(self):
+        self.metrics.record_test("example.com", ProbeResult(ProbeOutcome.SUCCESS, ProbeLatency(0.01, 0.02, 0.03)),
+                                 Status.OK, StatusChange.NONE)
+        self.metrics.record_test("example.com", ProbeResult(ProbeOutcome.DNS_FAILURE, ProbeLatency(total_time=2)),
+                                 Status.WARNING, StatusChange.NEW_WARNING)
+
+        self.assertEqual(1, self.metrics.probes.labels("example.com", "success").value)
+        self.assertEqual(1, self.metrics.probes.labels("example.com", "failure").value)
+        self.assertEqual(2, self.metrics.probe_duration.labels("example.com", "total").counts[-1] +
+                         sum(self.metrics.probe_duration.labels("example.com", "total").counts[:-1]))
+        self.assertEqual(1, sum(self.metrics.probe_duration.labels("example.com", "dns").counts))
+        self.assertEqual(0, self.metrics.status.labels("example.com", "OK").value)
+        self.assertEqual(1, self.metrics.status.labels("example.com", "WARNING").value)
+        self.assertEqual(1, self.metrics.status_changes.labels("example.com", "NEW_WARNING").value)
+
+        rendered = self.metrics.registry.render()
+        self.assertIn("internet_monitor_status{target=\"example.com\",status=\"WARNING\"} 1.0\n", rendered)
+        self.assertNotIn("change=\"NONE\"", rendered)
+
+    def test_record_http_test(self):
+        self.metrics.record_test("example.com", ProbeResult(ProbeOutcome.HTTP_FAILURE, ProbeLatency(0.01, None, 0.2),
+                                                            503, 0.15),
+                                 Status.WARNING, StatusChange.NEW_WARNING)
+
+        self.assertEqual(1, self.metrics.http_responses.labels("example.com", "503").value)
+        self.assertEqual(0.15, self.metrics.probe_duration.labels("example.com", "first_byte").sum)
+        self.assertEqual(0, sum(self.metrics.probe_duration.labels("example.com", "connect").counts))
+
+    def test_record_throughput(self):
+        self.metrics.record_throughput("example.com", ThroughputResult(ProbeOutcome.SUCCESS, 1000000, 2.5))
+        self.metrics.record_throughput("example.com", ThroughputResult(ProbeOutcome.CONNECTION_FAILURE))
+
+        self.assertEqual(400000, self.metrics.throughput.labels("example.com").value)
+        self.assertEqual(1, self.metrics.throughput_tests.labels("example.com", "success").value)
+        self.assertEqual(1, self.metrics.throughput_tests.labels("example.com", "failure").value)
+
+    def test_record_write_and_queue(self):
+        self.metrics.record_write("json_lines", "write", 0.002)
+        self.metrics.watch_queue("notifier", lambda: 12)
+
+        rendered = self.metrics.registry.render()
+        self.assertIn("internet_monitor_write_duration_seconds_count{writer=\"json_lines\",operation=\"write\"} 1\n",
+                      rendered)
+        self.assertIn("internet_monitor_queue_depth{queue=\"notifier\"} 12.0\n", rendered)
+
+
+class TestMetricsServer(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter("tests_total", "Tests run.").inc()
+        self.server = MetricsServer(self.registry, "127.0.0.1", 0)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_serves_metrics(self):
+        url = "http://127.0.0.1:{port}/metrics".format(port=self.server.port)
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertEqual(200, response.status)
+            self.assertEqual("text/plain; version=0.0.4; charset=utf-8", response.headers["Content-Type"])
+            self.assertEqual(self.registry.render(), response.read().decode("utf-8"))
+
+    def test_unknown_path(self):
+        url = "http://127.0.0.1:{port}/other".format(port=self.server.port)
+
+        with self.assertRaises(urllib.error.HTTPError) as ex:
+            urllib.request.urlopen(url, timeout=5)
+        self.assertEqual(404, ex.exception.code)
+        ex.exception.close()
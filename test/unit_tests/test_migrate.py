@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src import migrate
+from src.connection_entry import ConnectionEntry
+from src.notifiers.binary_entry_writer import BinaryEntryReader
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryWriter, JsonLinesEntryReader
+from src.notifiers.segmented_entry_writer import SegmentedEntryReader
+from src.notifiers.sqlite_entry_writer import SqliteEntryReader
+from src.status_tracker import Status, StatusChange
+
+start_time = datetime(2018, 8, 3)
+
+
+def make_entry(minutes: int) -> ConnectionEntry:
+    return ConnectionEntry(start_time + timedelta(minutes=minutes), minutes % 3 != 0, Status.OK, StatusChange.NONE)
+
+
+class TestMigrate(unittest.TestCase):
+    def setUp(self):
+        test_directory = os.path.dirname(os.path.realpath(__file__))
+        self.input_file = os.path.join(test_directory, "test_data.json")
+        self.output_file = os.path.join(test_directory, "test_data.jsonl")
+        self.state_file = os.path.join(test_directory, "test_data.migration")
+        self.output_directory = os.path.join(test_directory, "test_migrated_segments")
+
+        self.entries = [make_entry(minute) for minute in range(25)]
+        with open(self.input_file, "w") as input_data:
+            json.dump([entry.to_json() for entry in self.entries], input_data, indent=4)
+
+    def tearDown(self):
+        for file_path in [self.input_file, self.output_file, self.output_file + ".idx", self.state_file,
+                          self.output_file + ".migration", self.output_file + "-wal", self.output_file + "-shm"]:
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+        if os.path.isdir(self.output_directory):
+            shutil.rmtree(self.output_directory)
+
+    def read_output(self) -> list:
+        return list(JsonLinesEntryReader(self.output_file).read_entries())
+
+    def test_migrate(self):
+        state = migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file,
+                                batch_size=10)
+
+        self.assertEqual(self.entries, self.read_output())
+        self.assertEqual(25, state.entries)
+        self.assertEqual(25, migrate.MigrationState.load(self.state_file).output_entries)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file, batch_size=0)
+
+    def test_resumes_after_interruption(self):
+        writer = JsonLinesEntryWriter(self.output_file)
+        real_write = writer.write_new_entries
+        writes = []
+
+        def interrupted_write(entries):
+            writes.append(entries)
+            if len(writes) > 1:
+                raise KeyboardInterrupt
+            real_write(entries)
+
+        with patch.object(writer, "write_new_entries", side_effect=interrupted_write):
+            with self.assertRaises(KeyboardInterrupt):
+                migrate.migrate(self.input_file, writer, self.state_file, batch_size=10)
+
+        self.assertEqual(10, migrate.MigrationState.load(self.state_file).entries)
+        self.assertEqual(10, len(self.read_output()))
+
+        migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file, 10, batch_size=10)
+
+        self.assertEqual(self.entries, self.read_output())
+
+    def test_entries_written_before_state_saved_are_not_duplicated(self):
+        real_save = migrate.MigrationState.save
+        saves = []
+
+        def interrupted_save(state, state_file):
+            saves.append(state.entries)
+            if len(saves) > 1:
+                raise KeyboardInterrupt
+            real_save(state, state_file)
+
+        with patch("src.migrate.MigrationState.save", autospec=True, side_effect=interrupted_save):
+            with self.assertRaises(KeyboardInterrupt):
+                migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file,
+                                batch_size=10)
+
+        # The second batch reached the output but the state was never saved after it.
+        self.assertEqual(10, migrate.MigrationState.load(self.state_file).output_entries)
+        self.assertEqual(20, len(self.read_output()))
+
+        migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file, 20, batch_size=10)
+
+        self.assertEqual(self.entries, self.read_output())
+
+    def test_resume_checks_input_file(self):
+        migrate.MigrationState("another_file.json", 0).save(self.state_file)
+
+        with self.assertRaises(ValueError):
+            migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file)
+
+    def test_invalid_entry(self):
+        with open(self.input_file, "w") as input_data:
+            json.dump([self.entries[0].to_json(), {"time": "not a time"}, self.entries[1].to_json()], input_data)
+
+        with self.assertRaises(ValueError):
+            migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file)
+
+    def test_skip_invalid_entry(self):
+        with open(self.input_file, "w") as input_data:
+            json.dump([self.entries[0].to_json(), {"time": "not a time"}, self.entries[1].to_json()], input_data)
+
+        migrate.migrate(self.input_file, JsonLinesEntryWriter(self.output_file), self.state_file, skip_invalid=True)
+
+        self.assertEqual(self.entries[:2], self.read_output())
+
+    def test_main_jsonl(self):
+        self.assertEqual(0, migrate.main([self.input_file, "jsonl", self.output_file, "--batch-size", "7"]))
+
+        self.assertEqual(self.entries, self.read_output())
+        self.assertTrue(os.path.isfile(self.output_file + ".migration"))
+
+        # Running again finds the migration already finished.
+        self.assertEqual(0, migrate.main([self.input_file, "jsonl", self.output_file]))
+        self.assertEqual(self.entries, self.read_output())
+
+    def test_main_binary(self):
+        self.assertEqual(0, migrate.main([self.input_file, "binary", self.output_file,
+                                          "--state-file", self.state_file]))
+
+        with BinaryEntryReader(self.output_file) as reader:
+            self.assertEqual(self.entries, list(reader.read_entries()))
+
+    def test_main_segmented(self):
+        self.assertEqual(0, migrate.main([self.input_file, "segmented", self.output_directory,
+                                          "--state-file", self.state_file]))
+
+        self.assertEqual(self.entries, list(SegmentedEntryReader(self.output_directory).read_entries()))
+
+    def test_main_sqlite(self):
+        self.assertEqual(0, migrate.main([self.input_file, "sqlite", self.output_file,
+                                          "--state-file", self.state_file, "--batch-size", "10"]))
+
+        with SqliteEntryReader(self.output_file) as reader:
+            self.assertEqual(self.entries, list(reader.read_entries()))
+
+    def test_main_invalid_input(self):
+        with open(self.input_file, "w") as input_data:
+            input_data.write("[{}")
+
+        self.assertEqual(1, migrate.main([self.input_file, "jsonl", self.output_file,
+                                          "--state-file", self.state_file]))
+
+    def test_main_failure_closes_output(self):
+        with open(self.input_file, "w") as input_data:
+            json.dump([entry.to_json() for entry in self.entries[:12]] + [{}], input_data)
+
+        with self.assertLogs("src.migrate", "ERROR") as logs:
+            self.assertEqual(1, migrate.main([self.input_file, "sqlite", self.output_file,
+                                              "--state-file", self.state_file, "--batch-size", "10"]))
+
+        # The writer was closed, so SQLite checkpointed and removed its write-ahead log.
+        self.assertFalse(os.path.exists(self.output_file + "-wal"))
+        self.assertIn("holds the first 10 entries", logs.output[-1])
+        with SqliteEntryReader(self.output_file) as reader:
+            self.assertEqual(self.entries[:10], list(reader.read_entries()))
+
+    def test_main_binary_rejects_targets(self):
+        entries = self.entries[:12] + [ConnectionEntry(start_time, True, Status.OK, StatusChange.NONE, "router")]
+        with open(self.input_file, "w") as input_data:
+            json.dump([entry.to_json() for entry in entries], input_data)
+
+        self.assertEqual(1, migrate.main([self.input_file, "binary", self.output_file,
+                                          "--state-file", self.state_file, "--batch-size", "10"]))
+
+        with BinaryEntryReader(self.output_file) as reader:
+            self.assertEqual(entries[:10], list(reader.read_entries()))
@@ -1,33 +1,21 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from freezegun import freeze_time
 from datetime import datetime, timedelta
-from apscheduler.schedulers.blocking import BaseScheduler
 from parameterized import parameterized
 
 from src.status_tracker import Status, StatusChange
+from src.connection_tester import ProbeOutcome, ProbeLatency, ProbeResult
 
+from test.mocks.mock_scheduler import MockScheduler
 from test.mocks.mock_connection_tester import MockConnectionTester
 from test.mocks.mock_status_tracker import StatusTracker
 from test.mocks.notifiers.mock_entry_writer_notifier import MockEntryWriterNotifier
 
-from src.monitor import Monitor, REQUIRED_CONFIG
-
-
-class MockScheduler(BaseScheduler):
-    def __init__(self, *args, **kwargs):
-        super(BaseScheduler, self).__init__(*args, **kwargs)
-
-        # Mock out functions
-        self.shutdown = MagicMock()
-        self.wakeup = MagicMock()
-        self.add_job = MagicMock()
-
-    def wakeup(self):
-        pass
-
-    def shutdown(self, wait=True):
-        pass
+from src.metrics import MetricsRegistry, MonitorMetrics
+from src.monitor import Monitor, REQUIRED_CONFIG, OPTIONAL_CONFIG, JOB_ID, THROUGHPUT_JOB_ID
+from src.throughput_entry import ThroughputEntry
+from src.throughput_tester import ThroughputResult
 
 
 class TestMonitorInitialisation(unittest.TestCase):
@@ -119,9 +107,48 @@ class TestMonitorInitialisation(unittest.TestCase):
                     monitor_config)
 
         self.assertEqual("Dictionary '{dict}' contains key which is not; {required}."
-                         .format(dict=monitor_config, required=REQUIRED_CONFIG),
+                         .format(dict=monitor_config, required=REQUIRED_CONFIG + OPTIONAL_CONFIG),
                          str(ex.exception))
 
+    def test_optional_parameters(self):
+        monitor_config = {
+            "test_interval": 40,
+            "retry_interval": 5,
+            "error_interval": 10,
+            "scheduling_mode": "persistent",
+            "jitter": 2,
+            "late_threshold": 0.5
+        }
+
+        monitor = Monitor(self.mock_scheduler,
+                          self.mock_tester,
+                          self.mock_status_tracker,
+                          self.mock_notifier,
+                          monitor_config)
+
+        self.assertEqual(monitor._config, monitor_config)
+
+    @parameterized.expand([
+        ("unknown_scheduling_mode", "scheduling_mode", "cron"),
+        ("negative_jitter", "jitter", -1),
+        ("negative_profile_runs", "profile_runs", -1),
+        ("zero_throughput_interval", "throughput_interval", 0)
+    ])
+    def test_invalid_optional_parameter(self, name: str, key: str, value):
+        monitor_config = {
+            "test_interval": 40,
+            "retry_interval": 5,
+            "error_interval": 10,
+            key: value
+        }
+
+        with self.assertRaises(ValueError):
+            Monitor(self.mock_scheduler,
+                    self.mock_tester,
+                    self.mock_status_tracker,
+                    self.mock_notifier,
+                    monitor_config)
+
 
 class TestMonitorRunTest(unittest.TestCase):
     def setUp(self):
@@ -144,15 +171,18 @@ class TestMonitorRunTest(unittest.TestCase):
     # Run tests with various different returns (e.g. new_error etc).
 
     def generic_run_test(self, test_result: bool, status_change: StatusChange, status: Status, interval_type: str):
-        self.mock_tester.run_test = MagicMock(return_value=test_result)
+        latency = ProbeLatency(0.01, 0.02, 0.03)
+        outcome = ProbeOutcome.SUCCESS if test_result else ProbeOutcome.CONNECTION_FAILURE
+        self.mock_tester.run_detailed_test = MagicMock(return_value=ProbeResult(outcome, latency))
         self.mock_status_tracker.submit_result = MagicMock(return_value=status_change)
         self.mock_status_tracker._status = status
 
         self.monitor.run_test()
 
-        self.mock_tester.run_test.assert_called()
+        self.mock_tester.run_detailed_test.assert_called()
         self.mock_status_tracker.submit_result.assert_called_with(test_result)
-        self.mock_notifier.notify.assert_called_with(datetime(2018, 8, 3), test_result, status, status_change)
+        self.mock_notifier.notify.assert_called_with(datetime(2018, 8, 3), test_result, status, status_change,
+                                                     latency=latency, status_code=None, first_byte_time=None)
         new_run_date = datetime(2018, 8, 3) + timedelta(seconds=self.monitor_config[interval_type])
         self.mock_scheduler.add_job.assert_called_with(self.monitor.run_test, "date", run_date=new_run_date)
 
@@ -197,3 +227,199 @@ class TestMonitorRunTest(unittest.TestCase):
                                                                           name: str,
                                                                           status_change: StatusChange):
         self.generic_run_test(False, status_change, Status.ERROR, "error_interval")
+
+    @freeze_time("2018-08-03")
+    def test_run_test_adds_jitter(self):
+        self.monitor._config["jitter"] = 4
+        self.mock_status_tracker.submit_result = MagicMock(return_value=StatusChange.NONE)
+        self.mock_status_tracker._status = Status.OK
+
+        with patch.object(self.monitor._random, "uniform", return_value=3.0) as mock_uniform:
+            self.monitor.run_test()
+
+        mock_uniform.assert_called_with(0, 4)
+        self.mock_scheduler.add_job.assert_called_with(self.monitor.run_test, "date",
+                                                       run_date=datetime(2018, 8, 3, 0, 0, 43))
+
+    @freeze_time("2018-08-03")
+    def test_run_test_passes_on_http_details(self):
+        latency = ProbeLatency(0.01, 0.02, 0.05)
+        self.mock_tester.run_detailed_test = MagicMock(return_value=ProbeResult(ProbeOutcome.HTTP_FAILURE, latency,
+                                                                                503, 0.04))
+        self.mock_status_tracker.submit_result = MagicMock(return_value=StatusChange.NONE)
+        self.mock_status_tracker._status = Status.WARNING
+
+        self.monitor.run_test()
+
+        self.mock_notifier.notify.assert_called_with(datetime(2018, 8, 3), False, Status.WARNING, StatusChange.NONE,
+                                                     latency=latency, status_code=503, first_byte_time=0.04)
+
+    @freeze_time("2018-08-03")
+    def test_run_test_records_metrics(self):
+        metrics = MonitorMetrics(MetricsRegistry())
+        self.mock_tester.remote_to_check = "example.com"
+        self.mock_tester.run_detailed_test = MagicMock(return_value=ProbeResult(ProbeOutcome.SUCCESS,
+                                                                                ProbeLatency(0.01, 0.02, 0.03)))
+        self.mock_status_tracker.submit_result = MagicMock(return_value=StatusChange.NONE)
+        self.mock_status_tracker._status = Status.OK
+        monitor = Monitor(self.mock_scheduler,
+                          self.mock_tester,
+                          self.mock_status_tracker,
+                          self.mock_notifier,
+                          self.monitor_config,
+                          metrics)
+
+        monitor.run_test()
+
+        self.assertEqual(1, metrics.probes.labels("example.com", "success").value)
+        self.assertEqual(1, metrics.status.labels("example.com", "OK").value)
+        for phase in ("resolve", "connect", "probe", "status_tracking", "notify", "reschedule", "run"):
+            self.assertEqual(1, sum(metrics.run_phase_duration.labels(phase).counts), phase)
+        self.assertEqual(0.01, metrics.run_phase_duration.labels("resolve").sum)
+
+    @freeze_time("2018-08-03")
+    def test_run_test_runs_through_profiler(self):
+        profiler = MagicMock()
+        self.mock_status_tracker.submit_result = MagicMock(return_value=StatusChange.NONE)
+        self.mock_status_tracker._status = Status.OK
+        monitor_config = dict(self.monitor_config, profile_runs=3)
+        monitor = Monitor(self.mock_scheduler,
+                          self.mock_tester,
+                          self.mock_status_tracker,
+                          self.mock_notifier,
+                          monitor_config,
+                          profiler=profiler)
+
+        monitor.run_test()
+
+        profiler.request.assert_called_once_with(3)
+        profiler.run.assert_called_once_with(monitor._run_test)
+
+
+class TestMonitorThroughput(unittest.TestCase):
+    def setUp(self):
+        self.mock_scheduler = MockScheduler()
+        self.throughput_tester = MagicMock()
+        self.throughput_tester.remote_to_check = "example.com"
+        self.throughput_tester.run_throughput_test.return_value = ThroughputResult(ProbeOutcome.SUCCESS, 1000000, 2.5)
+        self.throughput_writer = MagicMock()
+        self.metrics = MonitorMetrics(MetricsRegistry())
+        self.monitor = Monitor(self.mock_scheduler,
+                               MockConnectionTester(),
+                               StatusTracker(),
+                               MockEntryWriterNotifier(),
+                               {"test_interval": 40, "retry_interval": 5, "error_interval": 10,
+                                "throughput_interval": 1800},
+                               self.metrics,
+                               throughput_tester=self.throughput_tester,
+                               throughput_writer=self.throughput_writer)
+
+    def test_job_added(self):
+        self.mock_scheduler.add_job.assert_called_once_with(self.monitor.run_throughput_test, "interval",
+                                                            seconds=1800, id=THROUGHPUT_JOB_ID, coalesce=True,
+                                                            max_instances=1)
+
+    @freeze_time("2018-08-03")
+    def test_run_throughput_test(self):
+        self.monitor.run_throughput_test()
+
+        self.throughput_writer.write_new_entry.assert_called_once_with(
+            ThroughputEntry(datetime(2018, 8, 3), "example.com", True, 1000000, 2.5))
+        self.assertEqual(400000, self.metrics.throughput.labels("example.com").value)
+
+    def test_no_job_without_tester(self):
+        Monitor(self.mock_scheduler, MockConnectionTester(), StatusTracker(), MockEntryWriterNotifier(),
+                {"test_interval": 40, "retry_interval": 5, "error_interval": 10})
+
+        self.assertEqual(1, self.mock_scheduler.add_job.call_count)
+
+
+@freeze_time("2018-08-03")
+class TestMonitorPersistentScheduling(unittest.TestCase):
+    def setUp(self):
+        self.mock_scheduler = MockScheduler()
+        self.mock_tester = MockConnectionTester()
+        self.mock_status_tracker = StatusTracker()
+        self.mock_status_tracker.submit_result = MagicMock(return_value=StatusChange.NONE)
+        self.mock_status_tracker._status = Status.OK
+        self.mock_notifier = MockEntryWriterNotifier()
+        self.monitor_config = {
+            "test_interval": 40,
+            "retry_interval": 5,
+            "error_interval": 10,
+            "scheduling_mode": "persistent"
+        }
+
+        self.patcher = patch("src.monitor.time.monotonic", return_value=1000.0)
+        self.addCleanup(self.patcher.stop)
+        self.mock_monotonic = self.patcher.start()
+
+        self.monitor = Monitor(self.mock_scheduler,
+                               self.mock_tester,
+                               self.mock_status_tracker,
+                               self.mock_notifier,
+                               self.monitor_config)
+
+    def run_test_taking(self, start: float, duration: float):
+        self.mock_monotonic.side_effect = [start, start + duration]
+        self.monitor.run_test()
+
+    def test_first_run_adds_one_job(self):
+        self.run_test_taking(1000.0, 0.0)
+
+        self.mock_scheduler.add_job.assert_called_once_with(self.monitor.run_test, "interval", seconds=40, id=JOB_ID,
+                                                            next_run_time=datetime(2018, 8, 3, 0, 0, 40),
+                                                            coalesce=True, max_instances=1)
+        self.mock_scheduler.modify_job.assert_not_called()
+
+    def test_later_runs_modify_job(self):
+        self.run_test_taking(1000.0, 0.0)
+        self.run_test_taking(1040.0, 0.0)
+
+        self.assertEqual(1, self.mock_scheduler.add_job.call_count)
+        self.mock_scheduler.modify_job.assert_called_once_with(JOB_ID, next_run_time=datetime(2018, 8, 3, 0, 0, 40))
+
+    def test_test_duration_does_not_drift(self):
+        self.run_test_taking(1000.0, 3.0)
+        self.assertEqual(1040.0, self.monitor._due_time)
+
+        # Starting a little late and taking a while still keeps runs on the original 40 second grid.
+        self.run_test_taking(1040.5, 3.0)
+        self.assertEqual(1080.0, self.monitor._due_time)
+        self.mock_scheduler.modify_job.assert_called_with(JOB_ID, next_run_time=datetime(2018, 8, 3, 0, 0, 36, 500000))
+        self.assertEqual(0, self.monitor.late_runs)
+        self.assertEqual(0, self.monitor.missed_runs)
+
+    def test_interval_follows_status(self):
+        self.run_test_taking(1000.0, 0.0)
+        self.mock_status_tracker._status = Status.WARNING
+
+        self.run_test_taking(1040.0, 0.0)
+
+        self.assertEqual(1045.0, self.monitor._due_time)
+
+    def test_late_run_reported(self):
+        self.run_test_taking(1000.0, 0.0)
+
+        self.run_test_taking(1045.0, 0.0)
+
+        self.assertEqual(1, self.monitor.late_runs)
+        self.assertEqual(1080.0, self.monitor._due_time)
+
+    def test_missed_runs_reported_and_skipped(self):
+        self.run_test_taking(1000.0, 0.0)
+
+        self.run_test_taking(1040.0, 100.0)
+
+        self.assertEqual(2, self.monitor.missed_runs)
+        self.assertEqual(1160.0, self.monitor._due_time)
+
+    def test_jitter_does_not_accumulate(self):
+        self.monitor._config["jitter"] = 5
+
+        with patch.object(self.monitor._random, "uniform", return_value=2.0):
+            self.run_test_taking(1000.0, 0.0)
+            self.run_test_taking(1042.0, 0.0)
+
+        self.assertEqual(1082.0, self.monitor._due_time)
+        self.assertEqual(0, self.monitor.late_runs)
@@ -0,0 +1,156 @@
+import unittest
+from unittest.mock import MagicMock, call, patch
+from freezegun import freeze_time
+from datetime import datetime, timedelta
+
+from src.clock import VirtualClock
+from src.status_tracker import Status, StatusChange
+from src.async_connection_tester import AsyncConnectionTester
+from src.connection_tester import ProbeOutcome, ProbeLatency, ProbeResult
+from src.multi_target_monitor import MultiTargetMonitor, JOB_ID
+
+from test.mocks.mock_scheduler import MockScheduler
+from test.mocks.mock_connection_tester import MockConnectionTester
+from test.mocks.notifiers.mock_entry_writer_notifier import MockEntryWriterNotifier
+
+monitor_config = {
+    "test_interval": 40,
+    "retry_interval": 5,
+    "error_interval": 10
+}
+
+
+def make_result(result: bool) -> ProbeResult:
+    return ProbeResult(ProbeOutcome.SUCCESS if result else ProbeOutcome.CONNECTION_FAILURE)
+
+
+class TestMultiTargetMonitor(unittest.TestCase):
+    def setUp(self):
+        self.mock_scheduler = MockScheduler()
+        self.mock_notifier = MockEntryWriterNotifier()
+        self.monitor = MultiTargetMonitor(self.mock_scheduler, self.mock_notifier)
+
+    def add_mock_target(self, name: str, result: bool, first_run_time: datetime = datetime(2018, 8, 3)):
+        tester = MockConnectionTester()
+        tester.run_detailed_test = MagicMock(return_value=make_result(result))
+        self.monitor.add_target(name, tester, monitor_config, first_run_time=first_run_time)
+
+        return tester
+
+    def test_start_adds_single_interval_job(self):
+        self.monitor.start()
+
+        self.mock_scheduler.add_job.assert_called_once_with(self.monitor.run_due_tests, "interval", seconds=1,
+                                                            id=JOB_ID, coalesce=True, max_instances=1)
+
+    def test_add_target_validates_config(self):
+        with self.assertRaises(ValueError):
+            self.monitor.add_target("invalid", MockConnectionTester(), {"test_interval": 40})
+
+    def test_add_duplicate_target(self):
+        self.add_mock_target("first", True)
+
+        with self.assertRaises(ValueError):
+            self.add_mock_target("first", True)
+
+    @freeze_time("2018-08-03")
+    def test_run_due_tests_notifies_with_target(self):
+        self.add_mock_target("up", True)
+        self.add_mock_target("down", False)
+        self.add_mock_target("later", True, datetime(2018, 8, 4))
+
+        self.monitor.run_due_tests()
+
+        self.mock_notifier.notify.assert_has_calls([
+            call(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, "up", ProbeLatency(), None, None),
+            call(datetime(2018, 8, 3), False, Status.WARNING, StatusChange.NEW_WARNING, "down", ProbeLatency(),
+                 None, None)
+        ])
+        self.assertEqual(2, self.mock_notifier.notify.call_count)
+        self.assertEqual(Status.OK, self.monitor.get_target("up").status_tracker.status)
+        self.assertEqual(Status.UNKNOWN, self.monitor.get_target("later").status_tracker.status)
+
+    def test_targets_rescheduled_by_status(self):
+        up_tester = self.add_mock_target("up", True)
+        down_tester = self.add_mock_target("down", False)
+
+        with freeze_time("2018-08-03"):
+            self.monitor.run_due_tests()
+
+        # The failing target uses the retry interval, the passing one the test interval.
+        with freeze_time("2018-08-03 00:00:05"):
+            self.monitor.run_due_tests()
+        self.assertEqual(1, up_tester.run_detailed_test.call_count)
+        self.assertEqual(2, down_tester.run_detailed_test.call_count)
+
+        with freeze_time("2018-08-03 00:00:40"):
+            self.monitor.run_due_tests()
+        self.assertEqual(2, up_tester.run_detailed_test.call_count)
+        self.assertEqual(3, down_tester.run_detailed_test.call_count)
+
+    def test_runs_planned_from_due_time(self):
+        clock = VirtualClock(datetime(2018, 8, 3))
+        self.monitor = MultiTargetMonitor(self.mock_scheduler, self.mock_notifier, clock=clock)
+        tester = self.add_mock_target("up", True)
+
+        # Each tick comes a little after the target is due, which mustn't push back the runs after it.
+        for seconds in [0.9, 40.5, 79.9, 80.2]:
+            clock.advance_to(datetime(2018, 8, 3) + timedelta(seconds=seconds))
+            self.monitor.run_due_tests()
+
+        self.assertEqual(3, tester.run_detailed_test.call_count)
+        self.assertEqual(datetime(2018, 8, 3, 0, 0, 40, 500000), self.mock_notifier.notify.call_args_list[1][0][0])
+        self.assertEqual(datetime(2018, 8, 3, 0, 2), self.monitor.get_target("up").planned_time)
+
+    def test_missed_runs_skipped(self):
+        clock = VirtualClock(datetime(2018, 8, 3))
+        self.monitor = MultiTargetMonitor(self.mock_scheduler, self.mock_notifier, clock=clock)
+        tester = self.add_mock_target("up", True)
+        self.monitor.run_due_tests()
+
+        clock.advance(200)
+        self.monitor.run_due_tests()
+
+        self.assertEqual(2, tester.run_detailed_test.call_count)
+        self.assertEqual(datetime(2018, 8, 3, 0, 4), self.monitor.get_target("up").planned_time)
+
+    @freeze_time("2018-08-03")
+    def test_removed_target_not_run(self):
+        tester = self.add_mock_target("removed", True)
+        self.monitor.remove_target("removed")
+
+        self.monitor.run_due_tests()
+
+        tester.run_detailed_test.assert_not_called()
+        self.assertEqual([], self.monitor.targets)
+
+    @freeze_time("2018-08-03")
+    def test_readded_target_runs_once(self):
+        self.add_mock_target("target", True)
+        self.monitor.remove_target("target")
+        tester = self.add_mock_target("target", True)
+
+        self.monitor.run_due_tests()
+
+        tester.run_detailed_test.assert_called_once_with()
+
+    @freeze_time("2018-08-03")
+    def test_async_testers_run_together(self):
+        first_tester = AsyncConnectionTester("first")
+        second_tester = AsyncConnectionTester("second")
+        self.monitor.add_target("first", first_tester, monitor_config)
+        sync_tester = self.add_mock_target("sync", True)
+        self.monitor.add_target("second", second_tester, monitor_config)
+
+        with patch("src.multi_target_monitor.run_detailed_tests",
+                   return_value=[make_result(False), make_result(True)]) as mock_run_tests:
+            self.monitor.run_due_tests()
+
+        mock_run_tests.assert_called_once_with([first_tester, second_tester], 100)
+        sync_tester.run_detailed_test.assert_called_once_with()
+        self.mock_notifier.notify.assert_has_calls([
+            call(datetime(2018, 8, 3), False, Status.WARNING, StatusChange.NEW_WARNING, "first", ProbeLatency(),
+                 None, None),
+            call(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, "sync", ProbeLatency(), None, None),
+            call(datetime(2018, 8, 3), True, Status.OK, StatusChange.NONE, "second", ProbeLatency(), None, None)
+        ])
@@ -0,0 +1,80 @@
+import os
+import shutil
+import signal
+import unittest
+
+from src.profiler import RunProfiler
+
+PROFILE_DIRECTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_profiles")
+
+
+def profiled_function():
+    return sum(range(1000))
+
+
+class TestRunProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = RunProfiler(PROFILE_DIRECTORY, report_lines=5)
+
+    def tearDown(self):
+        shutil.rmtree(PROFILE_DIRECTORY, ignore_errors=True)
+
+    def test_not_requested_writes_nothing(self):
+        self.assertEqual(sum(range(1000)), self.profiler.run(profiled_function))
+
+        self.assertFalse(os.path.exists(PROFILE_DIRECTORY))
+
+    def test_invalid_runs(self):
+        with self.assertRaises(ValueError):
+            self.profiler.request(0)
+
+    def test_report_written_after_requested_runs(self):
+        self.profiler.request(2)
+
+        self.profiler.run(profiled_function)
+        self.assertFalse(os.path.exists(PROFILE_DIRECTORY))
+        self.assertEqual(1, self.profiler.remaining_runs)
+
+        self.profiler.run(profiled_function)
+        self.assertEqual(0, self.profiler.remaining_runs)
+
+        file_names = sorted(os.listdir(PROFILE_DIRECTORY))
+        self.assertEqual(2, len(file_names))
+        self.assertTrue(file_names[0].endswith(".prof"))
+        self.assertTrue(file_names[1].endswith(".txt"))
+        with open(os.path.join(PROFILE_DIRECTORY, file_names[1])) as report_file:
+            self.assertIn("profiled_function", report_file.read())
+
+        # Once the report is written, runs are no longer profiled.
+        self.profiler.run(profiled_function)
+        self.assertEqual(2, len(os.listdir(PROFILE_DIRECTORY)))
+
+    def test_counted_even_when_function_raises(self):
+        self.profiler.request(1)
+
+        with self.assertRaises(ZeroDivisionError):
+            self.profiler.run(lambda: 1 / 0)
+
+        self.assertEqual(2, len(os.listdir(PROFILE_DIRECTORY)))
+
+    def test_signal_requests_runs(self):
+        previous_handler = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous_handler)
+        self.profiler.install_signal_handler(4)
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+
+        self.assertEqual(4, self.profiler.remaining_runs)
+
+    def test_signal_while_lock_held(self):
+        previous_handler = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous_handler)
+        self.profiler.install_signal_handler(1)
+
+        # As if the signal arrived part way through a profiled run, the handler mustn't wait for the lock.
+        with self.profiler._lock:
+            os.kill(os.getpid(), signal.SIGUSR1)
+
+        self.profiler.run(profiled_function)
+        self.assertEqual(0, self.profiler.remaining_runs)
+        self.assertEqual(2, len(os.listdir(PROFILE_DIRECTORY)))
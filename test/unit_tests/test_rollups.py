@@ -0,0 +1,252 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from src.connection_entry import ConnectionEntry
+from src.notifiers.entry_writer_notifier import EntryReader, EntryWriter
+from src.rollups import Resolution, RollupBucket, RollupEntryWriter, RollupStore
+from src.status_tracker import Status, StatusChange
+
+start_time = datetime(2018, 8, 3)
+
+
+def make_entry(seconds: float,
+               result: bool = True,
+               status: Status = Status.OK,
+               status_change: StatusChange = StatusChange.NONE,
+               target: str = None) -> ConnectionEntry:
+    return ConnectionEntry(start_time + timedelta(seconds=seconds), result, status, status_change, target)
+
+
+class TestRollupStore(unittest.TestCase):
+    def setUp(self):
+        self.rollup_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "test_data.rollups")
+        self.rollup_store = RollupStore()
+
+    def tearDown(self):
+        if os.path.isfile(self.rollup_file):
+            os.remove(self.rollup_file)
+
+    def add_entries(self, rollup_store: RollupStore):
+        rollup_store.add_entry(make_entry(0))
+        rollup_store.add_entry(make_entry(30, False, Status.WARNING, StatusChange.NEW_WARNING))
+        rollup_store.add_entry(make_entry(90, False, Status.ERROR, StatusChange.NEW_ERROR))
+        rollup_store.add_entry(make_entry(3690, True, Status.OK, StatusChange.ERROR_RESOLVED))
+
+    def test_counts_in_each_resolution(self):
+        self.add_entries(self.rollup_store)
+
+        minute = self.rollup_store.get_buckets(Resolution.MINUTE, start_time, start_time + timedelta(minutes=2))
+        self.assertEqual([start_time, start_time + timedelta(minutes=1)], [bucket_start for bucket_start, _ in minute])
+        self.assertEqual(RollupBucket(1, 1, 1, {Status.UNKNOWN: 0.0, Status.OK: 30.0,
+                                                Status.WARNING: 30.0, Status.ERROR: 0.0}), minute[0][1])
+        self.assertEqual(RollupBucket(0, 1, 1, {Status.UNKNOWN: 0.0, Status.OK: 0.0,
+                                                Status.WARNING: 30.0, Status.ERROR: 30.0}), minute[1][1])
+
+        hours = self.rollup_store.get_buckets(Resolution.HOUR, start_time, start_time + timedelta(hours=2))
+        self.assertEqual((1, 2, 2), (hours[0][1].successes, hours[0][1].failures, hours[0][1].status_changes))
+        self.assertEqual(3510.0, hours[0][1].time_in_status[Status.ERROR])
+        self.assertEqual((1, 0, 1), (hours[1][1].successes, hours[1][1].failures, hours[1][1].status_changes))
+        self.assertEqual(90.0, hours[1][1].time_in_status[Status.ERROR])
+
+        day = self.rollup_store.get_buckets(Resolution.DAY, start_time, start_time + timedelta(days=1))
+        self.assertEqual(3690.0, sum(day[0][1].time_in_status.values()))
+
+    def test_empty_buckets_included(self):
+        buckets = self.rollup_store.get_buckets(Resolution.HOUR, start_time, start_time + timedelta(hours=3))
+
+        self.assertEqual(3, len(buckets))
+        self.assertTrue(all(bucket == RollupBucket() for _, bucket in buckets))
+
+    def test_query_matches_minute_buckets(self):
+        self.add_entries(self.rollup_store)
+        end_time = start_time + timedelta(hours=1, minutes=30)
+
+        total = self.rollup_store.query(start_time, end_time)
+        expected = RollupBucket()
+        for _, bucket in self.rollup_store.get_buckets(Resolution.MINUTE, start_time, end_time):
+            expected.add(bucket)
+
+        self.assertEqual(expected, total)
+        self.assertEqual(4, total.tests)
+        self.assertAlmostEqual(1 - 3600 / 3690, total.uptime)
+
+    def test_query_rounds_out_to_minutes(self):
+        self.add_entries(self.rollup_store)
+
+        total = self.rollup_store.query(start_time + timedelta(seconds=10), start_time + timedelta(seconds=20))
+
+        self.assertEqual(2, total.tests)
+
+    def test_query_unknown_target(self):
+        self.add_entries(self.rollup_store)
+
+        self.assertEqual(RollupBucket(), self.rollup_store.query(start_time, start_time + timedelta(days=1), "other"))
+
+    def test_targets_kept_separate(self):
+        self.rollup_store.add_entry(make_entry(0, target="a"))
+        self.rollup_store.add_entry(make_entry(10, False, Status.WARNING, target="b"))
+        self.rollup_store.add_entry(make_entry(20, target="a"))
+
+        self.assertEqual(["a", "b"], self.rollup_store.targets)
+        a_total = self.rollup_store.query(start_time, start_time + timedelta(days=1), "a")
+        self.assertEqual(2, a_total.successes)
+        self.assertEqual(20.0, a_total.time_in_status[Status.OK])
+        self.assertEqual(1, self.rollup_store.query(start_time, start_time + timedelta(days=1), "b").failures)
+
+    def test_time_after_max_gap_not_counted(self):
+        rollup_store = RollupStore(max_gap=60)
+        rollup_store.add_entry(make_entry(0))
+        rollup_store.add_entry(make_entry(600))
+
+        total = rollup_store.query(start_time, start_time + timedelta(days=1))
+
+        self.assertEqual(60.0, total.time_in_status[Status.OK])
+
+    def test_prune(self):
+        self.add_entries(self.rollup_store)
+
+        self.rollup_store.prune(Resolution.MINUTE, start_time + timedelta(hours=1))
+
+        minutes = self.rollup_store.get_buckets(Resolution.MINUTE, start_time, start_time + timedelta(hours=2))
+        self.assertEqual(0, sum(bucket.tests for _, bucket in minutes[:60]))
+        self.assertEqual(1, sum(bucket.tests for _, bucket in minutes[60:]))
+        self.assertEqual(3, self.rollup_store.query(start_time, start_time + timedelta(hours=1)).tests)
+
+    def test_save_and_load(self):
+        rollup_store = RollupStore(self.rollup_file)
+        self.add_entries(rollup_store)
+        rollup_store.add_entry(make_entry(10, target="other"))
+        rollup_store.save()
+
+        loaded = RollupStore(self.rollup_file)
+        end_time = start_time + timedelta(days=1)
+        self.assertEqual(rollup_store.query(start_time, end_time), loaded.query(start_time, end_time))
+        self.assertEqual(rollup_store.query(start_time, end_time, "other"), loaded.query(start_time, end_time, "other"))
+
+        # The time in the last status carries on from the saved entry.
+        loaded.add_entry(make_entry(3700))
+        self.assertEqual(10.0, loaded.query(start_time, end_time).time_in_status[Status.OK] - 30.0)
+
+    def test_save_without_file(self):
+        self.add_entries(self.rollup_store)
+        self.rollup_store.save()
+
+        self.assertFalse(os.path.isfile(self.rollup_file))
+
+    def test_rebuild(self):
+        self.add_entries(self.rollup_store)
+        entries = [make_entry(0),
+                   make_entry(30, False, Status.WARNING, StatusChange.NEW_WARNING),
+                   make_entry(90, False, Status.ERROR, StatusChange.NEW_ERROR),
+                   make_entry(3690, True, Status.OK, StatusChange.ERROR_RESOLVED)]
+
+        rebuilt = RollupStore.rebuild(entries, self.rollup_file)
+        rebuilt.save()
+
+        end_time = start_time + timedelta(days=1)
+        self.assertEqual(self.rollup_store.query(start_time, end_time), rebuilt.query(start_time, end_time))
+        self.assertTrue(os.path.isfile(self.rollup_file))
+
+    def test_catch_up(self):
+        self.add_entries(self.rollup_store)
+        self.rollup_store.add_entry(make_entry(20, target="other"))
+        entries = [make_entry(0),
+                   make_entry(20, target="other"),
+                   make_entry(30, False, Status.WARNING, StatusChange.NEW_WARNING),
+                   make_entry(90, False, Status.ERROR, StatusChange.NEW_ERROR),
+                   make_entry(3690, True, Status.OK, StatusChange.ERROR_RESOLVED),
+                   make_entry(3700, target="other"),
+                   make_entry(3750)]
+        reader = EntryReader()
+        reader.read_entries = MagicMock(return_value=iter(entries))
+
+        # Saved after the first two entries, the rest were written but never saved.
+        stale = RollupStore(self.rollup_file)
+        stale.add_entry(entries[0])
+        stale.add_entry(entries[1])
+        stale.save()
+        stale = RollupStore(self.rollup_file)
+
+        self.assertEqual(5, stale.catch_up(reader))
+
+        self.rollup_store.add_entry(make_entry(3700, target="other"))
+        self.rollup_store.add_entry(make_entry(3750))
+        end_time = start_time + timedelta(days=1)
+        self.assertEqual(self.rollup_store.query(start_time, end_time), stale.query(start_time, end_time))
+        self.assertEqual(self.rollup_store.query(start_time, end_time, "other"),
+                         stale.query(start_time, end_time, "other"))
+
+    def test_catch_up_empty_store_rebuilds(self):
+        self.add_entries(self.rollup_store)
+        reader = EntryReader()
+        reader.read_entries = MagicMock(return_value=iter([make_entry(0),
+                                                          make_entry(30, False, Status.WARNING,
+                                                                     StatusChange.NEW_WARNING),
+                                                          make_entry(90, False, Status.ERROR, StatusChange.NEW_ERROR),
+                                                          make_entry(3690, True, Status.OK,
+                                                                     StatusChange.ERROR_RESOLVED)]))
+
+        caught_up = RollupStore()
+
+        self.assertEqual(4, caught_up.catch_up(reader))
+        end_time = start_time + timedelta(days=1)
+        self.assertEqual(self.rollup_store.query(start_time, end_time), caught_up.query(start_time, end_time))
+
+
+class TestRollupEntryWriter(unittest.TestCase):
+    def setUp(self):
+        self.entry_writer = EntryWriter()
+        self.entry_writer.write_new_entries = MagicMock()
+        self.entry_writer.flush = MagicMock()
+        self.entry_writer.sync = MagicMock()
+        self.entry_writer.close = MagicMock()
+        self.rollup_store = RollupStore()
+        self.rollup_store.save = MagicMock()
+
+    def test_entries_written_and_rolled_up(self):
+        writer = RollupEntryWriter(self.entry_writer, self.rollup_store)
+
+        writer.write_new_entry(make_entry(0))
+        writer.write_new_entries([make_entry(10), make_entry(20, False, Status.WARNING)])
+
+        self.assertEqual(2, self.entry_writer.write_new_entries.call_count)
+        total = self.rollup_store.query(start_time, start_time + timedelta(minutes=1))
+        self.assertEqual((2, 1), (total.successes, total.failures))
+        self.rollup_store.save.assert_not_called()
+
+    def test_saved_every_interval(self):
+        writer = RollupEntryWriter(self.entry_writer, self.rollup_store, save_interval=2)
+
+        writer.write_new_entry(make_entry(0))
+        self.rollup_store.save.assert_not_called()
+        writer.write_new_entry(make_entry(10))
+        self.rollup_store.save.assert_called_once_with()
+
+    def test_flush_and_sync_save(self):
+        writer = RollupEntryWriter(self.entry_writer, self.rollup_store)
+
+        writer.flush()
+        writer.sync()
+
+        self.entry_writer.flush.assert_called_once_with()
+        self.entry_writer.sync.assert_called_once_with()
+        self.assertEqual(2, self.rollup_store.save.call_count)
+
+    def test_close_saves(self):
+        writer = RollupEntryWriter(self.entry_writer, self.rollup_store)
+
+        writer.close()
+
+        self.entry_writer.close.assert_called_once_with()
+        self.rollup_store.save.assert_called_once_with()
+
+    def test_not_rolled_up_when_write_fails(self):
+        self.entry_writer.write_new_entries.side_effect = OSError
+        writer = RollupEntryWriter(self.entry_writer, self.rollup_store)
+
+        with self.assertRaises(OSError):
+            writer.write_new_entry(make_entry(0))
+
+        self.assertEqual([], self.rollup_store.targets)
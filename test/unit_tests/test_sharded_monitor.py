@@ -0,0 +1,152 @@
+import os
+import time
+import unittest
+from typing import List
+
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ConnectionTester, ProbeLatency, ProbeOutcome, ProbeResult
+from src.notifiers.entry_writer_notifier import EntryWriter
+from src.sharded_monitor import ShardedMonitor, TargetSpec, TargetState, get_shard
+from src.status_tracker import Status, StatusChange
+
+CRASH_MARKER = "test_sharded_monitor_crashed"
+CRASH_AFTER = 3
+
+monitor_config = {
+    "test_interval": 0.1,
+    "retry_interval": 0.1,
+    "error_interval": 0.1
+}
+
+
+# Workers are spawned, so testers are created by module level functions which can be pickled.
+class FakeConnectionTester(ConnectionTester):
+    def run_detailed_test(self) -> ProbeResult:
+        if "down" in self.remote_to_check:
+            return ProbeResult(ProbeOutcome.CONNECTION_FAILURE, ProbeLatency(total_time=0.001))
+        return ProbeResult(ProbeOutcome.SUCCESS, ProbeLatency(0.001, 0.001, 0.002))
+
+
+class CrashingConnectionTester(FakeConnectionTester):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.probes = 0
+
+    def run_detailed_test(self) -> ProbeResult:
+        # The first worker crashes once it has sent CRASH_AFTER results, the restarted one carries on as normal.
+        self.probes += 1
+        if self.probes > CRASH_AFTER and not os.path.exists(CRASH_MARKER):
+            open(CRASH_MARKER, "w").close()
+            os._exit(1)
+        return super().run_detailed_test()
+
+
+def create_fake_tester(spec: TargetSpec) -> ConnectionTester:
+    return FakeConnectionTester(spec.remote_to_check, port=spec.port)
+
+
+def create_crashing_tester(spec: TargetSpec) -> ConnectionTester:
+    return CrashingConnectionTester(spec.remote_to_check, port=spec.port)
+
+
+class ListEntryWriter(EntryWriter):
+    def __init__(self) -> None:
+        self.entries: List[ConnectionEntry] = []
+
+    def write_new_entry(self, entry: ConnectionEntry):
+        self.entries.append(entry)
+
+
+def make_targets(*names: str) -> List[TargetSpec]:
+    return [TargetSpec(name, name + ".example.com", monitor_config, number_retry_attempts=1) for name in names]
+
+
+class TestShardedMonitor(unittest.TestCase):
+    def setUp(self):
+        self.writer = ListEntryWriter()
+        self.monitor = None
+
+    def tearDown(self):
+        if self.monitor is not None:
+            self.monitor.stop()
+        if os.path.exists(CRASH_MARKER):
+            os.remove(CRASH_MARKER)
+
+    def wait_for(self, condition, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the workers.")
+            time.sleep(0.05)
+
+    def test_get_shard_is_stable(self):
+        self.assertEqual(get_shard("target", 4), get_shard("target", 4))
+        self.assertTrue(all(0 <= get_shard(str(index), 3) < 3 for index in range(100)))
+
+    def test_targets_split_between_workers(self):
+        names = ["target{index}".format(index=index) for index in range(20)]
+        monitor = ShardedMonitor(self.writer, make_targets(*names), workers=3)
+
+        shard_targets = monitor.get_shard_targets()
+        self.assertEqual(3, monitor.workers)
+        self.assertCountEqual(names, [name for shard in shard_targets for name in shard])
+        for shard in shard_targets:
+            for name in shard:
+                self.assertEqual(get_shard(name, 3), get_shard(shard[0], 3))
+
+    def test_empty_shards_have_no_worker(self):
+        monitor = ShardedMonitor(self.writer, make_targets("only"), workers=4)
+
+        self.assertEqual(1, monitor.workers)
+
+    def test_duplicate_names_rejected(self):
+        with self.assertRaises(ValueError):
+            ShardedMonitor(self.writer, make_targets("target", "target"))
+
+    def test_invalid_config_rejected(self):
+        with self.assertRaises(ValueError):
+            ShardedMonitor(self.writer, [TargetSpec("target", "example.com", {"test_interval": 1})])
+
+    def test_entries_written_and_states_tracked(self):
+        self.monitor = ShardedMonitor(self.writer, make_targets("up1", "up2", "down1", "down2"), workers=2,
+                                      tick_interval=0.05, batch_size=2, tester_factory=create_fake_tester)
+        self.monitor.start()
+
+        self.wait_for(lambda: all(self.monitor.get_state(name) is not None and
+                                  self.monitor.get_state(name).number_failures >= 2 for name in ["down1", "down2"]))
+        self.wait_for(lambda: all(self.monitor.get_state(name) is not None for name in ["up1", "up2"]))
+        self.monitor.stop()
+
+        self.assertEqual(TargetState(Status.OK, 0), self.monitor.get_state("up1"))
+        self.assertEqual(Status.ERROR, self.monitor.get_state("down1").status)
+        self.assertEqual(len(self.writer.entries), self.monitor.entries_written)
+        self.assertEqual({"up1", "up2", "down1", "down2"}, set(entry.target for entry in self.writer.entries))
+        self.assertTrue(all(entry.result == (entry.target.startswith("up")) for entry in self.writer.entries))
+        self.assertEqual(0, self.monitor.restarts)
+
+    def test_crashed_worker_restarted_with_state(self):
+        self.monitor = ShardedMonitor(self.writer, make_targets("down"), workers=1, tick_interval=0.05,
+                                      batch_size=1, tester_factory=create_crashing_tester)
+        self.monitor.start()
+
+        self.wait_for(lambda: self.monitor.restarts == 1 and self.monitor.entries_written >= CRASH_AFTER + 2)
+        self.monitor.stop()
+
+        # A worker starting again from UNKNOWN would report a new warning and error, a restored one is still in error.
+        self.assertTrue(os.path.exists(CRASH_MARKER))
+        self.assertEqual([StatusChange.NEW_WARNING, StatusChange.NEW_ERROR],
+                         [entry.status_change for entry in self.writer.entries[:2]])
+        self.assertTrue(all(entry.status == Status.ERROR and entry.status_change == StatusChange.NONE
+                            for entry in self.writer.entries[2:]))
+        self.assertEqual(TargetState(Status.ERROR, len(self.writer.entries)), self.monitor.get_state("down"))
+
+    def test_stop_before_start(self):
+        monitor = ShardedMonitor(self.writer, make_targets("target"), workers=1)
+
+        monitor.stop()
+
+        self.assertEqual([], self.writer.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
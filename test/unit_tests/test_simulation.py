@@ -0,0 +1,240 @@
+import io
+import json
+import os
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from src.clock import VirtualClock
+from src.connection_entry import ConnectionEntry
+from src.connection_tester import ProbeLatency, ProbeOutcome
+from src.notifiers.json_lines_entry_writer import JsonLinesEntryReader, JsonLinesEntryWriter
+from src.simulation import Outage, ReplayConnectionTester, ScriptedConnectionTester, VirtualScheduler, \
+    load_outages, main, simulate
+from src.status_tracker import Status, StatusChange
+
+TEST_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+OUTAGE_FILE = os.path.join(TEST_DIRECTORY, "test_outages.json")
+OUTPUT_FILE = os.path.join(TEST_DIRECTORY, "test_simulation.jsonl")
+
+start = datetime(2018, 8, 3)
+
+
+def minutes(count: float) -> datetime:
+    return start + timedelta(minutes=count)
+
+
+class TestVirtualScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start)
+        self.scheduler = VirtualScheduler(self.clock)
+        self.run_times = []
+
+    def record_run(self):
+        self.run_times.append(self.clock.now())
+
+    def test_date_jobs_run_in_order(self):
+        self.scheduler.add_job(self.record_run, "date", run_date=minutes(2))
+        self.scheduler.add_job(self.record_run, "date", run_date=minutes(1))
+
+        self.assertEqual(2, self.scheduler.run_until(minutes(10)))
+
+        self.assertEqual([minutes(1), minutes(2)], self.run_times)
+        self.assertEqual(minutes(10), self.clock.now())
+
+    def test_jobs_at_end_not_run(self):
+        self.scheduler.add_job(self.record_run, "date", run_date=minutes(10))
+
+        self.assertEqual(0, self.scheduler.run_until(minutes(10)))
+
+    def test_interval_job_repeats(self):
+        self.scheduler.add_job(self.record_run, "interval", seconds=120, id="job")
+
+        self.scheduler.run_until(minutes(7))
+
+        self.assertEqual([minutes(2), minutes(4), minutes(6)], self.run_times)
+
+    def test_modify_job(self):
+        self.scheduler.add_job(self.record_run, "interval", seconds=120, id="job", next_run_time=minutes(1))
+        self.scheduler.modify_job("job", next_run_time=minutes(5))
+
+        self.scheduler.run_until(minutes(8))
+
+        self.assertEqual([minutes(5), minutes(7)], self.run_times)
+
+    def test_unsupported_trigger(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.add_job(self.record_run, "cron", hour=1)
+
+
+class TestScriptedConnectionTester(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start)
+        self.tester = ScriptedConnectionTester(self.clock,
+                                               [Outage(minutes(10), minutes(20), ProbeOutcome.DNS_FAILURE),
+                                                Outage(minutes(1), minutes(2))],
+                                               ProbeLatency(0.01, 0.02, 0.03))
+
+    def test_outcomes(self):
+        outcomes = []
+        for minute in (0, 1, 2, 10, 19.5, 20):
+            self.clock.advance_to(minutes(minute))
+            outcomes.append(self.tester.run_detailed_test().outcome)
+
+        self.assertEqual([ProbeOutcome.SUCCESS, ProbeOutcome.CONNECTION_FAILURE, ProbeOutcome.SUCCESS,
+                          ProbeOutcome.DNS_FAILURE, ProbeOutcome.DNS_FAILURE, ProbeOutcome.SUCCESS], outcomes)
+
+    def test_failure_latency(self):
+        self.clock.advance_to(minutes(1))
+
+        self.assertEqual(ProbeLatency(0.01, total_time=0.03), self.tester.run_detailed_test().latency)
+
+    def test_overlapping_outages(self):
+        with self.assertRaises(ValueError):
+            ScriptedConnectionTester(self.clock, [Outage(minutes(1), minutes(3)), Outage(minutes(2), minutes(4))])
+
+
+class TestLoadOutages(unittest.TestCase):
+    def tearDown(self):
+        if os.path.isfile(OUTAGE_FILE):
+            os.remove(OUTAGE_FILE)
+
+    def write_outages(self, outages):
+        with open(OUTAGE_FILE, "w") as outage_file:
+            json.dump(outages, outage_file)
+
+    def test_load(self):
+        self.write_outages([{"start": "2018-08-03 00:01:00", "end": "2018-08-03 00:02:00"},
+                            {"start": "2018-08-03 00:10:00", "end": "2018-08-03 00:20:00", "outcome": "DNS_FAILURE"}])
+
+        self.assertEqual([Outage(minutes(1), minutes(2)), Outage(minutes(10), minutes(20), ProbeOutcome.DNS_FAILURE)],
+                         load_outages(OUTAGE_FILE))
+
+    def test_missing_key(self):
+        self.write_outages([{"start": "2018-08-03 00:01:00"}])
+
+        with self.assertRaises(ValueError):
+            load_outages(OUTAGE_FILE)
+
+    def test_invalid_outcome(self):
+        self.write_outages([{"start": "2018-08-03 00:01:00", "end": "2018-08-03 00:02:00", "outcome": "SUCCESS"}])
+
+        with self.assertRaises(ValueError):
+            load_outages(OUTAGE_FILE)
+
+
+class TestReplayConnectionTester(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock(start)
+        self.entries = [
+            ConnectionEntry(minutes(1), False, Status.WARNING, StatusChange.NEW_WARNING, "example.com",
+                            ProbeLatency(total_time=0.5)),
+            ConnectionEntry(minutes(2), True, Status.OK, StatusChange.WARNING_RESOLVED, "example.com",
+                            ProbeLatency(0.01, 0.02, 0.03)),
+            ConnectionEntry(minutes(3), False, Status.WARNING, StatusChange.NEW_WARNING, "example.com",
+                            ProbeLatency(0.01, total_time=0.5)),
+            ConnectionEntry(minutes(4), True, Status.OK, StatusChange.NONE, "example.org",
+                            ProbeLatency(0.01, 0.02, 0.03))
+        ]
+
+    def test_replays_latest_entry(self):
+        tester = ReplayConnectionTester(self.clock, self.entries[:3])
+        outcomes = []
+        for minute in (0, 1, 1.5, 2, 3, 10):
+            self.clock.advance_to(minutes(minute))
+            outcomes.append(tester.run_detailed_test().outcome)
+
+        self.assertEqual([ProbeOutcome.DNS_FAILURE, ProbeOutcome.DNS_FAILURE, ProbeOutcome.DNS_FAILURE,
+                          ProbeOutcome.SUCCESS, ProbeOutcome.CONNECTION_FAILURE, ProbeOutcome.CONNECTION_FAILURE],
+                         outcomes)
+
+    def test_target(self):
+        tester = ReplayConnectionTester(self.clock, self.entries, "example.org")
+        self.clock.advance_to(minutes(10))
+
+        self.assertEqual(ProbeOutcome.SUCCESS, tester.run_detailed_test().outcome)
+
+    def test_several_targets_need_target(self):
+        with self.assertRaises(ValueError):
+            ReplayConnectionTester(self.clock, self.entries)
+
+    def test_no_entries(self):
+        with self.assertRaises(ValueError):
+            ReplayConnectionTester(self.clock, self.entries, "example.net")
+
+
+class TestSimulate(unittest.TestCase):
+    def setUp(self):
+        self.monitor_config = {
+            "test_interval": 300,
+            "retry_interval": 10,
+            "error_interval": 60
+        }
+
+    def tearDown(self):
+        for file_name in (OUTAGE_FILE, OUTPUT_FILE, OUTPUT_FILE + ".idx"):
+            if os.path.isfile(file_name):
+                os.remove(file_name)
+
+    def test_outage(self):
+        clock = VirtualClock(start)
+        tester = ScriptedConnectionTester(clock, [Outage(minutes(10), minutes(13))])
+        writer = MagicMock()
+
+        result = simulate(clock, tester, self.monitor_config, minutes(20), number_retry_attempts=2, writer=writer)
+
+        seconds = [0, 300, 600, 610, 620, 680, 740, 800, 1100]
+        self.assertEqual(len(seconds), result.runs)
+        self.assertEqual([start + timedelta(seconds=second) for second in seconds],
+                         [entry.time for entry in result.entries])
+        self.assertEqual([Status.OK, Status.OK, Status.WARNING, Status.WARNING, Status.ERROR, Status.ERROR,
+                          Status.ERROR, Status.OK, Status.OK], [entry.status for entry in result.entries])
+        self.assertEqual(1, result.status_changes[StatusChange.NEW_ERROR])
+        self.assertEqual(1, result.status_changes[StatusChange.ERROR_RESOLVED])
+        self.assertEqual(1, result.summarise().outages)
+        writer.write_new_entries.assert_called()
+        writer.flush.assert_called_once_with()
+
+    def test_persistent_with_jitter_repeatable(self):
+        self.monitor_config.update(scheduling_mode="persistent", jitter=5)
+
+        def run():
+            clock = VirtualClock(start)
+            tester = ScriptedConnectionTester(clock, [Outage(minutes(30), minutes(45))])
+            return simulate(clock, tester, self.monitor_config, start + timedelta(days=1), seed=3).entries
+
+        random_state = random.getstate()
+        entries = run()
+
+        self.assertEqual(entries, run())
+        self.assertGreater(len(entries), 24 * 12)
+        # Only the monitor's own generator is seeded.
+        self.assertEqual(random_state, random.getstate())
+
+    def test_main(self):
+        with open(OUTAGE_FILE, "w") as outage_file:
+            json.dump([{"start": "2018-08-03 00:10:00", "end": "2018-08-03 00:13:00"}], outage_file)
+
+        self.assertEqual(0, main(["--outages", OUTAGE_FILE, "--start", "2018-08-03 00:00:00",
+                                  "--end", "2018-08-03 00:20:00", "--retry-attempts", "2", "--output", OUTPUT_FILE]))
+
+        self.assertEqual(9, len(list(JsonLinesEntryReader(OUTPUT_FILE).read_entries())))
+
+    def test_main_history_target(self):
+        JsonLinesEntryWriter(OUTPUT_FILE).write_new_entries([
+            ConnectionEntry(minutes(0), True, Status.OK, StatusChange.NONE, "example.com"),
+            ConnectionEntry(minutes(5), False, Status.WARNING, StatusChange.NEW_WARNING, "example.org"),
+            ConnectionEntry(minutes(30), True, Status.OK, StatusChange.NONE, "example.com")
+        ])
+
+        self.assertEqual(1, main(["--history", OUTPUT_FILE]))
+        with patch("sys.stdout", new_callable=io.StringIO) as output:
+            self.assertEqual(0, main(["--history", OUTPUT_FILE, "--target", "example.com", "--test-interval", "60"]))
+
+        self.assertEqual("2018-08-03 00:30:00", json.loads(output.getvalue())["end"])
+
+    def test_main_empty_history(self):
+        JsonLinesEntryWriter(OUTPUT_FILE)
+
+        self.assertEqual(1, main(["--history", OUTPUT_FILE]))
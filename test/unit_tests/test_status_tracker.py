@@ -140,3 +140,12 @@ class TestStatusTracker(unittest.TestCase):
         self.assertEqual(Status.OK, self.status_tracker.status)
         self.assertEqual(StatusChange.INVALID, status_change)
         self.assertEqual(datetime(2018, 8, 3), self.status_tracker.last_success)
+
+    def test_restore(self):
+        self.status_tracker = StatusTracker(number_retry_attempts=2)
+
+        self.status_tracker.restore(Status.WARNING, 2)
+
+        self.assertEqual(Status.WARNING, self.status_tracker.status)
+        self.assertEqual(2, self.status_tracker.number_failures)
+        self.submit_result_and_expect(False, Status.ERROR, StatusChange.NEW_ERROR)
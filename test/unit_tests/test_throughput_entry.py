@@ -0,0 +1,29 @@
+import unittest
+from datetime import datetime
+
+from src.throughput_entry import ThroughputEntry
+
+
+class TestThroughputEntry(unittest.TestCase):
+    def test_round_trip(self):
+        entry = ThroughputEntry(datetime(2018, 8, 3, 12, 30), "example.com", True, 1000000, 2.5)
+
+        json_entry = entry.to_json()
+
+        self.assertEqual({"time": "2018-08-03 12:30:00", "target": "example.com", "result": True,
+                          "bytes_received": 1000000, "duration": 2.5}, json_entry)
+        self.assertEqual(entry, ThroughputEntry.from_json(json_entry))
+
+    def test_bandwidth(self):
+        self.assertEqual(400000, ThroughputEntry(datetime(2018, 8, 3), "example.com", True, 1000000, 2.5).bandwidth)
+        self.assertIsNone(ThroughputEntry(datetime(2018, 8, 3), "example.com", False, 0, None).bandwidth)
+
+    def test_missing_key(self):
+        with self.assertRaises(ValueError):
+            ThroughputEntry.from_json({"time": "2018-08-03 12:30:00", "target": "example.com", "result": True,
+                                       "bytes_received": 1000000})
+
+    def test_invalid_time(self):
+        with self.assertRaises(ValueError):
+            ThroughputEntry.from_json({"time": "03/08/2018", "target": "example.com", "result": True,
+                                       "bytes_received": 1000000, "duration": 2.5})
@@ -0,0 +1,140 @@
+import socket
+import socketserver
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.connection_tester import ProbeOutcome
+from src.throughput_tester import ThroughputResult, ThroughputTester, parse_status_line
+
+
+class DownloadHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        request = b""
+        while not request.endswith(b"\r\n\r\n"):
+            data = self.request.recv(1024)
+            if not data:
+                return
+            request += data
+        self.server.requests.append(request)
+
+        try:
+            response = self.server.status_line + b"\r\n\r\n" if self.server.response_size else b""
+            self.request.sendall(response + b"x" * (self.server.response_size - len(response)))
+            # Holds the connection open without sending anything more, as a stalled download would.
+            self.server.release.wait(5)
+        except OSError:
+            pass
+
+
+class DownloadServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+
+
+class TestThroughputTester(unittest.TestCase):
+    def setUp(self):
+        self.server = DownloadServer(("127.0.0.1", 0), DownloadHandler)
+        self.server.requests = []
+        self.server.response_size = 200000
+        self.server.status_line = b"HTTP/1.1 200 OK"
+        self.server.release = threading.Event()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = "http://127.0.0.1:{port}/download?size=large".format(port=self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_stops_at_max_bytes(self):
+        tester = ThroughputTester(self.url, max_bytes=100000, buffer_size=4096)
+
+        result = tester.run_throughput_test()
+
+        self.assertEqual(ProbeOutcome.SUCCESS, result.outcome)
+        self.assertEqual(100000, result.bytes_received)
+        self.assertGreater(result.bandwidth, 0)
+        self.assertEqual([b"GET /download?size=large HTTP/1.1\r\nHost: 127.0.0.1:" +
+                          str(self.server.server_address[1]).encode("ascii") +
+                          b"\r\nConnection: close\r\n\r\n"], self.server.requests)
+
+    def test_server_closes_early(self):
+        self.server.response_size = 5000
+        self.server.release.set()
+        tester = ThroughputTester(self.url, max_bytes=100000)
+
+        result = tester.run_throughput_test()
+
+        self.assertTrue(result.passed)
+        self.assertEqual(5000, result.bytes_received)
+
+    def test_timeout_keeps_partial_download(self):
+        self.server.response_size = 3000
+        tester = ThroughputTester(self.url, max_bytes=100000, timeout=0.3)
+
+        result = tester.run_throughput_test()
+
+        self.assertTrue(result.passed)
+        self.assertEqual(3000, result.bytes_received)
+        self.assertGreaterEqual(result.duration, 0.2)
+
+    def test_nothing_received(self):
+        self.server.response_size = 0
+        self.server.release.set()
+
+        result = ThroughputTester(self.url).run_throughput_test()
+
+        self.assertEqual(ThroughputResult(ProbeOutcome.CONNECTION_FAILURE), result)
+        self.assertIsNone(result.bandwidth)
+
+    def test_error_status_fails(self):
+        self.server.status_line = b"HTTP/1.1 404 Not Found"
+
+        result = ThroughputTester(self.url, max_bytes=100000).run_throughput_test()
+
+        self.assertEqual(ThroughputResult(ProbeOutcome.HTTP_FAILURE, status_code=404), result)
+        self.assertIsNone(result.bandwidth)
+
+    def test_redirect_fails(self):
+        self.server.status_line = b"HTTP/1.1 301 Moved Permanently"
+        self.server.release.set()
+
+        self.assertEqual(ProbeOutcome.HTTP_FAILURE, ThroughputTester(self.url).run_throughput_test().outcome)
+
+    def test_not_http_fails(self):
+        self.server.status_line = b"SSH-2.0-OpenSSH_7.4"
+        self.server.release.set()
+
+        self.assertEqual(ThroughputResult(ProbeOutcome.HTTP_FAILURE), ThroughputTester(self.url).run_throughput_test())
+
+    def test_parse_status_line(self):
+        self.assertEqual(200, parse_status_line(bytearray(b"HTTP/1.1 200 OK\r\nContent-Length: 0")))
+        self.assertEqual(500, parse_status_line(bytearray(b"HTTP/1.0 500\r\n")))
+        self.assertIsNone(parse_status_line(bytearray(b"HTTP/1.1 20")))
+        with self.assertRaises(ValueError):
+            parse_status_line(bytearray(b"HTTP/1.1 OK 200\r\n"))
+        with self.assertRaises(ValueError):
+            parse_status_line(bytearray(b"x" * 1024))
+
+    def test_connection_failure(self):
+        with socket.socket() as unused_socket:
+            unused_socket.bind(("127.0.0.1", 0))
+            port = unused_socket.getsockname()[1]
+
+        result = ThroughputTester("http://127.0.0.1:{port}/".format(port=port)).run_throughput_test()
+
+        self.assertEqual(ProbeOutcome.CONNECTION_FAILURE, result.outcome)
+        self.assertFalse(result.passed)
+
+    @patch("src.connection_tester.socket.gethostbyname",
+           side_effect=socket.gaierror(socket.EAI_NONAME, "Name or service not known"))
+    def test_dns_failure(self, mock_gethostbyname):
+        self.assertEqual(ProbeOutcome.DNS_FAILURE, ThroughputTester(self.url).run_throughput_test().outcome)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ThroughputTester("ftp://example.com/file")
+        with self.assertRaises(ValueError):
+            ThroughputTester(self.url, max_bytes=0)